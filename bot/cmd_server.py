@@ -1,14 +1,18 @@
 import os
 import re
+import sys
 import subprocess
-import pandas as pd
 import asyncio
 from typing import Dict, List, Any, Optional, Union
 from slack_bolt.async_app import AsyncApp
 import logging
-import glob
 from datetime import datetime
 
+# 보고서 모듈과 CMDB 저장소 공유 (report/cmdb.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'report'))
+from cmdb import INDEX_COLUMNS, CmdbStore
+from cmdb_template import compile_templates
+
 class ServerManager:
     def __init__(self, app: AsyncApp, config, queue, check_permission, get_user_info, filter_data, ip_pattern, hostname_pattern):
         self.app = app
@@ -25,12 +29,21 @@ class ServerManager:
         # report 모듈을 함수로 받지 않고 인터프리터로 실행시키기 위한 루트 지정
         self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-        self.CSV_FILE = self.get_latest_csv_file(
+        # 서버 정보 템플릿 ([TEMPLATES] *_template) - 시작 시 한 번 컴파일
+        self.templates = compile_templates(self.config['TEMPLATES'])
+
+        # 구성관리조회 CSV - 한 번만 읽고 IP/Hostname/서비스 인덱스로 조회
+        # 새 export 는 감시 스레드가 백그라운드에서 읽어 인덱스를 교체 (재시작 불필요)
+        # 템플릿([TEMPLATES] *_template)과 필터링 대상 컬럼만 읽음
+        self.cmdb = CmdbStore(
             os.path.join(self.project_root, self.config['FILES']['csv_file_dir'].replace('./', '')),
             config['FILES']['csv_file_prefix'],
-            config['FILES']['csv_file_extension']
-        )
-        self.CSV_FILE_NAME = os.path.basename(self.CSV_FILE)
+            config['FILES']['csv_file_extension'],
+            logger=self.logger,
+            columns=self.cmdb_columns()
+        ).refresh()
+        self.cmdb.watch(config['FILES'].getint('csv_reload_interval', fallback=60))
+        self.validate_templates()
 
         # 슬래시 명령어 핸들러 등록
         app.command("/server_report")(self.handle_report_command)
@@ -57,15 +70,35 @@ class ServerManager:
         self.logger.info("ServerManager initialized with action handlers")
         self.logger.debug(r"Registered action handler for pattern: ^server_info_button_\d+$")
 
-    def get_latest_csv_file(self, directory, prefix, extension):
-        pattern = os.path.join(directory, f"{prefix}*{extension}")
-        files = glob.glob(pattern)
-        if not files:
-            raise FileNotFoundError(f"No files found matching the pattern: {pattern}")
-        return max(files, key=os.path.getctime)
-
-    def read_extdata_file(self, filename):
-        return pd.read_csv(filename, encoding='euc-kr')
+    # 봇에서 사용하는 CMDB 컬럼 (인덱스 컬럼 + 템플릿 자리 표시자 + 필터링 대상 컬럼)
+    def cmdb_columns(self):
+        columns = set(INDEX_COLUMNS)
+        for template in self.templates.values():
+            columns |= set(template.columns)
+        if self.config.has_section('DATA_FILTERING'):
+            columns |= {column for column in self.config['DATA_FILTERING'].get('filtered_columns', '').split(', ') if column}
+        return columns
+
+    # 템플릿 자리 표시자 중 CSV 에 없는 컬럼 경고 (해당 자리는 {컬럼} 그대로 표시됨)
+    def validate_templates(self):
+        columns = self.cmdb.current().frame.columns
+        for name, template in self.templates.items():
+            missing = template.missing(columns)
+            if missing:
+                self.logger.warning(f"Template {name}: columns not found in {self.CSV_FILE_NAME}: {', '.join(missing)}")
+
+    @property
+    def CSV_FILE_NAME(self):
+        return self.cmdb.file_name
+
+    # IP 에 해당하는 서버 정보 (사용자 그룹 기준 컬럼 필터링 적용, 없으면 None)
+    def find_server(self, ip, user_group):
+        index = self.cmdb.current()
+        position = index.find_ip(ip)
+        if position is None:
+            return None
+        # 공유 저장소를 바꾸지 않도록 복사본에 필터링 적용
+        return self.filter_data(index.rows([position]), user_group).iloc[0]
 
     # 보고서 생성 진행상태 메시지
     async def update_progress_message(self, client, channel_id, message_ts, current_step, total_steps, step_name):
@@ -365,26 +398,13 @@ class ServerManager:
         ip = match.group(1)
 
         try:
-            df = self.read_extdata_file(self.CSV_FILE)
-            self.logger.info(f"Original dataframe columns: {df.columns.tolist()}")
-        
-            df = self.filter_data(df, user_group)
-            self.logger.info(f"Filtered dataframe columns: {df.columns.tolist()}")
-        
-            server_info = df[(df['사설IP'] == ip) | (df['공인/NAT IP'] == ip)]
+            server_info = self.find_server(ip, user_group)
         
-            if server_info.empty:
+            if server_info is None:
                 await say(f"{ip}에 해당하는 서버 정보를 찾을 수 없습니다.")
                 return
         
-            formatted_info = template.replace('##', '\n')
-            for column, value in server_info.iloc[0].items():
-                placeholder = f"{{{column}}}"
-                if placeholder in formatted_info:
-                    value = '-' if pd.isna(value) or value == '' else str(value)
-                    formatted_info = formatted_info.replace(placeholder, value)
-        
-            await say(formatted_info)
+            await say(template.render(server_info))
         except Exception as e:
             self.logger.error(f"Error occurred while handling {command['command']} command: {str(e)}", exc_info=True)
             await say(f"서버 정보 조회 중 오류가 발생했습니다: {str(e)}")
@@ -393,11 +413,11 @@ class ServerManager:
 
     # @app.command("/server_info")
     async def handle_server_info_command(self, ack, say, command, client):
-        await self.handle_server_command(ack, say, command, self.config['TEMPLATES']['info_template'], client)
+        await self.handle_server_command(ack, say, command, self.templates['info_template'], client)
 
     # @app.command("/server_mngt")
     async def handle_server_mngt_command(self, ack, say, command, client):
-        await self.handle_server_command(ack, say, command, self.config['TEMPLATES']['mngt_template'], client)
+        await self.handle_server_command(ack, say, command, self.templates['mngt_template'], client)
 
     async def handle_server_button_command(self, ack, say, command, client):
         await ack()
@@ -428,8 +448,7 @@ class ServerManager:
                 await say(f"상위 {message_limit}개의 메시지에서 추출 가능한 IP 또는 Hostname이 없습니다.")
                 return
 
-            df = self.read_extdata_file(self.CSV_FILE)
-            buttons, unmapped_hostnames, unmapped_ips = self.create_buttons_and_find_unmapped(extracted_info, df)
+            buttons, unmapped_hostnames, unmapped_ips = self.create_buttons_and_find_unmapped(extracted_info)
 
             if not buttons:
                 await say("추출된 정보에서 유효한 IP를 찾을 수 없습니다.")
@@ -479,12 +498,12 @@ class ServerManager:
                     text += ' ' + block['text'].get('text', '')
         return text
 
-    def create_buttons_and_find_unmapped(self, extracted_info, df):
+    def create_buttons_and_find_unmapped(self, extracted_info):
         buttons = []
         unmapped_hostnames = set()
         unmapped_ips = set()
         for index, info in enumerate(extracted_info):
-            ip = self.get_ip_from_info(info, df)
+            ip = self.get_ip_from_info(info)
             if ip:
                 action_id = f"server_info_button_{index}"
                 buttons.append({
@@ -500,21 +519,17 @@ class ServerManager:
                 unmapped_hostnames.add(info)
         return buttons, unmapped_hostnames, unmapped_ips
 
-    def get_ip_from_info(self, info, df):
+    def get_ip_from_info(self, info):
         if self.ip_pattern.match(info):
-            if info in df['사설IP'].values or info in df['공인/NAT IP'].values:
+            if self.cmdb.current().find_ip(info) is not None:
                 return info
             return None
         else:
             # 대소문자 구분 설정에 따라 호스트네임 매핑
-            if self.case_sensitive:
-                matching_row = df[df['Hostname'] == info]
-            else:
-                # 대소문자 구분하지 않는 경우
-                matching_row = df[df['Hostname'].str.lower() == info.lower()]
-            
-            if not matching_row.empty:
-                return matching_row['사설IP'].iloc[0] or matching_row['공인/NAT IP'].iloc[0]
+            index = self.cmdb.current()
+            position = index.find_hostname(info, case_sensitive=self.case_sensitive)
+            if position is not None:
+                return index.ip_of(position)
         return None
 
     async def handle_server_info_button(self, ack, body, say):
@@ -532,31 +547,16 @@ class ServerManager:
             return
 
         try:
-            df = self.read_extdata_file(self.CSV_FILE)
-            df = self.filter_data(df, user_group)
+            server_info = self.find_server(ip, user_group)
             
-            server_info = df[(df['사설IP'] == ip) | (df['공인/NAT IP'] == ip)]
-            
-            if server_info.empty:
+            if server_info is None:
                 await say(f"{ip}에 해당하는 서버 정보를 찾을 수 없습니다.")
                 return
             
-            template = self.config['TEMPLATES']['voca_template'].replace('##', '\n')
-            formatted_info = self.format_server_info(server_info.iloc[0], template)
-            
-            await say(formatted_info)
+            await say(self.templates['voca_template'].render(server_info))
         except Exception as e:
             self.logger.error(f"Error in handle_server_info_button: {str(e)}")
             await say(f"서버 정보 조회 중 오류가 발생했습니다: {str(e)}")
 
-    def format_server_info(self, server_info, template):
-        formatted_info = template
-        for column, value in server_info.items():
-            placeholder = f"{{{column}}}"
-            if placeholder in formatted_info:
-                value = '-' if pd.isna(value) or value == '' else str(value)
-                formatted_info = formatted_info.replace(placeholder, value)
-        return formatted_info
-
 def init(app: AsyncApp, config, queue, check_permission, get_user_info, filter_data, ip_pattern, hostname_pattern):
     return ServerManager(app, config, queue, check_permission, get_user_info, filter_data, ip_pattern, hostname_pattern)
\ No newline at end of file
@@ -0,0 +1,374 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from cmdb_snapshot import CmdbSnapshot
+
+# 인덱스 대상 컬럼
+PRIVATE_IP = '사설IP'
+PUBLIC_IP = '공인/NAT IP'
+HOSTNAME = 'Hostname'
+SERVICE = '서비스'
+INDEX_COLUMNS = [PRIVATE_IP, PUBLIC_IP, HOSTNAME, SERVICE]
+
+# 보고서(template_*.py)에서 사용하는 컬럼 - 템플릿에서 새 컬럼을 쓰면 여기에 추가
+REPORT_COLUMNS = INDEX_COLUMNS + [
+    'ID', 'IT구성정보명', '등록일', '최종 변경일시', '운영상태', '분류',
+    '서버 OS', '서버 OS Version', 'CPU Type', 'CPU Core 수', 'Memory', '디스크 용량'
+]
+
+# 값 종류가 적은 컬럼 (category 로 읽음, '...여부' 컬럼 포함) - 나머지는 문자열로 읽음
+CATEGORY_COLUMNS = {'운영상태', '분류', '운영/개발', '서비스', '설치 위치(Region)', '유지보수(유상/무상)', '지원 형태'}
+# dtype 규칙이 바뀌면 올려서 기존 스냅샷을 다시 만듦
+DTYPE_VERSION = 1
+
+
+# 최신 export 파일 (슬랙봇/보고서 공통 규칙, 없으면 None)
+# - 파일명의 마지막 숫자열(예: 구성관리조회_20240901000001.csv 의 타임스탬프)이 큰 파일, 같거나 없으면 수정 시각이 늦은 파일
+def latest_export(directory, prefix: str, extension: str = '.csv') -> Optional[str]:
+    matching_files = glob.glob(os.path.join(str(directory), f"{prefix or ''}*{extension}"))
+    if not matching_files:
+        return None
+    return max(matching_files, key=_export_order)
+
+
+# 컬럼 dtype (값 종류가 적은 컬럼은 category, 나머지는 문자열 - 숫자처럼 보이는 값도 "8.0" 이 되지 않도록)
+def column_dtype(column: str) -> str:
+    return 'category' if column in CATEGORY_COLUMNS or column.endswith('여부') else 'str'
+
+
+def _export_order(path: str) -> Tuple[int, float]:
+    digits = re.findall(r'\d+', os.path.basename(path))
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = 0.0
+    return (int(digits[-1]) if digits else -1, mtime)
+
+
+# 한 CSV 파일의 CMDB 와 인덱스 (생성 후 변경하지 않음 - 저장소는 통째로 교체)
+# - 한 요청에서는 CmdbStore.current() 로 받은 인덱스 하나만 사용 (행 번호는 같은 인덱스 안에서만 유효)
+# - frame 은 공유 객체이므로 수정이 필요하면 rows() 로 복사본 사용
+class CmdbIndex:
+    def __init__(self, frame: pd.DataFrame, source: Optional[Tuple[str, float]] = None):
+        for column in INDEX_COLUMNS:
+            if column not in frame.columns:
+                frame[column] = None
+        self.frame = frame
+        self.source = source
+
+        # 같은 키는 파일상 첫 행 유지
+        self._by_ip: Dict[str, int] = {}
+        self._by_hostname: Dict[str, int] = {}
+        self._by_hostname_folded: Dict[str, int] = {}
+        self._by_service: Dict[str, List[int]] = {}
+        columns = zip(frame[PRIVATE_IP], frame[PUBLIC_IP], frame[HOSTNAME], frame[SERVICE])
+        for position, (private_ip, public_ip, hostname, service_name) in enumerate(columns):
+            for ip in (private_ip, public_ip):
+                if pd.notnull(ip):
+                    self._by_ip.setdefault(ip, position)
+            if pd.notnull(hostname):
+                self._by_hostname.setdefault(hostname, position)
+                self._by_hostname_folded.setdefault(str(hostname).casefold(), position)
+            if pd.notnull(service_name):
+                self._by_service.setdefault(service_name, []).append(position)
+
+    # 파일명 (빈 인덱스면 None)
+    @property
+    def file_name(self) -> Optional[str]:
+        return os.path.basename(self.source[0]) if self.source else None
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    # IP(사설IP 또는 공인/NAT IP)의 행 번호 (같은 IP 가 여러 행이면 파일상 첫 행)
+    def find_ip(self, ip: str) -> Optional[int]:
+        return self._by_ip.get(ip)
+
+    # Hostname 의 행 번호 (case_sensitive=False 이면 대소문자 무시)
+    def find_hostname(self, hostname: str, case_sensitive: bool = True) -> Optional[int]:
+        if case_sensitive:
+            return self._by_hostname.get(hostname)
+        return self._by_hostname_folded.get(hostname.casefold())
+
+    # 서비스에 속한 행 번호 목록 (파일 순서)
+    def find_service(self, service_name: str) -> List[int]:
+        return self._by_service.get(service_name, [])
+
+    # 행 정보 {컬럼: 값}
+    def record(self, position: int) -> Dict:
+        return self.frame.iloc[position].to_dict()
+
+    # 행 복사본 DataFrame (컬럼 마스킹 등 수정 가능)
+    def rows(self, positions: List[int]) -> pd.DataFrame:
+        return self.frame.iloc[positions].copy()
+
+    # 대표 IP (사설IP 우선, 없으면 공인/NAT IP)
+    def ip_of(self, position: int) -> Optional[str]:
+        private_ip, public_ip = self.frame[PRIVATE_IP].iat[position], self.frame[PUBLIC_IP].iat[position]
+        if pd.notnull(private_ip) and private_ip != '':
+            return private_ip
+        return public_ip if pd.notnull(public_ip) and public_ip != '' else None
+
+    def hostname_of(self, position: int):
+        return self.frame[HOSTNAME].iat[position]
+
+
+# 구성관리조회 CSV (CMDB) 메모리 저장소 - 슬랙봇(cmd_server)과 보고서(CmdbLookup)가 같이 사용
+# - 최신 파일을 한 번만 읽고 사설IP/공인 IP, Hostname(대소문자 무시 포함), 서비스 인덱스 생성 (조회는 dict 조회)
+# - 새 파일은 다 만든 CmdbIndex 를 한 번에 교체 (조회는 잠금 없이 교체 전/후 인덱스 중 하나를 온전히 사용)
+# - watch() 사용 시 백그라운드 스레드가 새 export 를 읽어 교체, 아니면 조회 시 파일 경로/수정 시각을 확인해 다시 읽음
+# - columns 지정 시 해당 컬럼(+ 인덱스 컬럼)만 column_dtype 으로 읽음 (None 이면 전체 컬럼)
+# - snapshot 지정 시 CSV 대신 바이너리 스냅샷에서 읽음
+class CmdbStore:
+    def __init__(self, data_dir, prefix: str, extension: str = '.csv', logger=None, encoding: str = 'euc-kr',
+                 snapshot: Optional[CmdbSnapshot] = None, columns: Optional[Iterable[str]] = None):
+        self.data_dir = str(data_dir)
+        self.prefix = prefix or ''
+        self.extension = extension
+        self.encoding = encoding
+        self.logger = logger or logging.getLogger(__name__)
+        self.snapshot = snapshot
+        self.columns: Optional[Set[str]] = None if columns is None else set(columns) | set(INDEX_COLUMNS)
+        self._index: Optional[CmdbIndex] = None
+        self._load_lock = threading.Lock()
+        self._watcher: Optional['CmdbWatcher'] = None
+
+    @property
+    def pattern(self) -> str:
+        return os.path.join(self.data_dir, f"{self.prefix}*{self.extension}")
+
+    # 최신 CSV 파일 (latest_export 규칙, 없으면 None)
+    def latest_file(self) -> Optional[str]:
+        return latest_export(self.data_dir, self.prefix, self.extension)
+
+    # 현재 사용 중인 파일명 (로드 전이면 None)
+    @property
+    def file_name(self) -> Optional[str]:
+        return self._index.file_name if self._index else None
+
+    # 최신 파일 기준으로 다시 읽기 (변경이 없으면 유지, required=False 이면 파일이 없을 때 빈 저장소)
+    def refresh(self, required: bool = True) -> 'CmdbStore':
+        latest_file = self.latest_file()
+        if latest_file is None:
+            if required:
+                raise FileNotFoundError(f"CSV 파일 패턴을 찾을 수 없습니다: {self.pattern}")
+            if self._index is None:
+                self._index = CmdbIndex(pd.DataFrame(columns=INDEX_COLUMNS))
+            return self
+
+        source = (latest_file, os.path.getmtime(latest_file))
+        if self._index is None or self._index.source != source:
+            # 동시에 같은 파일을 두 번 읽지 않도록 로드만 직렬화 (조회는 기존 인덱스 사용)
+            with self._load_lock:
+                if self._index is None or self._index.source != source:
+                    self.logger.info(f"Using CSV file: {latest_file}")
+                    index = CmdbIndex(self._read(latest_file), source)
+                    self._index = index
+        return self
+
+    # 현재 인덱스 (watch 중이면 파일 확인 없이 바로 반환)
+    def current(self, required: bool = True) -> CmdbIndex:
+        index = self._index
+        if index is None or self._watcher is None:
+            index = self.refresh(required)._index
+        return index
+
+    # CMDB 전체 (공유 객체 - 수정 금지)
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self.current().frame
+
+    def __len__(self) -> int:
+        return len(self.current())
+
+    # 새 export 감시 시작 (interval 초마다 확인, 이미 감시 중이면 기존 감시 스레드)
+    def watch(self, interval: float = 60) -> 'CmdbWatcher':
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = CmdbWatcher(self, interval)
+            self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    # 읽기 방식 구분 값 (스냅샷 키 - 컬럼/dtype 규칙이 바뀌면 다른 스냅샷 사용)
+    @property
+    def schema(self) -> str:
+        columns = sorted(self.columns) if self.columns is not None else None
+        text = json.dumps([DTYPE_VERSION, columns], ensure_ascii=False)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+    # CSV 파싱 (필요한 컬럼만, 컬럼별 dtype 지정)
+    def read_csv(self, path: str) -> pd.DataFrame:
+        header = list(pd.read_csv(path, encoding=self.encoding, nrows=0).columns)
+        if self.columns is None:
+            usecols = header
+        else:
+            usecols = [column for column in header if column in self.columns]
+            missing = self.columns - set(header)
+            if missing:
+                self.logger.info(f"CMDB columns not found in {os.path.basename(path)}: {', '.join(sorted(missing))}")
+        return pd.read_csv(path, encoding=self.encoding, usecols=usecols,
+                           dtype={column: column_dtype(column) for column in usecols})
+
+    def _read(self, path: str) -> pd.DataFrame:
+        if self.snapshot is not None:
+            try:
+                return self.snapshot.load(path, self.read_csv, self.schema)
+            except Exception as e:
+                self.logger.warning(f"CMDB snapshot unavailable, reading CSV: {str(e)}")
+        return self.read_csv(path)
+
+
+# 데이터 디렉터리 감시 스레드 - 새 export 를 백그라운드에서 읽고 인덱스를 만든 뒤 교체
+# - 복사 중인 파일을 읽지 않도록 크기/수정 시각이 두 번 연속 같을 때 로드
+# - 로드 실패 시 기존 인덱스 유지 (다음 주기에 다시 시도)
+class CmdbWatcher(threading.Thread):
+    def __init__(self, store: CmdbStore, interval: float = 60):
+        super().__init__(name='cmdb-watcher', daemon=True)
+        self.store = store
+        self.interval = max(1.0, float(interval))
+        self._stop_event = threading.Event()
+        self._pending: Optional[Tuple[str, float, int]] = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.store.logger.warning(f"CMDB reload failed, keeping {self.store.file_name}: {str(e)}")
+
+    def stop(self):
+        self._stop_event.set()
+
+    # 한 번 확인 (새 파일이 안정되면 True 를 반환하며 교체)
+    def check(self) -> bool:
+        latest_file = self.store.latest_file()
+        if latest_file is None:
+            return False
+        stat = os.stat(latest_file)
+        index = self.store._index
+        if index is not None and index.source == (latest_file, stat.st_mtime):
+            self._pending = None
+            return False
+
+        state = (latest_file, stat.st_mtime, stat.st_size)
+        if state != self._pending:
+            self._pending = state
+            return False
+
+        self._pending = None
+        self.store.refresh()
+        self.store.logger.info(f"CMDB reloaded: {self.store.file_name} ({len(self.store._index)} rows)")
+        return True
+
+
+# 보고서용 CMDB 조회 (CmdbStore 인덱스 사용)
+# - 대상별 조회 결과를 보관하여 한 번의 실행에서 여러 템플릿이 공유
+class CmdbLookup:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.config = report_instance.config
+        self.logger = report_instance.logger
+        files_config = self.config.get('files', {})
+        snapshot_config = files_config.get('cmdb_snapshot', {}) or {}
+        snapshot_dir = snapshot_config.get('dir', '../cache/cmdb')
+        if not os.path.isabs(snapshot_dir):
+            snapshot_dir = report_instance.project_root / snapshot_dir.lstrip('./')
+        self.snapshot = CmdbSnapshot(snapshot_dir, self.logger)
+        self.store = CmdbStore(
+            report_instance.data_dir, files_config.get('extdata_prefix'), logger=self.logger,
+            snapshot=self.snapshot if snapshot_config.get('enabled', False) else None,
+            columns=REPORT_COLUMNS
+        )
+        self._servers: Dict[str, Dict] = {}
+        self._source = None
+
+    # 최신 CSV 파일 (latest_export 규칙, 없으면 None)
+    def latest_file(self) -> Optional[str]:
+        return self.store.latest_file()
+
+    # 최신 CSV 의 스냅샷 생성 (--build-snapshot, 스냅샷 메타데이터 경로 반환)
+    def build_snapshot(self):
+        latest_file = self.latest_file()
+        if latest_file is None:
+            raise FileNotFoundError(f"CSV 파일 패턴을 찾을 수 없습니다: {self.store.pattern}")
+        return self.snapshot.build(latest_file, self.store.read_csv, self.store.schema)
+
+    # 현재 인덱스 (required=False 이면 파일이 없을 때 빈 인덱스, 파일이 바뀌면 보관한 조회 결과 폐기)
+    def index(self, required: bool = True) -> CmdbIndex:
+        index = self.store.current(required)
+        if self._source is not index:
+            self._source = index
+            self._servers.clear()
+        return index
+
+    # CMDB 전체 (required=False 이면 파일이 없을 때 빈 DataFrame)
+    def frame(self, required: bool = True) -> pd.DataFrame:
+        return self.index(required).frame
+
+    # 단일 서버 정보 (IP 또는 service:<서비스명>)
+    def server_info(self, target: str) -> Dict:
+        index = self.index()
+        if target in self._servers:
+            return self._servers[target]
+
+        position = index.find_ip(target)
+        if position is None and target.startswith('service:'):
+            positions = index.find_service(target.split(':', 1)[1])
+            position = positions[0] if positions else None
+
+        if position is None:
+            raise ValueError(f"다음 서버 정보를 찾을 수 없습니다: {target}")
+
+        self._servers[target] = index.record(position)
+        return self._servers[target]
+
+    # 대상 서버 목록 {ip: 호스트명} ("ip1,ip2,..." 또는 service:<서비스명>, CMDB 에 없는 IP 는 IP 그대로)
+    def servers(self, target: str) -> Dict[str, str]:
+        index = self.index(required=False)
+
+        servers = {}
+        if target.startswith('service:'):
+            for position in index.find_service(target.split(':', 1)[1]):
+                ip = index.ip_of(position)
+                if ip is not None:  # IP 가 없는 행은 조회 대상이 아님
+                    servers[ip] = index.hostname_of(position)
+        else:
+            for ip in (item.strip() for item in target.split(',')):
+                if not ip:
+                    continue
+                position = index.find_ip(ip)
+                servers[ip] = index.hostname_of(position) if position is not None else ip
+
+        if not servers:
+            raise ValueError(f"다음 대상의 서버 목록을 찾을 수 없습니다: {target}")
+        return servers
+
+    # 비교 대상 서버 목록 {ip: 호스트명} (scope: service - 같은 서비스의 서버, all - CMDB 전체, 대상 서버 포함)
+    def peers(self, ip: str, scope: str = 'service') -> Dict[str, str]:
+        index = self.index(required=False)
+        if scope == 'all':
+            positions = range(len(index))
+        else:
+            service_name = self.server_info(ip).get(SERVICE)
+            positions = index.find_service(service_name) if pd.notnull(service_name) else []
+
+        peers = {}
+        for position in positions:
+            peer_ip = index.ip_of(position)
+            if peer_ip is not None:
+                peers.setdefault(peer_ip, index.hostname_of(position))
+        if ip not in peers:
+            peers = {ip: self.servers(ip)[ip], **peers}
+        return peers
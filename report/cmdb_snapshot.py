@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# 보관할 스냅샷 수 (최근 사용 순)
+KEEP_SNAPSHOTS = 3
+
+
+# 구성관리조회 CSV 바이너리 스냅샷 (보고서 실행마다 euc-kr CSV 를 다시 파싱하지 않도록)
+# - 원본 내용 해시(sha256)와 읽기 방식(schema: 컬럼/dtype)을 키로 메타데이터(<key>.json)와 컬럼 배열(<key>.npy, 구조체 배열)을 저장하고 mmap 으로 읽음
+# - 문자열 컬럼은 코드(int32, 결측 -1) + 값 목록 + dtype, category 컬럼은 pandas 코드 dtype 그대로의 코드 + 값 목록, 숫자 컬럼은 원래 dtype 그대로 저장
+# - 읽을 때 숫자 컬럼과 category 코드는 mmap 배열을 복사 없이 사용 (문자열 컬럼만 값 목록에서 새로 만듦)
+# - 원본 경로/수정 시각/크기가 같으면 해시 계산 없이 사용, 수정 시각만 바뀌고 내용이 같으면 기존 스냅샷 재사용
+class CmdbSnapshot:
+    def __init__(self, snapshot_dir: Path, logger: logging.Logger = None):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.logger = logger or logging.getLogger(__name__)
+
+    # CSV 를 스냅샷에서 읽음 (없거나 원본/schema 가 바뀌었으면 reader 로 파싱 후 스냅샷 생성)
+    # - reader: CSV 경로 -> DataFrame (기본: 전체 컬럼 euc-kr), schema: reader 의 컬럼/dtype 구분 값
+    def load(self, csv_path: str, reader: Optional[Callable[[str], pd.DataFrame]] = None, schema: str = '') -> pd.DataFrame:
+        reader = reader or (lambda path: pd.read_csv(path, encoding='euc-kr'))
+        stat = os.stat(csv_path)
+        meta = self._find(csv_path, stat, schema)
+        if meta is None:
+            key = _snapshot_key(file_hash(csv_path), schema)
+            meta = self._load_meta(key)
+            if meta is None:
+                return self._build(csv_path, reader, schema, key, stat)
+            # 내용이 같은 파일 (복사/touch) - 원본 정보만 갱신
+            self._write_meta(key, {**meta, 'source': os.path.abspath(csv_path), 'mtime': stat.st_mtime, 'size': stat.st_size})
+
+        try:
+            frame = self._read(meta)
+            os.utime(self.snapshot_dir / f"{meta['key']}.json")  # 정리 기준 시각 갱신
+            return frame
+        except Exception as e:
+            self.logger.warning(f"Invalid CMDB snapshot {meta.get('key')}: {str(e)}")
+            return self._build(csv_path, reader, schema, meta.get('key') or _snapshot_key(file_hash(csv_path), schema), stat)
+
+    # 스냅샷 미리 생성 (이미 최신이면 그대로) - 스냅샷 메타데이터 경로 반환
+    def build(self, csv_path: str, reader: Optional[Callable[[str], pd.DataFrame]] = None, schema: str = '') -> Path:
+        self.load(csv_path, reader, schema)
+        return self.snapshot_dir / f"{self._find(csv_path, os.stat(csv_path), schema)['key']}.json"
+
+    def _build(self, csv_path: str, reader: Callable[[str], pd.DataFrame], schema: str, key: str,
+               stat: os.stat_result) -> pd.DataFrame:
+        started = time.time()
+        frame = reader(csv_path)
+        try:
+            self._store(frame, key, {
+                'source': os.path.abspath(csv_path),
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+                'schema': schema,
+                'key': key
+            })
+            self.logger.info(f"CMDB snapshot created: {key[:12]} ({len(frame)} rows, {time.time() - started:.2f}s)")
+        except Exception as e:
+            self.logger.warning(f"Failed to store CMDB snapshot: {str(e)}")
+        return frame
+
+    # 원본 경로/수정 시각/크기, schema 가 같은 스냅샷 메타데이터
+    def _find(self, csv_path: str, stat: os.stat_result, schema: str) -> Optional[Dict]:
+        source = os.path.abspath(csv_path)
+        for meta_file in self.snapshot_dir.glob('*.json'):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except Exception:
+                continue
+            if (meta.get('source') == source and meta.get('mtime') == stat.st_mtime
+                    and meta.get('size') == stat.st_size and meta.get('schema') == schema and meta.get('key')):
+                return meta
+        return None
+
+    def _load_meta(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.snapshot_dir / f"{key}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Invalid CMDB snapshot {key}: {str(e)}")
+            return None
+
+    def _read(self, meta: Dict) -> pd.DataFrame:
+        data = np.load(self.snapshot_dir / meta['data'], mmap_mode='r')
+        if len(data) != meta['rows']:
+            raise ValueError(f"row count mismatch ({len(data)} != {meta['rows']})")
+
+        columns = {}
+        for index, column in enumerate(meta['columns']):
+            values = data[f"c{index}"]
+            if column['kind'] == 'category':
+                # 저장한 코드 dtype 이 pandas 코드 dtype 과 같으므로 mmap 배열을 그대로 코드로 사용
+                columns[column['name']] = pd.Categorical.from_codes(values, categories=column['categories'])
+            elif column['kind'] == 'codes' and column.get('dtype', 'object') != 'object':
+                # 문자열 dtype (pandas 3 의 str 등) - 값 목록에서 바로 take (dtype 추론 생략)
+                categories = pd.array(column['categories'], dtype=column['dtype'])
+                columns[column['name']] = categories.take(np.asarray(values), allow_fill=True)
+            elif column['kind'] == 'codes':
+                # 마지막 자리에 결측값을 두고 코드 -1 이 가리키도록 함
+                lookup = np.empty(len(column['categories']) + 1, dtype=object)
+                lookup[:-1] = column['categories']
+                lookup[-1] = np.nan
+                columns[column['name']] = lookup[values]
+            else:
+                columns[column['name']] = values
+        return pd.DataFrame(columns, columns=[column['name'] for column in meta['columns']], copy=False)
+
+    # 데이터 파일을 먼저 쓰고 메타데이터를 원자적으로 교체 (동시 실행 중인 보고서 프로세스 보호)
+    def _store(self, frame: pd.DataFrame, key: str, meta: Dict):
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+        columns: List[Dict] = []
+        fields, arrays = [], []
+        for index, name in enumerate(frame.columns):
+            series = frame[name]
+            if series.dtype.kind in 'biuf':
+                values = series.to_numpy()
+                columns.append({'name': str(name), 'kind': 'values'})
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.cat.codes.to_numpy()
+                columns.append({'name': str(name), 'kind': 'category', 'categories': [_plain(value) for value in series.cat.categories]})
+            else:
+                codes, categories = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(np.int32)
+                columns.append({
+                    'name': str(name), 'kind': 'codes', 'dtype': str(series.dtype),
+                    'categories': [_plain(value) for value in categories]
+                })
+            fields.append((f"c{index}", values.dtype))
+            arrays.append(values)
+
+        data = np.empty(len(frame), dtype=fields)
+        for index, values in enumerate(arrays):
+            data[f"c{index}"] = values
+
+        data_name = f"{key}-{os.getpid()}.npy"
+        np.save(self.snapshot_dir / data_name, data)
+        meta_file = self.snapshot_dir / f"{key}.json"
+        tmp_file = self.snapshot_dir / f"{key}.json.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({**meta, 'rows': len(frame), 'columns': columns, 'data': data_name, 'created': time.time()}, f, ensure_ascii=False)
+        os.replace(tmp_file, meta_file)
+        self._cleanup(keep={data_name})
+
+    def _write_meta(self, key: str, meta: Dict):
+        try:
+            tmp_file = self.snapshot_dir / f"{key}.json.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_file, self.snapshot_dir / f"{key}.json")
+        except Exception as e:
+            self.logger.warning(f"Failed to update CMDB snapshot {key}: {str(e)}")
+
+    # 최근 사용한 KEEP_SNAPSHOTS 개만 남기고 정리 (메타데이터가 가리키지 않는 데이터 파일 포함)
+    def _cleanup(self, keep: set):
+        meta_files = sorted(self.snapshot_dir.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+        referenced = set(keep)
+        for position, meta_file in enumerate(meta_files):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    data_name = json.load(f).get('data')
+            except Exception:
+                data_name = None
+            if position < KEEP_SNAPSHOTS and data_name:
+                referenced.add(data_name)
+            else:
+                meta_file.unlink(missing_ok=True)
+        for data_file in self.snapshot_dir.glob('*.npy'):
+            if data_file.name not in referenced:
+                data_file.unlink(missing_ok=True)
+
+
+# 스냅샷 키 (내용 해시 + schema)
+def _snapshot_key(digest: str, schema: str) -> str:
+    return f"{digest}-{schema}" if schema else digest
+
+
+# 파일 내용 sha256
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# numpy 스칼라 -> JSON 저장 가능한 파이썬 값
+def _plain(value):
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,57 @@
+import re
+from typing import Dict, Iterable, List, Mapping
+
+import pandas as pd
+
+# 템플릿의 {컬럼} 자리 표시자
+PLACEHOLDER = re.compile(r'\{([^{}]+)\}')
+# 값이 없을 때 표시
+EMPTY_VALUE = '-'
+
+
+# CMDB 행 출력 템플릿 (슬랙봇 [TEMPLATES] *_template 등)
+# - 설정 로드 시 한 번 컴파일: '##' 을 줄바꿈으로 바꾸고 {컬럼} 자리 표시자로 나눈 조각 목록 보관
+# - render 는 자리에 값만 채워 한 번 join (값이 결측/빈 문자열이면 '-', 행에 없는 컬럼은 자리 표시자 그대로)
+class RowTemplate:
+    __slots__ = ('name', 'text', 'columns', '_parts')
+
+    def __init__(self, template: str, name: str = '', newline: str = '##'):
+        self.name = name
+        self.text = template.replace(newline, '\n') if newline else template
+        # [문자열, 컬럼, 문자열, 컬럼, ..., 문자열]
+        self._parts = PLACEHOLDER.split(self.text)
+        self.columns = tuple(self._parts[1::2])
+
+    # 행에 없는 컬럼 (템플릿 순서, 중복 제거)
+    def missing(self, columns: Iterable[str]) -> List[str]:
+        available = set(columns)
+        return [column for column in dict.fromkeys(self.columns) if column not in available]
+
+    # row: pd.Series 또는 {컬럼: 값}
+    def render(self, row) -> str:
+        values = dict(zip(row.index, row.values)) if isinstance(row, pd.Series) else row
+        parts = list(self._parts)
+        for position in range(1, len(parts), 2):
+            column = parts[position]
+            if column in values:
+                parts[position] = _display(values[column])
+            else:
+                parts[position] = f"{{{column}}}"
+        return ''.join(parts)
+
+    def __repr__(self) -> str:
+        return f"RowTemplate({self.name or self.text[:20]!r}, {len(self.columns)} columns)"
+
+
+# 설정 섹션의 *_template 항목 컴파일 {이름: RowTemplate}
+def compile_templates(section: Mapping[str, str], suffix: str = '_template') -> Dict[str, RowTemplate]:
+    return {key: RowTemplate(value, key) for key, value in section.items() if key.endswith(suffix)}
+
+
+# 결측 확인은 pd.isna 대신 타입별로 (행마다 수십 번 호출)
+def _display(value) -> str:
+    if isinstance(value, str):
+        return value or EMPTY_VALUE
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value):
+        return EMPTY_VALUE
+    return str(value)
@@ -0,0 +1,300 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 기본 설정 (anomaly 섹션이 없을 때)
+DEFAULT_WINDOW = 30
+DEFAULT_Z_THRESHOLD = 4.0
+DEFAULT_EWMA_ALPHA = 0.1
+DEFAULT_CHANGEPOINT_THRESHOLD = 4.0
+DEFAULT_MIN_RELATIVE_STDDEV = 0.02
+DEFAULT_MERGE_GAP = 2
+DEFAULT_MAX_WINDOWS = 3
+DEFAULT_METRICS = {
+    'cpu_usage': 'CPU 사용률',
+    'memory_usage': 'Memory 사용률',
+    'disk_usage': 'Disk 사용률'
+}
+
+
+# 이상 구간 (kind: spike - 급등/급락 구간, shift - 평균 수준 변화 시점)
+# - magnitude: 기준 대비 표준편차 배수 (부호 포함), value: 최고점 값(spike)/변화 후 평균(shift), baseline: 기준 평균
+class AnomalyWindow:
+    __slots__ = ('kind', 'start', 'end', 'magnitude', 'value', 'baseline')
+
+    def __init__(self, kind: str, start: float, end: float, magnitude: float, value: float, baseline: float):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.magnitude = magnitude
+        self.value = value
+        self.baseline = baseline
+
+    # 예: "03-14 09:10~09:25 +4.2σ (최고 92.1%, 기준 51.0%)", "03-14 09:10 수준 변화 51.0% → 71.3% (+5.1σ)"
+    def describe(self, unit: str = '%', scale: float = 1.0) -> str:
+        start = datetime.fromtimestamp(self.start).strftime('%m-%d %H:%M')
+        if self.kind == 'shift':
+            return (f"{start} 수준 변화 {self.baseline / scale:.1f}{unit} → {self.value / scale:.1f}{unit} "
+                    f"({self.magnitude:+.1f}σ)")
+        if self.end > self.start:
+            start += datetime.fromtimestamp(self.end).strftime('~%H:%M')
+        return (f"{start} {self.magnitude:+.1f}σ "
+                f"(최고 {self.value / scale:.1f}{unit}, 기준 {self.baseline / scale:.1f}{unit})")
+
+    def __repr__(self) -> str:
+        return f"AnomalyWindow({self.kind}, {self.start:.0f}-{self.end:.0f}, {self.magnitude:+.1f})"
+
+
+# 이상 탐지 대상 메트릭 {metric_name: {'title', 'unit', 'scale'}} (값이 문자열이면 표시 이름, 단위 %)
+def anomaly_metrics(config) -> Dict[str, Dict]:
+    anomaly_config = config.get('anomaly', {}) or {}
+    metrics = {}
+    for name, options in (anomaly_config.get('metrics') or DEFAULT_METRICS).items():
+        if not isinstance(options, dict):
+            options = {'title': options}
+        metrics[name] = {
+            'title': options.get('title') or name,
+            'unit': options.get('unit', '%'),
+            'scale': float(options.get('scale', 1))
+        }
+    return metrics
+
+
+# 보고서 표시용 이상 구간 [(표시 이름, AnomalyWindow, 단위, 스케일)] - anomaly.metrics 순서, SeriesMatrix 는 행 이름 추가
+def anomaly_items(metrics: Dict, config) -> List[Tuple[str, AnomalyWindow, str, float]]:
+    items = []
+    for name, options in anomaly_metrics(config).items():
+        metric = metrics.get(name)
+        if metric is None or metric.unavailable:
+            continue
+        if hasattr(metric, 'rows'):
+            series_list = [(f"{options['title']} {metric.name_of(labels)}", series) for labels, series in zip(metric.labels, metric.rows())]
+        else:
+            series_list = [(options['title'], metric)]
+        for title, series in series_list:
+            for window in series.anomalies or ():
+                items.append((title, window, options['unit'], options['scale']))
+    return items
+
+
+# 메트릭 시리즈 이상 구간을 한 번에 탐지하여 series.anomalies 에 저장
+# - 대상 시리즈 전체(플릿의 모든 서버 포함)를 (시리즈 x 포인트) 행렬로 만들어 벡터 연산으로 계산
+# - SeriesMatrix 는 행마다 탐지, 빈 시리즈/수집 불가는 건너뜀
+def attach_anomalies(metrics: Iterable[Tuple[str, 'MetricSeries']], config) -> None:
+    anomaly_config = config.get('anomaly', {}) or {}
+    if not anomaly_config.get('enabled', True):
+        return
+    names = anomaly_metrics(config)
+    window = int(anomaly_config.get('window', DEFAULT_WINDOW))
+
+    targets = []
+    for name, metric in metrics:
+        if name not in names or metric.unavailable or not len(metric):
+            continue
+        for series in (metric.rows() if hasattr(metric, 'rows') else (metric,)):
+            if len(series) > window:
+                targets.append(series)
+    if not targets:
+        return
+
+    width = max(len(series) for series in targets)
+    values = np.full((len(targets), width), np.nan)
+    for row, series in enumerate(targets):
+        values[row, :len(series)] = series.values
+
+    detected = detect_anomalies(
+        values,
+        window=window,
+        z_threshold=float(anomaly_config.get('z_threshold', DEFAULT_Z_THRESHOLD)),
+        ewma_alpha=float(anomaly_config.get('ewma_alpha', DEFAULT_EWMA_ALPHA)),
+        changepoint_threshold=float(anomaly_config.get('changepoint_threshold', DEFAULT_CHANGEPOINT_THRESHOLD)),
+        min_relative_stddev=float(anomaly_config.get('min_relative_stddev', DEFAULT_MIN_RELATIVE_STDDEV)),
+        merge_gap=int(anomaly_config.get('merge_gap', DEFAULT_MERGE_GAP))
+    )
+
+    # 시리즈별 상위 max_windows 개 (크기 순 선택, 시간 순 정렬)
+    max_windows = int(anomaly_config.get('max_windows', DEFAULT_MAX_WINDOWS))
+    for series, found in zip(targets, detected):
+        found = sorted(found, key=lambda item: -abs(item[3]))[:max_windows]
+        timestamps = series.timestamps
+        series.anomalies = [
+            AnomalyWindow(kind, float(timestamps[start]), float(timestamps[end]), magnitude, value, baseline)
+            for kind, start, end, magnitude, value, baseline in sorted(found, key=lambda item: item[1])
+        ]
+
+
+# (시리즈 x 포인트) 행렬의 이상 구간 - 행별 [(kind, 시작 인덱스, 끝 인덱스, σ 배수, 값, 기준값)]
+# - spike: 직전 window 포인트의 이동 z-score 와 EWMA z-score 가 모두 임계값을 넘는 연속 구간
+# - shift: 전후 window 포인트 평균 차이가 가장 큰 시점 (changepoint_threshold 이상일 때만)
+def detect_anomalies(
+    values: np.ndarray,
+    window: int = DEFAULT_WINDOW,
+    z_threshold: float = DEFAULT_Z_THRESHOLD,
+    ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+    changepoint_threshold: float = DEFAULT_CHANGEPOINT_THRESHOLD,
+    min_relative_stddev: float = DEFAULT_MIN_RELATIVE_STDDEV,
+    merge_gap: int = DEFAULT_MERGE_GAP
+) -> List[List[Tuple]]:
+    rows = values.shape[0]
+    found: List[List[Tuple]] = [[] for _ in range(rows)]
+    if not rows or values.shape[1] <= window:
+        return found
+
+    stats = window_stats(values, window)
+    rolling_mean, rolling_z = rolling_zscore(values, window, min_relative_stddev, stats)
+    ewma_z = ewma_zscore(values, ewma_alpha, window, min_relative_stddev)
+
+    # 이동 z-score 후보 포인트 중 EWMA z-score 도 같은 방향으로 임계값을 넘는 포인트만 이상으로 판단
+    score = np.abs(rolling_z)
+    with np.errstate(invalid='ignore'):
+        rows_hit, columns_hit = np.nonzero(score >= z_threshold)
+    points = columns_hit + window
+    confirmed = ewma_z[rows_hit, points]
+    keep = (np.abs(confirmed) >= z_threshold) & ((confirmed > 0) == (rolling_z[rows_hit, columns_hit] > 0))
+    rows_hit, columns_hit = rows_hit[keep], columns_hit[keep]
+
+    for row, start, end, peak in _flagged_runs(rows_hit, columns_hit, score[rows_hit, columns_hit], merge_gap):
+        found[row].append(('spike', start + window, end + window, float(rolling_z[row, peak]),
+                           float(values[row, peak + window]), float(rolling_mean[row, peak])))
+
+    # 수준 변화 직후의 spike 는 같은 현상이므로 shift 만 남김
+    for row, index, shift, before, after in changepoints(values, window, changepoint_threshold, min_relative_stddev, stats):
+        found[row] = [item for item in found[row] if not index <= item[1] < index + window]
+        found[row].append(('shift', index, index, shift, after, before))
+    return found
+
+
+# 행별 구간 [k, k + window) 평균 / 분산 / 유효 포인트 수 (k = 0 .. 포인트 수 - window, 누적합으로 계산, NaN 제외)
+def window_stats(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rows, width = values.shape
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    # 앞에 0 열을 둔 누적합 - 구간 [a, b) 합계 = P[:, b] - P[:, a]
+    prefix = np.zeros((rows, width + 1))
+    np.cumsum(filled, axis=1, out=prefix[:, 1:])
+    mean = prefix[:, window:] - prefix[:, :-window]
+    np.cumsum(present, axis=1, out=prefix[:, 1:])
+    count = prefix[:, window:] - prefix[:, :-window]
+    np.square(filled, out=filled)
+    np.cumsum(filled, axis=1, out=prefix[:, 1:])
+    variance = prefix[:, window:] - prefix[:, :-window]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean /= count
+        variance /= count
+    variance -= mean * mean
+    np.maximum(variance, 0.0, out=variance)
+    return mean, variance, count
+
+
+# 직전 window 포인트 [t - window, t) 기준 이동 평균 / z-score - 시점 window 부터 (열 j = 시점 window + j)
+# - 유효 포인트가 절반 미만인 구간은 NaN
+def rolling_zscore(values: np.ndarray, window: int, min_relative_stddev: float,
+                   stats: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    mean, variance, count = window_stats(values, window) if stats is None else stats
+    mean, count = mean[:, :-1], count[:, :-1]
+    stddev = _floor_stddev(np.sqrt(variance[:, :-1]), mean, min_relative_stddev)
+    with np.errstate(invalid='ignore'):
+        z = values[:, window:] - mean
+        z /= stddev
+    z[count < max(2, window // 2)] = np.nan
+    return mean, z
+
+
+# EWMA 평균/분산 대비 z-score (시간 축만 반복, 모든 시리즈를 한 번에 갱신)
+# - 첫 유효값에서 시작하여 warmup 포인트 이전은 NaN, 값이 없는 시점은 상태 유지
+def ewma_zscore(values: np.ndarray, alpha: float, warmup: int, min_relative_stddev: float) -> np.ndarray:
+    rows, width = values.shape
+    columns = np.ascontiguousarray(values.T)  # 시점별 연속 메모리
+    present = ~np.isnan(columns)
+    gaps = ~present.all(axis=1)
+    first = np.argmax(present, axis=0)
+
+    mean = np.nan_to_num(columns[first, np.arange(rows)])
+    variance = np.zeros(rows)
+    delta, stddev, floor = np.empty(rows), np.empty(rows), np.empty(rows)
+    z = np.empty((width, rows))
+
+    with np.errstate(invalid='ignore'):
+        for t in range(width):
+            np.subtract(columns[t], mean, out=delta)
+            np.sqrt(variance, out=stddev)
+            _floor_stddev(stddev, mean, min_relative_stddev, floor)
+            np.divide(delta, stddev, out=z[t])
+
+            if gaps[t]:
+                missing = ~present[t]
+                delta[missing] = 0.0
+                kept = variance[missing]
+            np.multiply(delta, delta, out=stddev)
+            stddev *= alpha
+            variance += stddev
+            variance *= 1 - alpha
+            if gaps[t]:
+                variance[missing] = kept
+            delta *= alpha
+            mean += delta
+
+    z[np.arange(width)[:, np.newaxis] < (first + warmup)[np.newaxis, :]] = np.nan
+    return z.T
+
+
+# 평균 수준 변화 시점 - 행별 (행, 인덱스, σ 배수, 이전 평균, 이후 평균)
+# - 후보 시점 t 의 이전 [t - window, t), 이후 [t, t + window) 평균 차이를 두 구간 표준편차로 나눈 값이 가장 큰 시점
+def changepoints(values: np.ndarray, window: int, threshold: float, min_relative_stddev: float,
+                 stats: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> List[Tuple]:
+    rows, width = values.shape
+    if width < window * 2:
+        return []
+    mean, variance, count = window_stats(values, window) if stats is None else stats
+    candidates = width - 2 * window + 1
+    before, after = mean[:, :candidates], mean[:, window:]
+
+    pooled = variance[:, :candidates] + variance[:, window:]
+    pooled /= 2
+    stddev = _floor_stddev(np.sqrt(pooled, out=pooled), before, min_relative_stddev)
+    with np.errstate(invalid='ignore'):
+        score = after - before
+        score /= stddev
+    score[(count[:, :candidates] < window // 2) | (count[:, window:] < window // 2)] = 0.0
+    np.nan_to_num(score, copy=False)
+
+    best = np.argmax(np.abs(score), axis=1)
+    best_score = score[np.arange(rows), best]
+    hits = np.nonzero(np.abs(best_score) >= threshold)[0]
+    return [
+        (int(row), int(best[row] + window), float(best_score[row]), float(before[row, best[row]]), float(after[row, best[row]]))
+        for row in hits
+    ]
+
+
+# 표준편차 하한 (평균 대비 비율) - 거의 변하지 않는 시리즈의 작은 흔들림을 이상으로 보지 않도록 (stddev 를 직접 갱신)
+def _floor_stddev(stddev: np.ndarray, mean: np.ndarray, min_relative_stddev: float,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    floor = np.abs(mean, out=out)
+    floor *= min_relative_stddev
+    np.fmax(floor, 1e-9, out=floor)
+    return np.fmax(stddev, floor, out=stddev)
+
+
+# 이상 포인트 (행 우선 정렬된 행/열) 의 연속 구간 - (행, 시작, 끝, 최고점 열)
+# - 같은 행에서 merge_gap 포인트 이하 간격은 하나의 구간으로 합침
+def _flagged_runs(rows: np.ndarray, columns: np.ndarray, score: np.ndarray, merge_gap: int) -> List[Tuple[int, int, int, int]]:
+    if not rows.size:
+        return []
+    new_run = np.ones(rows.size, dtype=bool)
+    new_run[1:] = (rows[1:] != rows[:-1]) | (columns[1:] - columns[:-1] > merge_gap + 1)
+    run_ids = np.cumsum(new_run) - 1
+    starts = np.nonzero(new_run)[0]
+    ends = np.append(starts[1:], rows.size) - 1
+
+    # 구간별 최고점: (구간, -점수) 순 정렬 후 구간별 첫 항목
+    order = np.lexsort((-score, run_ids))
+    peaks = columns[order[starts]]
+
+    return [
+        (int(row), int(start), int(end), int(peak))
+        for row, start, end, peak in zip(rows[starts], columns[starts], columns[ends], peaks)
+    ]
@@ -0,0 +1,163 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from prom_decode import make_series
+from prom_range import parse_duration
+from prom_resilience import UnavailableResult
+
+# 기본 설정 (baseline 섹션이 없을 때)
+DEFAULT_OFFSET = 7 * 86400
+DEFAULT_LABEL = '지난주'
+DEFAULT_STATISTIC = 'average'
+DEFAULT_MIN_DELTA = 5.0
+DEFAULT_MIN_RELATIVE = 0.2
+DEFAULT_METRICS = {
+    'cpu_usage': 'CPU 사용률',
+    'memory_usage': 'Memory 사용률',
+    'disk_usage': 'Disk 사용률'
+}
+STATISTICS = ('average', 'maximum', 'p95')
+
+
+# 현재 구간과 비교 구간의 메트릭 비교 (current/baseline: statistic 값, regression: 악화 여부)
+class Comparison:
+    __slots__ = ('title', 'statistic', 'current', 'baseline', 'regression', 'unit', 'scale')
+
+    def __init__(self, title: str, statistic: str, current: float, baseline: float, regression: bool,
+                 unit: str = '%', scale: float = 1.0):
+        self.title = title
+        self.statistic = statistic
+        self.current = current
+        self.baseline = baseline
+        self.regression = regression
+        self.unit = unit
+        self.scale = scale
+
+    @property
+    def delta(self) -> float:
+        return self.current - self.baseline
+
+    # 증가율 (비교 값이 0 이면 NaN)
+    @property
+    def relative(self) -> float:
+        return self.delta / abs(self.baseline) if self.baseline else float('nan')
+
+    # 예: "평균 40.0% (지난주 31.2%, +8.8%p)", "평균 12.0MB/s (지난주 8.0MB/s, +50%)"
+    def describe(self, label: str = DEFAULT_LABEL) -> str:
+        name = {'average': '평균', 'maximum': '최대', 'p95': 'P95'}[self.statistic]
+        if self.unit == '%':
+            change = f"{self.delta / self.scale:+.1f}%p"
+        elif np.isnan(self.relative):
+            change = f"{self.delta / self.scale:+.1f}{self.unit}"
+        else:
+            change = f"{self.relative * 100:+.0f}%"
+        return (f"{name} {self.current / self.scale:.1f}{self.unit} "
+                f"({label} {self.baseline / self.scale:.1f}{self.unit}, {change})")
+
+    def __repr__(self) -> str:
+        return f"Comparison({self.title}, {self.baseline:.2f} -> {self.current:.2f}, regression={self.regression})"
+
+
+# 비교 구간 이동 시간 (초, baseline 비활성이면 None)
+def baseline_offset(config) -> Optional[float]:
+    baseline_config = config.get('baseline', {}) or {}
+    if not baseline_config.get('enabled', False):
+        return None
+    return parse_duration(baseline_config.get('offset'), DEFAULT_OFFSET)
+
+
+# 비교 대상 메트릭 {metric_name: {'title', 'unit', 'scale', 'min_delta'}} (값이 문자열이면 표시 이름, 단위 %)
+def baseline_metrics(config) -> Dict[str, Dict]:
+    baseline_config = config.get('baseline', {}) or {}
+    regression_config = baseline_config.get('regression', {}) or {}
+    metrics = {}
+    for name, options in (baseline_config.get('metrics') or DEFAULT_METRICS).items():
+        if not isinstance(options, dict):
+            options = {'title': options}
+        metrics[name] = {
+            'title': options.get('title') or name,
+            'unit': options.get('unit', '%'),
+            'scale': float(options.get('scale', 1)),
+            'min_delta': float(options.get('min_delta', regression_config.get('min_delta', DEFAULT_MIN_DELTA)))
+        }
+    return metrics
+
+
+# 겹치거나 맞닿은 구간을 합친 조회 구간 [(시작, 종료)] (시작 순)
+def merge_windows(windows: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    merged: List[List[float]] = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+# 조회 결과에서 [start, end] 구간만 잘라냄 (수집 불가 결과는 그대로)
+def slice_result(result: List[Dict], start: float, end: float) -> List[Dict]:
+    if isinstance(result, UnavailableResult):
+        return result
+    sliced = []
+    for series in result:
+        timestamps = series['timestamps']
+        lo = np.searchsorted(timestamps, start, side='left')
+        hi = np.searchsorted(timestamps, end, side='right')
+        sliced.append(make_series(series['metric'], timestamps[lo:hi], series['values'][lo:hi]))
+    return sliced
+
+
+# 메트릭별 현재/비교 구간 비교 [Comparison] (악화 항목 먼저, 비교 값이 없는 메트릭은 제외)
+# - 악화: 증가량이 min_delta(표시 단위) 이상이고 증가율이 regression.min_relative 이상
+def compare_metrics(current: Dict, baseline: Dict, config) -> List[Comparison]:
+    baseline_config = config.get('baseline', {}) or {}
+    regression_config = baseline_config.get('regression', {}) or {}
+    statistic = baseline_config.get('statistic', DEFAULT_STATISTIC)
+    if statistic not in STATISTICS:
+        raise ValueError(f"Unknown baseline statistic: {statistic} (available: {', '.join(STATISTICS)})")
+    min_relative = float(regression_config.get('min_relative', DEFAULT_MIN_RELATIVE))
+
+    comparisons = []
+    for name, options in baseline_metrics(config).items():
+        now, before = current.get(name), baseline.get(name)
+        if now is None or before is None or hasattr(now, 'rows'):
+            continue
+        if now.unavailable or before.unavailable or not len(now) or not len(before):
+            continue
+        current_value, baseline_value = _statistic(now, statistic), _statistic(before, statistic)
+        delta = current_value - baseline_value
+        regression = (
+            delta / options['scale'] >= options['min_delta']
+            and (baseline_value <= 0 or delta / baseline_value >= min_relative)
+        )
+        comparisons.append(Comparison(
+            options['title'], statistic, current_value, baseline_value, regression, options['unit'], options['scale']
+        ))
+    return sorted(comparisons, key=lambda comparison: not comparison.regression)
+
+
+# 보고서 표시 이름 (label 미지정 시 offset 기준: 1d 전일, 7d 지난주, 그 외 "N일 전"/"N시간 전")
+def baseline_label(config) -> str:
+    baseline_config = config.get('baseline', {}) or {}
+    if baseline_config.get('label'):
+        return str(baseline_config['label'])
+    offset = parse_duration(baseline_config.get('offset'), DEFAULT_OFFSET)
+    if offset == 86400:
+        return '전일'
+    if offset == 7 * 86400:
+        return DEFAULT_LABEL
+    if offset % 86400 == 0:
+        return f"{int(offset // 86400)}일 전"
+    return f"{offset / 3600:g}시간 전"
+
+
+# p95 는 계산된 통계를 사용하고, statistics.percentiles 에 95 가 없으면 직접 계산
+def _statistic(series, statistic: str) -> float:
+    if statistic == 'p95':
+        if series.stats is not None and 95 in series.stats.percentiles:
+            return series.stats.percentile(95)
+        return float(np.nanpercentile(series.values, 95))
+    if statistic == 'maximum':
+        return series.maximum
+    return series.average
@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from metric_anomaly import attach_anomalies
+from metric_baseline import baseline_offset, merge_windows, slice_result
+from metric_correlation import CorrelatedPair, correlate_fleet, correlation_metrics
+from metric_forecast import attach_forecasts
+from metric_matrix import SeriesMatrix, build_metric
+from metric_series import MetricSeries
+from metric_stats import attach_stats
+from prom_fleet import FleetCollector
+
+Metrics = Dict[str, Union[MetricSeries, SeriesMatrix]]
+
+
+# 보고서 메트릭 수집 (PromBlueReport 소유, 템플릿은 결과만 사용)
+# - 조회 구간은 time_range 별로 한 번만 계산 (같은 실행의 템플릿은 같은 구간 사용)
+# - (대상, 구간) 별 결과를 보관하여 여러 템플릿이 한 번의 조회를 공유 (동시 요청은 진행 중인 조회를 기다림)
+# - baseline 사용 시 비교 구간(offset 만큼 이전)을 현재 구간과 함께 조회 (겹치는 구간은 한 번만 조회)
+class MetricCollector:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.config = report_instance.config
+        self.logger = report_instance.logger
+        self._windows: Dict[str, Tuple[datetime, datetime]] = {}
+        self._tasks: Dict[Tuple, asyncio.Future] = {}
+
+    # time_range ("24h", "7d", "today") -> (시작, 종료)
+    def window(self, time_range: str) -> Tuple[datetime, datetime]:
+        if time_range not in self._windows:
+            end_time = datetime.now()
+            if time_range.endswith('h'):
+                start_time = end_time - timedelta(hours=int(time_range[:-1]))
+            elif time_range.endswith('d'):
+                start_time = end_time - timedelta(days=int(time_range[:-1]))
+            else:
+                start_time = end_time.replace(hour=0, minute=0, second=0, microsecond=0)
+            self._windows[time_range] = (start_time, end_time)
+        return self._windows[time_range]
+
+    # 단일 서버 메트릭 {metric_name: MetricSeries | SeriesMatrix}
+    async def metrics(self, target: str, time_range: str) -> Metrics:
+        start_time, end_time = self.window(time_range)
+        offset = baseline_offset(self.config)
+        if offset is None:
+            return await self._memoize(('target', target, start_time, end_time), lambda: self._collect(target, start_time, end_time))
+        current, _ = await self._with_baseline(target, start_time, end_time, offset)
+        return current
+
+    # 비교 구간(baseline.offset 만큼 이전) 메트릭 (baseline 비활성이면 None)
+    async def baseline(self, target: str, time_range: str) -> Optional[Metrics]:
+        offset = baseline_offset(self.config)
+        if offset is None:
+            return None
+        start_time, end_time = self.window(time_range)
+        _, baseline = await self._with_baseline(target, start_time, end_time, offset)
+        return baseline
+
+    # 플릿 메트릭 {ip: {metric_name: MetricSeries | SeriesMatrix}} (metric_names: 일부 메트릭만 조회)
+    async def fleet_metrics(self, ips: List[str], time_range: str, metric_names: Optional[Iterable[str]] = None) -> Dict[str, Metrics]:
+        start_time, end_time = self.window(time_range)
+        names = None if metric_names is None else tuple(metric_names)
+        key = ('fleet', tuple(dict.fromkeys(ips)), names, start_time, end_time)
+        return await self._memoize(key, lambda: self._collect_fleet(list(key[1]), start_time, end_time, names))
+
+    # 대상 서버와 상관관계가 높은 서버 {metric_name: [CorrelatedPair]} (비교 대상: correlation.scope)
+    async def correlations(self, target: str, time_range: str) -> Dict[str, List[CorrelatedPair]]:
+        correlation_config = self.config.get('correlation', {}) or {}
+        peers = self.report.cmdb.peers(target, correlation_config.get('scope', 'service'))
+        if len(peers) < 2:
+            return {}
+        fleet = await self.fleet_metrics(list(peers), time_range, list(correlation_metrics(self.config)))
+        return correlate_fleet(fleet, self.config, focus=target)
+
+    # 실패한 조회는 보관하지 않음 (다음 요청에서 다시 시도)
+    async def _memoize(self, key: Tuple, factory):
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(factory())
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            raise
+
+    async def _with_baseline(self, target: str, start_time: datetime, end_time: datetime, offset: float) -> Tuple[Metrics, Metrics]:
+        shift = timedelta(seconds=offset)
+        key = ('baseline', target, start_time, end_time, offset)
+        return await self._memoize(key, lambda: self._collect_windows(target, [(start_time, end_time), (start_time - shift, end_time - shift)]))
+
+    async def _collect(self, target: str, start_time: datetime, end_time: datetime) -> Metrics:
+        metrics, = await self._collect_windows(target, [(start_time, end_time)])
+        return metrics
+
+    # 여러 구간의 메트릭을 조회하여 구간별로 반환
+    # - 겹치는 구간은 합쳐서 한 번만 조회, 나머지 구간은 동시에 조회 (모두 첫 번째 구간의 step 으로 같은 격자에 맞춤)
+    # - 기록 규칙 사용 여부는 조회 구간마다 판단 (get_promql)
+    async def _collect_windows(self, target: str, windows: List[Tuple[datetime, datetime]]) -> List[Metrics]:
+        bounds = [(start.timestamp(), end.timestamp()) for start, end in windows]
+        step = self.report.resolve_step(*bounds[0]) if len(windows) > 1 else None
+        spans = merge_windows(bounds)
+
+        async def query_span(start: float, end: float) -> Dict[str, List[Dict]]:
+            start_time = datetime.fromtimestamp(start)
+            promql = await self.report.get_promql(start_time)
+            # 쿼리에서 IP 치환
+            queries = {
+                metric_name: query.replace('{ip}', target).replace('{{', '{').replace('}}', '}')
+                for metric_name, query in promql.items()
+            }
+            return await self.report.query_prometheus_many(queries, start_time, datetime.fromtimestamp(end), step)
+
+        # 프로메테우스 쿼리 동시 실행
+        span_results = await asyncio.gather(*(query_span(start, end) for start, end in spans))
+        series_config = self.config.get('prometheus', {}).get('series_metrics', {}) or {}
+
+        window_metrics = []
+        for start, end in bounds:
+            span = next(index for index, (span_start, span_end) in enumerate(spans) if span_start <= start and end <= span_end)
+            results = span_results[span]
+            if spans[span] != (start, end):
+                # 합쳐서 조회한 결과에서 구간만 잘라냄 (step 경계에 맞춘 시작 시각 기준)
+                results = {
+                    metric_name: slice_result(result, start - start % step, end)
+                    for metric_name, result in results.items()
+                }
+
+            metrics = {}
+            for metric_name in self.config.get('prometheus', {}).get('promql', {}):
+                series = build_metric(metric_name, results.get(metric_name), series_config)
+                if series.unavailable:
+                    # 조회 실패 - 0 이 아닌 수집 불가로 표시
+                    self.logger.warning(f"Metric unavailable: {metric_name}")
+                elif not len(series):
+                    self.logger.warning(f"No data returned for metric: {metric_name}")
+                metrics[metric_name] = series
+            window_metrics.append(metrics)
+
+        # 백분위수/분포/임계값 초과 시간, 이상 구간, 추세 예측 일괄 계산 (모든 구간을 한 번에)
+        items = [(metric_name, series) for metrics in window_metrics for metric_name, series in metrics.items()]
+        attach_stats(items, self.config)
+        attach_anomalies(items, self.config)
+        attach_forecasts(items, self.config)
+        return window_metrics
+
+    async def _collect_fleet(self, ips: List[str], start_time: datetime, end_time: datetime,
+                             metric_names: Optional[Tuple[str, ...]] = None) -> Dict[str, Metrics]:
+        promql = await self.report.get_promql(start_time)
+        if metric_names is not None:
+            promql = {name: query for name, query in promql.items() if name in metric_names}
+        results = await FleetCollector(self.report).collect(promql, ips, start_time, end_time)
+
+        series_config = self.config.get('prometheus', {}).get('series_metrics', {}) or {}
+        fleet_metrics = {
+            ip: {metric_name: build_metric(metric_name, result, series_config) for metric_name, result in host_results.items()}
+            for ip, host_results in results.items()
+        }
+        # 전체 서버의 시리즈 통계/이상 구간/추세 예측을 한 번에 계산
+        fleet_items = [
+            (metric_name, series) for host_metrics in fleet_metrics.values() for metric_name, series in host_metrics.items()
+        ]
+        attach_stats(fleet_items, self.config)
+        attach_anomalies(fleet_items, self.config)
+        attach_forecasts(fleet_items, self.config)
+        return fleet_metrics
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 기본 설정 (correlation 섹션이 없을 때)
+DEFAULT_METRICS = {'cpu_usage': 'CPU 사용률'}
+DEFAULT_TOP = 5
+DEFAULT_BLOCK_SIZE = 256
+DEFAULT_MIN_COVERAGE = 0.5
+DEFAULT_MIN_COEFFICIENT = 0.7
+
+
+# 상관관계가 높은 서버 쌍 (first/second: 서버 키, coefficient: 피어슨 상관계수)
+class CorrelatedPair:
+    __slots__ = ('metric', 'first', 'second', 'coefficient')
+
+    def __init__(self, metric: str, first: str, second: str, coefficient: float):
+        self.metric = metric
+        self.first = first
+        self.second = second
+        self.coefficient = coefficient
+
+    def __repr__(self) -> str:
+        return f"CorrelatedPair({self.metric}, {self.first}, {self.second}, {self.coefficient:+.3f})"
+
+
+# 상관관계 대상 메트릭 {metric_name: 표시 이름}
+def correlation_metrics(config) -> Dict[str, str]:
+    correlation_config = config.get('correlation', {}) or {}
+    return dict(correlation_config.get('metrics') or DEFAULT_METRICS)
+
+
+# 서버별 메트릭 -> 상관관계 상위 쌍 {metric_name: [CorrelatedPair]} (focus: 이 서버와 다른 서버의 쌍만)
+def correlate_fleet(fleet_metrics: Dict[str, Dict], config, focus: Optional[str] = None) -> Dict[str, List[CorrelatedPair]]:
+    correlation_config = config.get('correlation', {}) or {}
+    top = int(correlation_config.get('top', DEFAULT_TOP))
+    block_size = int(correlation_config.get('block_size', DEFAULT_BLOCK_SIZE))
+    min_coverage = float(correlation_config.get('min_coverage', DEFAULT_MIN_COVERAGE))
+    min_coefficient = float(correlation_config.get('min_coefficient', DEFAULT_MIN_COEFFICIENT))
+
+    pairs = {}
+    for metric_name in correlation_metrics(config):
+        keys, series_list = [], []
+        for key, host_metrics in fleet_metrics.items():
+            series = host_metrics.get(metric_name)
+            # SeriesMatrix(장치별) 는 대상에서 제외
+            if series is None or series.unavailable or not len(series) or hasattr(series, 'rows'):
+                continue
+            keys.append(key)
+            series_list.append(series)
+        if len(keys) < 2 or (focus is not None and focus not in keys):
+            pairs[metric_name] = []
+            continue
+
+        _, matrix = align(series_list)
+        values, present = standardize(matrix, min_coverage)
+        focus_rows = None if focus is None else np.array([keys.index(focus)])
+        min_count = min_coverage * matrix.shape[1]
+        pairs[metric_name] = [
+            CorrelatedPair(metric_name, keys[first], keys[second], coefficient)
+            for first, second, coefficient in top_pairs(values, present, top, block_size, focus_rows, min_count)
+            if coefficient >= min_coefficient
+        ]
+    return pairs
+
+
+# 단일 서버 보고서 표시용 [(표시 이름, 상대 서버 키, 상관계수)] (상관계수 높은 순)
+def correlation_items(pairs: Dict[str, List[CorrelatedPair]], target: str, config) -> List[Tuple[str, str, float]]:
+    items = []
+    for metric_name, title in correlation_metrics(config).items():
+        for pair in pairs.get(metric_name) or []:
+            items.append((title, pair.second if pair.first == target else pair.first, pair.coefficient))
+    return sorted(items, key=lambda item: -item[2])
+
+
+# 여러 시리즈를 공통 시각 격자에 배치 (step: 시리즈 간격의 중앙값, 격자에 없는 칸은 NaN)
+def align(series_list: Sequence['MetricSeries'], step: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    if step is None:
+        gaps = np.concatenate([np.diff(series.timestamps) for series in series_list])
+        step = float(np.median(gaps)) if gaps.size else 1.0
+    start = min(float(series.timestamps[0]) for series in series_list)
+    end = max(float(series.timestamps[-1]) for series in series_list)
+    width = int(round((end - start) / step)) + 1
+
+    matrix = np.full((len(series_list), width), np.nan)
+    for row, series in enumerate(series_list):
+        columns = np.clip(np.rint((series.timestamps - start) / step).astype(np.intp), 0, width - 1)
+        matrix[row, columns] = series.values
+    return start + np.arange(width) * step, matrix
+
+
+# 행별 평균/표준편차로 표준화한 값(NaN 은 0)과 유효 포인트 마스크 (1.0/0.0)
+# - 유효 포인트 비율이 min_coverage 미만이거나 변화가 없는 행은 마스크 전체 0 (어떤 쌍에도 포함되지 않음)
+def standardize(matrix: np.ndarray, min_coverage: float = DEFAULT_MIN_COVERAGE) -> Tuple[np.ndarray, np.ndarray]:
+    present = ~np.isnan(matrix)
+    count = present.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(present, matrix, 0.0).sum(axis=1) / count
+        centered = np.where(present, matrix - mean[:, np.newaxis], 0.0)
+        scale = np.sqrt(np.einsum('ij,ij->i', centered, centered) / count)
+    usable = (count >= min_coverage * matrix.shape[1]) & (scale > 1e-12)
+    centered[usable] /= scale[usable, np.newaxis]
+    centered[~usable] = 0.0
+    present[~usable] = False
+    return centered, present.astype(np.float64)
+
+
+# 상관계수 상위 k 쌍 [(행, 행, 상관계수)] - 행 block_size 개씩 계산하여 메모리는 block_size x 행 수로 제한
+# - 상관계수는 두 행 모두 값이 있는 시각만으로 계산한 피어슨 상관계수 (결측 구간이 0 쪽으로 끌어내리지 않음)
+#   공통 시각의 합/제곱합/곱의 합을 마스크 행렬곱으로 한 번에 구함
+# - 공통 시각이 min_count 미만인 쌍은 제외
+# - focus_rows 가 없으면 전체 쌍 (i < j), 있으면 해당 행과 나머지 행의 쌍
+def top_pairs(values: np.ndarray, present: np.ndarray, k: int, block_size: int = DEFAULT_BLOCK_SIZE,
+              focus_rows: Optional[np.ndarray] = None, min_count: float = 3) -> List[Tuple[int, int, float]]:
+    rows = values.shape[0]
+    sources = np.arange(rows) if focus_rows is None else np.asarray(focus_rows, dtype=np.intp)
+    if rows < 2 or k <= 0:
+        return []
+
+    squares = values * values
+    min_count = max(min_count, 3)
+    best_first, best_second, best_score = [], [], []
+    for offset in range(0, sources.size, block_size):
+        block = sources[offset:offset + block_size]
+        x, x_present, x_squares = values[block], present[block], squares[block]
+        # (블록 x 전체 행) - 공통 시각 수, 합, 제곱합, 곱의 합
+        count = x_present @ present.T
+        sum_x, sum_y = x @ present.T, x_present @ values.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = x @ values.T - sum_x * sum_y / count
+            variance = (x_squares @ present.T - sum_x * sum_x / count) * (x_present @ squares.T - sum_y * sum_y / count)
+            scores = np.clip(covariance / np.sqrt(variance), -1.0, 1.0)
+        scores[~((count >= min_count) & (variance > 1e-12))] = -np.inf
+        scores[np.arange(block.size), block] = -np.inf  # 자기 자신 제외
+        if focus_rows is None:
+            scores[np.arange(rows)[np.newaxis, :] <= block[:, np.newaxis]] = -np.inf  # 중복 쌍 제외 (i < j 만)
+
+        # 블록 안에서 상위 k 개만 남김
+        flat = scores.ravel()
+        keep = min(k, flat.size)
+        candidates = np.argpartition(-flat, keep - 1)[:keep]
+        candidates = candidates[np.isfinite(flat[candidates])]
+        best_first.append(block[candidates // rows])
+        best_second.append(candidates % rows)
+        best_score.append(flat[candidates])
+
+    first = np.concatenate(best_first)
+    second = np.concatenate(best_second)
+    score = np.concatenate(best_score)
+    order = np.argsort(-score, kind='stable')[:k]
+    return [(int(first[i]), int(second[i]), float(score[i])) for i in order]
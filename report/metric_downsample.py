@@ -0,0 +1,86 @@
+from typing import Tuple
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+# 시계열 다운샘플링 - 고정 개수(width)의 (timestamps, values) 반환 (NaN 제외, width 이하이면 그대로)
+# - lttb: Largest-Triangle-Three-Buckets (모양 보존, 급등/급락 지점 유지)
+# - minmax: 구간별 최소/최대값을 시간 순으로 (width // 2 개 구간, 최고/최저점 보존, 홀수 width 는 마지막 점 포함)
+def downsample(timestamps: np.ndarray, values: np.ndarray, width: int, method: str = 'lttb') -> Tuple[np.ndarray, np.ndarray]:
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsample method: {method} (available: {', '.join(METHODS)})")
+    finite = ~np.isnan(values)
+    if not finite.all():
+        timestamps, values = timestamps[finite], values[finite]
+    if width <= 0 or values.size <= width:
+        return timestamps, values
+    if method == 'minmax' or width < 3:
+        return minmax(timestamps, values, width)
+    return lttb(timestamps, values, width)
+
+
+# LTTB - 첫/마지막 점을 고정하고, 가운데 width - 2 개 구간마다 (이전 선택 점, 다음 구간 평균) 과 만드는 삼각형이 가장 큰 점 선택
+# - 구간 평균은 누적합으로 한 번에 계산, 반복은 구간 수만큼 (구간 내부는 벡터 연산)
+def lttb(timestamps: np.ndarray, values: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    size = values.size
+    if width >= size or width < 3:
+        return timestamps, values
+    x = timestamps.astype(np.float64) - float(timestamps[0])
+    y = values.astype(np.float64)
+
+    bounds = np.linspace(1, size - 1, width - 1).astype(np.intp)
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+    counts = np.diff(bounds)
+    avg_x = (x_sums[bounds[1:]] - x_sums[bounds[:-1]]) / counts
+    avg_y = (y_sums[bounds[1:]] - y_sums[bounds[:-1]]) / counts
+    # 구간 i 의 비교 대상은 다음 구간 평균 (마지막 구간은 마지막 점)
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(width, dtype=np.intp)
+    selected[0], selected[-1] = 0, size - 1
+    anchor = 0
+    for bucket in range(width - 2):
+        lo, hi = bounds[bucket], bounds[bucket + 1]
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs((ax - next_x[bucket]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[bucket] - ay))
+        anchor = lo + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return timestamps[selected], values[selected]
+
+
+# 구간별 최소/최대값 인덱스를 시간 순으로 (구간 수 = width // 2, width 가 홀수이면 마지막 점 추가)
+def minmax(timestamps: np.ndarray, values: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    size = values.size
+    if size <= width or width < 1:
+        return timestamps, values
+    if width == 1:
+        selected = [int(np.argmax(values))]
+        return timestamps[selected], values[selected]
+
+    # 홀수 width: 마지막 점을 따로 두고 나머지 구간에서 width - 1 개 선택
+    tail = width % 2
+    span = size - tail
+    buckets = width // 2
+    bounds = np.linspace(0, span, buckets + 1).astype(np.intp)
+    starts = bounds[:-1]
+    bucket_of = np.repeat(np.arange(buckets), np.diff(bounds))
+    low = np.minimum.reduceat(values[:span], starts)
+    high = np.maximum.reduceat(values[:span], starts)
+
+    # 구간별 최소/최대값이 처음 나오는 위치
+    low_index = _first_match(values[:span] == low[bucket_of], bucket_of)
+    high_index = _first_match(values[:span] == high[bucket_of], bucket_of)
+    selected = np.sort(np.stack([low_index, high_index], axis=1), axis=1).ravel()
+    if tail:
+        selected = np.append(selected, size - 1)
+    return timestamps[selected], values[selected]
+
+
+def _first_match(matches: np.ndarray, bucket_of: np.ndarray) -> np.ndarray:
+    positions = np.flatnonzero(matches)
+    _, first = np.unique(bucket_of[positions], return_index=True)  # 위치가 정렬되어 있어 구간별 첫 항목
+    return positions[first]
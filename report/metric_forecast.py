@@ -0,0 +1,225 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from metric_stats import format_duration
+from prom_range import parse_duration
+
+# 기본 설정 (forecast 섹션이 없을 때)
+DEFAULT_METHOD = 'theil_sen'
+DEFAULT_SAMPLE_POINTS = 40
+DEFAULT_HORIZON = 30 * 86400
+DEFAULT_MIN_SPAN = 6 * 3600
+DEFAULT_METRICS = {
+    'disk_usage': {'threshold': 'disk', 'title': 'Disk 사용률'},
+    'memory_usage': {'threshold': 'memory', 'title': 'Memory 사용률'},
+    'filesystem_usage': {'threshold': 'disk', 'title': 'Filesystem'}
+}
+METHODS = ('theil_sen', 'linear')
+
+
+# 사용률 추세 예측 (slope: 초당 증가량, current: 추세선의 마지막 시점 값, eta_*: 도달까지 남은 초 - 증가 추세가 아니면 None)
+class Forecast:
+    __slots__ = ('method', 'slope', 'current', 'critical', 'eta_critical', 'eta_full')
+
+    def __init__(self, method: str, slope: float, current: float, critical: Optional[float],
+                 eta_critical: Optional[float], eta_full: Optional[float]):
+        self.method = method
+        self.slope = slope
+        self.current = current
+        self.critical = critical
+        self.eta_critical = eta_critical
+        self.eta_full = eta_full
+
+    @property
+    def slope_per_day(self) -> float:
+        return self.slope * 86400
+
+    # 위험 임계값/100% 중 먼저 도달하는 시간 (도달 예상이 없으면 inf)
+    @property
+    def first_eta(self) -> float:
+        etas = [eta for eta in (self.eta_critical, self.eta_full) if eta is not None]
+        return min(etas) if etas else float('inf')
+
+    # horizon(초) 안에 위험 임계값 또는 100% 에 도달하는지
+    def within(self, horizon: float) -> bool:
+        return any(eta is not None and eta <= horizon for eta in (self.eta_critical, self.eta_full))
+
+    # 예: "+1.2%/일 · 위험(90%) 약 5일 3시간 · 100% 약 9일"
+    def describe(self) -> str:
+        parts = [f"{self.slope_per_day:+.1f}%/일"]
+        if self.critical is not None:
+            parts.append(f"위험({self.critical:g}%) {format_eta(self.eta_critical)}")
+        parts.append(f"100% {format_eta(self.eta_full)}")
+        return ' · '.join(parts)
+
+    def __repr__(self) -> str:
+        return f"Forecast({self.method}, {self.slope_per_day:+.2f}/day, eta_full={self.eta_full})"
+
+
+# 도달 예상 시간 문자열 (None: 도달하지 않음, 0: 이미 도달)
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '도달 예상 없음'
+    if seconds <= 0:
+        return '도달'
+    days, rest = divmod(seconds, 86400)
+    if days >= 1:
+        hours = int(rest // 3600)
+        return f"약 {int(days)}일 {hours}시간" if hours and days < 7 else f"약 {int(days)}일"
+    return f"약 {format_duration(seconds)}"
+
+
+# 예측 대상 메트릭 {metric_name: {'threshold': thresholds 키, 'title': 표시 이름}}
+def forecast_metrics(config) -> Dict[str, Dict]:
+    forecast_config = config.get('forecast', {}) or {}
+    metrics = {}
+    for name, options in (forecast_config.get('metrics') or DEFAULT_METRICS).items():
+        options = options or {}
+        metrics[name] = {'threshold': options.get('threshold'), 'title': options.get('title') or name}
+    return metrics
+
+
+# 메트릭 시리즈 추세를 한 번에 계산하여 series.forecast 에 저장
+# - 대상 시리즈 전체(플릿의 모든 서버, SeriesMatrix 행 포함)를 (시리즈 x 포인트) 행렬로 만들어 벡터 연산으로 계산
+# - 시리즈 기간이 min_span 보다 짧으면 건너뜀
+def attach_forecasts(metrics: Iterable[Tuple[str, 'MetricSeries']], config) -> None:
+    forecast_config = config.get('forecast', {}) or {}
+    if not forecast_config.get('enabled', True):
+        return
+    names = forecast_metrics(config)
+    thresholds = config.get('thresholds', {}) or {}
+    min_span = parse_duration(forecast_config.get('min_span'), DEFAULT_MIN_SPAN)
+
+    targets = []
+    for name, metric in metrics:
+        if name not in names or metric.unavailable or not len(metric):
+            continue
+        critical = (thresholds.get(names[name]['threshold'], {}) or {}).get('critical')
+        for series in (metric.rows() if hasattr(metric, 'rows') else (metric,)):
+            if series.timestamps.size >= 2 and series.timestamps[-1] - series.timestamps[0] >= min_span:
+                targets.append((series, critical))
+    if not targets:
+        return
+
+    width = max(len(series) for series, _ in targets)
+    timestamps = np.full((len(targets), width), np.nan)
+    values = np.full((len(targets), width), np.nan)
+    lengths = np.empty(len(targets), dtype=np.intp)
+    for row, (series, _) in enumerate(targets):
+        size = len(series)
+        timestamps[row, :size] = series.timestamps - series.timestamps[-1]  # 마지막 시점 기준 (초)
+        values[row, :size] = series.values
+        lengths[row] = size
+
+    method = forecast_config.get('method', DEFAULT_METHOD)
+    slope, current = fit_trends(
+        timestamps, values, lengths,
+        method=method,
+        sample_points=int(forecast_config.get('sample_points', DEFAULT_SAMPLE_POINTS))
+    )
+    critical = np.array([np.nan if limit is None else float(limit) for _, limit in targets])
+    eta_critical = time_to_reach(slope, current, critical)
+    eta_full = time_to_reach(slope, current, np.full(len(targets), 100.0))
+
+    for row, (series, limit) in enumerate(targets):
+        if np.isnan(slope[row]):
+            continue
+        series.forecast = Forecast(
+            method, float(slope[row]), float(current[row]),
+            None if limit is None else float(limit),
+            None if limit is None or np.isnan(eta_critical[row]) else float(eta_critical[row]),
+            None if np.isnan(eta_full[row]) else float(eta_full[row])
+        )
+
+
+# 행별 추세선 (기울기: 초당 증가량, x = 0 시점 값) - x 는 행별 마지막 시점 기준 초 (NaN 패딩)
+# - theil_sen: 행을 sample_points 개 구간 평균으로 줄인 뒤 모든 점 쌍 기울기의 중앙값 (이상치/일시적 급증에 강함)
+# - linear: 최소제곱 직선
+def fit_trends(timestamps: np.ndarray, values: np.ndarray, lengths: np.ndarray,
+               method: str = DEFAULT_METHOD, sample_points: int = DEFAULT_SAMPLE_POINTS) -> Tuple[np.ndarray, np.ndarray]:
+    if method not in METHODS:
+        raise ValueError(f"Unknown forecast method: {method} (available: {', '.join(METHODS)})")
+    present = ~(np.isnan(timestamps) | np.isnan(values))
+    x = np.where(present, timestamps, 0.0)
+    y = np.where(present, values, 0.0)
+
+    if method == 'linear':
+        count = present.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_x = x.sum(axis=1) / count
+            mean_y = y.sum(axis=1) / count
+            dx = np.where(present, x - mean_x[:, np.newaxis], 0.0)
+            slope = (dx * (y - mean_y[:, np.newaxis])).sum(axis=1) / (dx * dx).sum(axis=1)
+        return slope, mean_y - slope * mean_x
+
+    sample_x, sample_y = _bucket_means(x, y, present, lengths, sample_points)
+    first, second = np.triu_indices(sample_x.shape[1], k=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = (sample_y[:, second] - sample_y[:, first]) / (sample_x[:, second] - sample_x[:, first])
+    slopes[~np.isfinite(slopes)] = np.nan
+    slope = _nanmedian(slopes)
+    intercept = _nanmedian(sample_y - slope[:, np.newaxis] * sample_x)
+    return slope, intercept
+
+
+# 현재 값에서 목표 값까지 남은 시간 (초) - 이미 넘었으면 0, 증가 추세가 아니면 NaN
+def time_to_reach(slope: np.ndarray, current: np.ndarray, target: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        eta = np.where(slope > 0, (target - current) / slope, np.nan)
+    eta[current >= target] = 0.0
+    return eta
+
+
+# 행별로 길이에 맞춰 구간을 나누고 구간 평균 (행 x 구간, 빈 구간은 NaN)
+def _bucket_means(x: np.ndarray, y: np.ndarray, present: np.ndarray, lengths: np.ndarray, buckets: int):
+    rows = x.shape[0]
+    buckets = max(2, min(buckets, int(lengths.max())))
+    zeros = np.zeros((rows, 1))
+    x_sums = np.concatenate([zeros, np.cumsum(x, axis=1)], axis=1)
+    y_sums = np.concatenate([zeros, np.cumsum(y, axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(present, axis=1)], axis=1)
+
+    bounds = (np.arange(buckets + 1)[np.newaxis, :] * lengths[:, np.newaxis]) // buckets
+    count = np.diff(np.take_along_axis(counts, bounds, axis=1), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_x = np.diff(np.take_along_axis(x_sums, bounds, axis=1), axis=1) / count
+        mean_y = np.diff(np.take_along_axis(y_sums, bounds, axis=1), axis=1) / count
+    return mean_x, mean_y
+
+
+# 행별 NaN 제외 중앙값 (정렬 한 번, 값이 없으면 NaN)
+def _nanmedian(values: np.ndarray) -> np.ndarray:
+    ordered = np.sort(values, axis=1)
+    count = (~np.isnan(ordered)).sum(axis=1)
+    rows = np.arange(values.shape[0])
+    lower = np.maximum((count - 1) // 2, 0)
+    upper = np.maximum(count // 2, 0)
+    median = (ordered[rows, lower] + ordered[rows, upper]) / 2
+    median[count == 0] = np.nan
+    return median
+
+
+# 보고서에 표시할 예측 기간 (초)
+def forecast_horizon(config) -> float:
+    return parse_duration((config.get('forecast', {}) or {}).get('horizon'), DEFAULT_HORIZON)
+
+
+# 보고서 표시용 예측 [(표시 이름, Forecast)] - horizon 안에 위험/100% 도달 예상인 항목만 (include_all: 전체), 빠른 순
+def forecast_items(metrics: Dict, config, include_all: bool = False) -> List[Tuple[str, Forecast]]:
+    horizon = forecast_horizon(config)
+    items = []
+    for name, options in forecast_metrics(config).items():
+        metric = metrics.get(name)
+        if metric is None or metric.unavailable:
+            continue
+        title = options['title']
+        if hasattr(metric, 'rows'):
+            series_list = [(f"{title} {metric.name_of(labels)}", series) for labels, series in zip(metric.labels, metric.rows())]
+        else:
+            series_list = [(title, metric)]
+        for label, series in series_list:
+            if series.forecast is not None and (include_all or series.forecast.within(horizon)):
+                items.append((label, series.forecast))
+    return sorted(items, key=lambda item: item[1].first_eta)
+
@@ -0,0 +1,135 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from metric_series import MetricSeries
+from prom_resilience import UnavailableResult, UNAVAILABLE_TEXT
+
+_ORDER_BY = ('current', 'average', 'maximum')
+
+
+# 메트릭당 N개 시리즈 (장치/마운트포인트/인터페이스별) 컬럼형 컨테이너
+# - labels: 시리즈별 라벨, timestamps: 공통 시각 배열, values: (시리즈 x 시각) 행렬 (값이 없는 칸은 NaN)
+# - 행(row)은 values 의 뷰를 공유하는 MetricSeries 로 제공 (샘플 단위 객체 없음)
+class SeriesMatrix:
+    __slots__ = ('labels', 'timestamps', 'values', 'unavailable', 'group_label', 'top_k', 'order_by', '_index', '_rows')
+
+    def __init__(self, labels: List[Dict], timestamps: np.ndarray, values: np.ndarray, unavailable: bool = False,
+                 group_label: Optional[str] = None, top_k: int = 3, order_by: str = 'current'):
+        self.labels = labels
+        self.timestamps = timestamps
+        self.values = values
+        self.unavailable = unavailable
+        self.group_label = group_label
+        self.top_k = top_k
+        self.order_by = order_by if order_by in _ORDER_BY else 'current'
+        self._index: Optional[Dict[Tuple, int]] = None
+        self._rows: Optional[List[MetricSeries]] = None
+
+    # 쿼리 결과 전체 -> 행렬 (시리즈별로 공통 시각 격자에 배치)
+    @classmethod
+    def from_result(cls, result: Optional[List[Dict]], **options) -> 'SeriesMatrix':
+        if isinstance(result, UnavailableResult):
+            return cls([], np.empty(0), np.empty((0, 0)), unavailable=True, **options)
+        result = [series for series in (result or []) if series['values'].size]
+        if not result:
+            return cls([], np.empty(0), np.empty((0, 0)), **options)
+
+        timestamps = np.unique(np.concatenate([series['timestamps'] for series in result]))
+        values = np.full((len(result), timestamps.size), np.nan)
+        for row, series in enumerate(result):
+            values[row, np.searchsorted(timestamps, series['timestamps'])] = series['values']
+        return cls([series.get('metric', {}) for series in result], timestamps, values, **options)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    # 라벨 집합 -> 행 번호
+    def index(self) -> Dict[Tuple, int]:
+        if self._index is None:
+            self._index = {tuple(sorted(labels.items())): row for row, labels in enumerate(self.labels)}
+        return self._index
+
+    # 라벨로 시리즈 조회 (일부 라벨만 지정하면 첫 번째 일치 항목)
+    def find(self, **labels) -> Optional[MetricSeries]:
+        row = self.index().get(tuple(sorted(labels.items())))
+        if row is None:
+            row = next((i for i, series_labels in enumerate(self.labels)
+                        if all(series_labels.get(k) == v for k, v in labels.items())), None)
+        return None if row is None else self.rows()[row]
+
+    def rows(self) -> List[MetricSeries]:
+        if self._rows is None:
+            self._rows = [MetricSeries(self.timestamps, self.values[row]) for row in range(len(self.labels))]
+        return self._rows
+
+    # 행별 대표값 (current: 마지막 유효값, average, maximum) - 행렬 전체를 한 번에 계산
+    def reduce(self, how: str = 'current') -> np.ndarray:
+        if not len(self):
+            return np.empty(0)
+        present = ~np.isnan(self.values)
+        if how == 'average':
+            counts = present.sum(axis=1)
+            return np.where(present, self.values, 0.0).sum(axis=1) / np.maximum(counts, 1)
+        if how == 'maximum':
+            return np.where(present, self.values, -np.inf).max(axis=1)
+        last = self.values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1)
+        return self.values[np.arange(len(self)), last]
+
+    # 대표값 기준 상위 k 개 시리즈 [(라벨, MetricSeries)]
+    def top(self, k: Optional[int] = None, by: Optional[str] = None) -> List[Tuple[Dict, MetricSeries]]:
+        k = self.top_k if k is None else k
+        if not len(self) or k <= 0:
+            return []
+        scores = self.reduce(by or self.order_by)
+        if k < scores.size:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.size)
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        rows = self.rows()
+        return [(self.labels[row], rows[row]) for row in order]
+
+    # 시리즈 이름 (group_label 값, 없으면 라벨 문자열)
+    def name_of(self, labels: Dict) -> str:
+        if self.group_label and self.group_label in labels:
+            return str(labels[self.group_label])
+        return ','.join(f"{k}={v}" for k, v in sorted(labels.items()) if k not in ('__name__', 'instance', 'job')) or '-'
+
+    # 상위 k 개 요약 문자열 (예: "/ 81.2% · /data 75.0%")
+    def summary(self, unit: str = '%', scale: float = 1.0) -> str:
+        if self.unavailable:
+            return UNAVAILABLE_TEXT
+        return ' · '.join(
+            f"{self.name_of(labels)} {getattr(series, self.order_by) / scale:.1f}{unit}"
+            for labels, series in self.top()
+        )
+
+    # LLM 분석 컨텍스트용 요약 (상위 k 개)
+    def to_context(self, unit: str = '%', scale: float = 1.0) -> Dict[str, Dict[str, str]]:
+        if self.unavailable:
+            return {"상태": UNAVAILABLE_TEXT}
+        return {self.name_of(labels): series.to_context(unit, scale) for labels, series in self.top()}
+
+
+# 메트릭 이름에 맞는 결과 객체 생성 (series_metrics 에 있으면 SeriesMatrix, 아니면 첫 번째 시리즈)
+def build_metric(metric_name: str, result: Optional[List[Dict]], series_config: Dict) -> Union[MetricSeries, SeriesMatrix]:
+    options = series_config.get(metric_name)
+    if options is None:
+        return MetricSeries.from_result(result)
+    options = options or {}
+    return SeriesMatrix.from_result(
+        result,
+        group_label=options.get('label'),
+        top_k=int(options.get('top_k', 3)),
+        order_by=options.get('by', 'current')
+    )
+
+
+# LLM 분석 컨텍스트 (성능지표) - series_metrics 의 단위/스케일 적용
+def metrics_context(metrics: Dict[str, Union[MetricSeries, SeriesMatrix]], series_config: Dict) -> Dict[str, Dict]:
+    context = {}
+    for name, metric in metrics.items():
+        options = series_config.get(name) or {}
+        context[name] = metric.to_context(options.get('unit', '%'), float(options.get('scale', 1)))
+    return context
@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from metric_stats import format_duration
+from prom_resilience import UnavailableResult, UNAVAILABLE_TEXT
+
+_EMPTY = np.empty(0, dtype=np.float64)
+_EMPTY.setflags(write=False)
+
+
+# 메트릭 시계열 (timestamps/values 배열 + 지연 계산 통계)
+# - 통계(current/average/maximum/minimum)는 처음 접근할 때 한 번만 계산
+# - 백분위수/분포/임계값 초과 시간(stats)은 metric_stats.attach_stats 로 여러 시리즈를 한 번에 계산
+# - 이상 구간(anomalies)은 metric_anomaly.attach_anomalies 로 여러 시리즈를 한 번에 탐지
+# - 추세 예측(forecast)은 metric_forecast.attach_forecasts 로 여러 시리즈를 한 번에 계산
+# - 데이터 없음/수집 불가는 공유 인스턴스(MetricSeries.empty(), MetricSeries.unavailable_series()) 사용
+class MetricSeries:
+    __slots__ = ('timestamps', 'values', 'unavailable', 'stats', 'anomalies', 'forecast', '_stats')
+
+    _empty: Optional['MetricSeries'] = None
+    _unavailable: Optional['MetricSeries'] = None
+
+    def __init__(self, timestamps: np.ndarray = _EMPTY, values: np.ndarray = _EMPTY, unavailable: bool = False):
+        self.timestamps = timestamps
+        self.values = values
+        self.unavailable = unavailable
+        self.stats = None
+        self.anomalies = None
+        self.forecast = None
+        self._stats = None
+
+    # 쿼리 결과(첫 번째 시리즈) -> MetricSeries
+    @classmethod
+    def from_result(cls, result: Optional[List[Dict]]) -> 'MetricSeries':
+        if isinstance(result, UnavailableResult):
+            return cls.unavailable_series()
+        if not result or not result[0]['values'].size:
+            return cls.empty()
+        return cls(result[0]['timestamps'], result[0]['values'])
+
+    @classmethod
+    def empty(cls) -> 'MetricSeries':
+        if cls._empty is None:
+            cls._empty = cls()
+        return cls._empty
+
+    @classmethod
+    def unavailable_series(cls) -> 'MetricSeries':
+        if cls._unavailable is None:
+            cls._unavailable = cls(unavailable=True)
+        return cls._unavailable
+
+    def __len__(self) -> int:
+        return self.values.size
+
+    @property
+    def current(self) -> float:
+        return self._get_stats()[0]
+
+    @property
+    def average(self) -> float:
+        return self._get_stats()[1]
+
+    @property
+    def maximum(self) -> float:
+        return self._get_stats()[2]
+
+    @property
+    def minimum(self) -> float:
+        return self._get_stats()[3]
+
+    # (current, average, maximum, minimum) - NaN 제외, 값이 없으면 0
+    def _get_stats(self):
+        if self._stats is None:
+            values = self.values
+            finite = values[~np.isnan(values)] if values.size else values
+            if finite.size:
+                self._stats = (float(finite[-1]), float(finite.sum() / finite.size), float(finite.max()), float(finite.min()))
+            else:
+                self._stats = (0.0, 0.0, 0.0, 0.0)
+        return self._stats
+
+    # LLM 분석 컨텍스트용 요약 (scale: 표시 단위 변환 값)
+    def to_context(self, unit: str = '%', scale: float = 1.0) -> Dict[str, str]:
+        if self.unavailable:
+            return {"상태": UNAVAILABLE_TEXT}
+        context = {
+            "현재값": f"{self.current / scale:.1f}{unit}",
+            "평균": f"{self.average / scale:.1f}{unit}",
+            "최대": f"{self.maximum / scale:.1f}{unit}"
+        }
+        if self.stats is not None:
+            context["P95"] = f"{self.stats.percentile(95) / scale:.1f}{unit}"
+            context["P99"] = f"{self.stats.percentile(99) / scale:.1f}{unit}"
+            context["표준편차"] = f"{self.stats.stddev / scale:.1f}"
+            if self.stats.above_warning is not None:
+                context["경고 초과 시간"] = format_duration(self.stats.above_warning)
+                context["위험 초과 시간"] = format_duration(self.stats.above_critical)
+        if self.forecast is not None:
+            context["추세"] = f"{self.forecast.slope_per_day / scale:+.2f}{unit}/일"
+            context["용량 예측"] = self.forecast.describe()
+        if self.anomalies:
+            context["이상 구간"] = [window.describe(unit, scale) for window in self.anomalies]
+        return context
+
+    def __repr__(self) -> str:
+        if self.unavailable:
+            return "MetricSeries(unavailable)"
+        return f"MetricSeries(points={self.values.size})"
@@ -0,0 +1,158 @@
+import warnings
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 기본 설정 (statistics 섹션이 없을 때)
+DEFAULT_PERCENTILES = (50, 95, 99)
+DEFAULT_BUCKETS = (10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+DEFAULT_THRESHOLD_METRICS = {
+    'cpu_usage': 'cpu',
+    'memory_usage': 'memory',
+    'disk_usage': 'disk',
+    'cpu_load1': 'load',
+    'cpu_load5': 'load',
+    'cpu_load15': 'load'
+}
+
+
+# 시리즈 통계 (백분위수, 표준편차, 구간 분포, 임계값 초과 시간)
+class SeriesStats:
+    __slots__ = ('percentiles', 'stddev', 'buckets', 'histogram', 'above_warning', 'above_critical')
+
+    def __init__(self, percentiles: Dict[int, float], stddev: float, buckets: Tuple[float, ...],
+                 histogram: np.ndarray, above_warning: Optional[float], above_critical: Optional[float]):
+        self.percentiles = percentiles
+        self.stddev = stddev
+        self.buckets = buckets
+        self.histogram = histogram
+        self.above_warning = above_warning
+        self.above_critical = above_critical
+
+    def percentile(self, q: int) -> float:
+        return self.percentiles.get(q, float('nan'))
+
+    # 구간별 비율 (%) - 마지막 항목은 최대 구간 초과
+    def distribution(self) -> List[Tuple[str, float]]:
+        total = self.histogram.sum()
+        if not total:
+            return []
+        labels = [f"≤{bound:g}" for bound in self.buckets] + [f">{self.buckets[-1]:g}"]
+        return [(label, float(count) * 100 / total) for label, count in zip(labels, self.histogram)]
+
+
+# 메트릭 시리즈 통계를 한 번에 계산하여 series.stats 에 저장
+# - 모든 시리즈를 NaN 으로 채운 (시리즈 x 포인트) 행렬로 만들어 백분위수/표준편차/분포/초과 시간을 벡터 연산으로 계산
+# - 빈 시리즈/수집 불가(공유 인스턴스)는 건너뜀, SeriesMatrix 는 행마다 계산
+def attach_stats(metrics: Iterable[Tuple[str, 'MetricSeries']], config) -> None:
+    stats_config = config.get('statistics', {}) or {}
+    thresholds = config.get('thresholds', {}) or {}
+    threshold_metrics = stats_config.get('threshold_metrics') or DEFAULT_THRESHOLD_METRICS
+    percentiles = tuple(int(q) for q in stats_config.get('percentiles', DEFAULT_PERCENTILES))
+    buckets = tuple(float(b) for b in stats_config.get('histogram_buckets', DEFAULT_BUCKETS))
+
+    targets = []
+    for name, metric in metrics:
+        if metric.unavailable or not len(metric):
+            continue
+        limits = thresholds.get(threshold_metrics.get(name), {}) or {}
+        # SeriesMatrix 는 행(시리즈)별로 계산
+        for series in (metric.rows() if hasattr(metric, 'rows') else (metric,)):
+            targets.append((series, limits.get('warning'), limits.get('critical')))
+    if not targets:
+        return
+
+    computed = compute_stats(
+        [series for series, _, _ in targets],
+        warning=[warning for _, warning, _ in targets],
+        critical=[critical for _, _, critical in targets],
+        percentiles=percentiles,
+        buckets=buckets
+    )
+    for (series, _, _), stats in zip(targets, computed):
+        series.stats = stats
+
+
+def compute_stats(
+    series_list: Sequence['MetricSeries'],
+    warning: Sequence[Optional[float]],
+    critical: Sequence[Optional[float]],
+    percentiles: Sequence[int] = DEFAULT_PERCENTILES,
+    buckets: Sequence[float] = DEFAULT_BUCKETS
+) -> List[SeriesStats]:
+    rows = len(series_list)
+    width = max(len(series) for series in series_list)
+    values = np.full((rows, width), np.nan)
+    durations = np.zeros((rows, width))
+    for row, series in enumerate(series_list):
+        size = len(series)
+        values[row, :size] = series.values
+        durations[row, :size] = sample_durations(series.timestamps)
+
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1)
+
+    # 백분위수: 행별 정렬 한 번 (NaN 은 뒤로 정렬) 후 선형 보간 (numpy 'linear' 방식과 동일)
+    ordered = np.sort(values, axis=1)
+    positions = (np.asarray(percentiles, dtype=np.float64)[:, np.newaxis] / 100.0) * np.maximum(counts - 1, 0)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+    fraction = positions - lower
+    low_values = np.take_along_axis(ordered, lower.T, axis=1).T
+    high_values = np.take_along_axis(ordered, upper.T, axis=1).T
+    percentile_values = low_values + (high_values - low_values) * fraction
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        stddev = np.nanstd(values, axis=1)
+
+    # 구간 분포: (행, 구간) 을 1차원 인덱스로 만들어 bincount 한 번으로 집계
+    edges = np.asarray(buckets, dtype=np.float64)
+    bins = edges.size + 1
+    bucket_index = np.searchsorted(edges, values, side='left')
+    flat = (np.arange(rows)[:, np.newaxis] * bins + bucket_index)[present]
+    histogram = np.bincount(flat, minlength=rows * bins).reshape(rows, bins)
+
+    # 임계값 초과 시간 (샘플 값이 다음 샘플까지 유지된다고 보고 합산)
+    above_warning = _seconds_above(values, durations, warning)
+    above_critical = _seconds_above(values, durations, critical)
+
+    return [
+        SeriesStats(
+            percentiles={q: float(percentile_values[i, row]) for i, q in enumerate(percentiles)},
+            stddev=float(stddev[row]),
+            buckets=tuple(buckets),
+            histogram=histogram[row],
+            above_warning=None if warning[row] is None else float(above_warning[row]),
+            above_critical=None if critical[row] is None else float(above_critical[row])
+        )
+        for row in range(rows)
+    ]
+
+
+# 샘플별 유지 시간 (다음 샘플까지, 수집 누락 구간은 step 까지만 인정)
+def sample_durations(timestamps: np.ndarray) -> np.ndarray:
+    if timestamps.size < 2:
+        return np.zeros(timestamps.size)
+    gaps = np.diff(timestamps)
+    step = float(np.median(gaps))
+    return np.minimum(np.append(gaps, step), step)
+
+
+def _seconds_above(values: np.ndarray, durations: np.ndarray, limits: Sequence[Optional[float]]) -> np.ndarray:
+    limit = np.array([np.inf if value is None else float(value) for value in limits])[:, np.newaxis]
+    with np.errstate(invalid='ignore'):
+        return np.where(values >= limit, durations, 0.0).sum(axis=1)
+
+
+# 초 -> "1시간 20분" 형식
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    minutes = int(round(seconds / 60))
+    hours, minutes = divmod(minutes, 60)
+    if hours and minutes:
+        return f"{hours}시간 {minutes}분"
+    if hours:
+        return f"{hours}시간"
+    return f"{minutes}분"
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Iterable
+
+# 배치 쿼리에서 원래 메트릭 이름을 표시하는 라벨
+BATCH_LABEL = '__pb_metric'
+
+_NUMBER_LITERAL = re.compile(r'^[-+]?(\d+\.?\d*|\.\d+)(e[-+]?\d+)?$', re.IGNORECASE)
+_VECTOR_SELECTOR = re.compile(r'[a-zA-Z_:][\w:]*\s*\{|\{[^}]*\}')
+_SCALAR_FUNCTION = re.compile(r'^(scalar|time)\s*\(')
+
+
+# 여러 PromQL 을 label_replace + or 로 합쳐 query_range 호출 수를 줄이는 배치 엔진
+class PromQLBatcher:
+    def __init__(self, prom_config: Dict):
+        self.max_queries = max(1, int(prom_config.get('batch_max_queries', 8)))
+        self.max_length = int(prom_config.get('batch_max_length', 8000))
+
+    # 배치 병합 가능 여부 (결과가 instant vector 로 확실한 표현식만 병합)
+    @staticmethod
+    def is_batchable(query: str) -> bool:
+        expr = query.strip()
+        if not expr or BATCH_LABEL in expr:
+            return False
+        if _NUMBER_LITERAL.match(expr):
+            return False
+        if not _is_balanced(expr):
+            return False
+        # 최상위가 scalar()/time() 인 경우 label_replace 불가
+        if _SCALAR_FUNCTION.match(expr) and _outer_parens_close_at_end(expr):
+            return False
+        return bool(_VECTOR_SELECTOR.search(expr))
+
+    # 메트릭 이름 라벨을 붙인 표현식
+    @staticmethod
+    def tag(name: str, query: str) -> str:
+        value = name.replace('\\', '\\\\').replace('"', '\\"')
+        return f'label_replace(({query.strip()}), "{BATCH_LABEL}", "{value}", "", "")'
+
+    # 쿼리 묶음 계획 - 병합 불가 표현식은 단독 배치로 분리
+    def plan(self, queries: Dict[str, str]) -> List[Dict[str, str]]:
+        batches: List[Dict[str, str]] = []
+        current: Dict[str, str] = {}
+        current_length = 0
+
+        for name, query in queries.items():
+            if not self.is_batchable(query):
+                batches.append({name: query})
+                continue
+
+            length = len(self.tag(name, query)) + 4
+            if current and (len(current) >= self.max_queries or current_length + length > self.max_length):
+                batches.append(current)
+                current, current_length = {}, 0
+
+            current[name] = query
+            current_length += length
+
+        if current:
+            batches.append(current)
+        return batches
+
+    # 배치 쿼리 생성
+    def merge(self, batch: Dict[str, str]) -> str:
+        return ' or '.join(self.tag(name, query) for name, query in batch.items())
+
+    # 배치 결과를 메트릭별 결과로 분리
+    @staticmethod
+    def split(names: Iterable[str], result: List[Dict]) -> Dict[str, List[Dict]]:
+        split_result: Dict[str, List[Dict]] = {name: [] for name in names}
+        for series in result:
+            labels = dict(series.get('metric', {}))
+            name = labels.pop(BATCH_LABEL, None)
+            if name in split_result:
+                split_result[name].append({**series, 'metric': labels})
+        return split_result
+
+
+def _is_balanced(expr: str) -> bool:
+    depth = 0
+    quote = None
+    escaped = False
+    for char in expr:
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote:
+                quote = None
+            continue
+        if char in '"\'`':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0 and quote is None
+
+
+# 첫 여는 괄호의 짝이 표현식 끝에서 닫히는지 (예: scalar(...) 전체가 하나의 호출인지)
+def _outer_parens_close_at_end(expr: str) -> bool:
+    start = expr.index('(')
+    depth = 0
+    quote = None
+    for i in range(start, len(expr)):
+        char = expr[i]
+        if quote:
+            if char == quote and expr[i - 1] != '\\':
+                quote = None
+            continue
+        if char in '"\'`':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return expr[i + 1:].strip() == ''
+    return False
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metric_matrix import SeriesMatrix
+from prom_decode import make_series
+
+# query_range 결과 디스크 캐시 (키: 확장된 쿼리 + step)
+# - 메타데이터(<key>.json)와 샘플 배열(<key>-<token>.npy, 1행은 timestamp)로 저장하고 mmap 으로 읽음
+# - 재요청 시 마지막 캐시 시점 이후 구간(+ 늦게 들어온 샘플을 위한 overlap)만 조회
+# - 조회한 구간(coverage)을 기록하여 떨어진 구간(예: 지난주 비교 구간)도 같은 항목에 보관 (사이의 빈 구간은 캐시로 취급하지 않음)
+# - 전체 크기가 max_size_mb 를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+class QueryCache:
+    def __init__(self, cache_dir: Path, max_size_mb: float = 256, overlap_steps: int = 2, logger: logging.Logger = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size = int(float(max_size_mb) * 1024 * 1024)
+        self.overlap_steps = max(0, int(overlap_steps))
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # 캐시 조회 후 부족한 구간만 fetch(start, end) 로 채워서 반환
+    async def fetch(
+        self,
+        query: str,
+        step: int,
+        start: float,
+        end: float,
+        fetch: Callable[[float, float], Awaitable[List[Dict]]]
+    ) -> List[Dict]:
+        key = self._key(query, step)
+        # step 경계에 맞춰 조회해야 캐시된 시점과 새 시점이 같은 격자에 놓임
+        aligned_start = start - (start % step)
+        cached = self._load(key)
+        # 시작 시각을 포함하는 캐시 구간
+        segment = None
+        if cached is not None:
+            segment = next((seg for seg in cached[3] if seg[0] <= aligned_start <= seg[1]), None)
+
+        if segment is not None:
+            labels, timestamps, values, coverage = cached
+            if end < segment[1] + step:
+                self.hits += 1
+                return self._to_result(labels, timestamps, values, aligned_start, end)
+            self.partial_hits += 1
+            fetch_start = max(aligned_start, segment[1] - self.overlap_steps * step)
+        else:
+            self.misses += 1
+            fetch_start = aligned_start
+
+        fetched = self._to_arrays(await fetch(fetch_start, end))
+        # 조회 구간의 끝은 마지막 샘플 시점 (늦게 들어오는 샘플은 다음 조회에서 다시 가져옴)
+        covered = [[fetch_start, float(fetched[1][-1])]] if fetched[1].size else []
+        # 조회 중 같은 항목에 저장된 다른 구간(동시에 조회한 비교 구간 등)도 유지하도록 다시 읽어서 병합
+        cached = self._load(key)
+        if cached is not None:
+            labels, timestamps, values = self._merge(cached[:3], fetched)
+            coverage = self._cover(cached[3] + covered, step)
+        else:
+            labels, timestamps, values = fetched
+            coverage = covered
+        self._store(key, query, step, labels, timestamps, values, coverage)
+        return self._to_result(labels, timestamps, values, aligned_start, end)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'partial_hits': self.partial_hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    @staticmethod
+    def _key(query: str, step: int) -> str:
+        return hashlib.sha1(f"{step}\n{query}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _label_key(labels: Dict) -> str:
+        return json.dumps(labels, sort_keys=True, ensure_ascii=False)
+
+    # Prometheus matrix 결과 -> (라벨 목록, timestamp 배열, 시리즈 x timestamp 값 행렬)
+    def _to_arrays(self, result: List[Dict]) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        matrix = SeriesMatrix.from_result(result)
+        return matrix.labels, matrix.timestamps, matrix.values
+
+    # 기존 캐시와 새 조회 결과 병합 (겹치는 구간은 새 값 우선)
+    def _merge(self, old, new) -> Tuple[List[Dict], np.ndarray, np.ndarray]:
+        old_labels, old_ts, old_values = old
+        new_labels, new_ts, new_values = new
+
+        index = {self._label_key(labels): row for row, labels in enumerate(old_labels)}
+        labels = list(old_labels)
+        for series_labels in new_labels:
+            if self._label_key(series_labels) not in index:
+                index[self._label_key(series_labels)] = len(labels)
+                labels.append(series_labels)
+
+        timestamps = np.union1d(old_ts, new_ts)
+        values = np.full((len(labels), timestamps.size), np.nan)
+        if old_values.size:
+            values[:len(old_labels), np.searchsorted(timestamps, old_ts)] = old_values
+        if new_values.size:
+            rows = [index[self._label_key(series_labels)] for series_labels in new_labels]
+            columns = np.searchsorted(timestamps, new_ts)
+            block = values[np.ix_(rows, columns)]
+            values[np.ix_(rows, columns)] = np.where(np.isnan(new_values), block, new_values)
+        return labels, timestamps, values
+
+    # 조회 구간 목록 정리 (겹치거나 step 이내로 붙은 구간은 합침)
+    @staticmethod
+    def _cover(coverage: List[List[float]], step: int) -> List[List[float]]:
+        merged: List[List[float]] = []
+        for seg_start, seg_end in sorted(coverage):
+            if merged and seg_start <= merged[-1][1] + step:
+                merged[-1][1] = max(merged[-1][1], seg_end)
+            else:
+                merged.append([seg_start, seg_end])
+        return merged
+
+    # 요청 구간만 잘라서 Prometheus 결과 형식으로 변환
+    @staticmethod
+    def _to_result(labels, timestamps, values, start: float, end: float) -> List[Dict]:
+        if not labels:
+            return []
+        lo = np.searchsorted(timestamps, start, side='left')
+        hi = np.searchsorted(timestamps, end, side='right')
+        window_ts = timestamps[lo:hi]
+        result = []
+        for row, series_labels in enumerate(labels):
+            window = values[row, lo:hi]
+            mask = ~np.isnan(window)
+            if mask.any():
+                result.append(make_series(dict(series_labels), window_ts[mask], window[mask]))
+        return result
+
+    # (라벨 목록, timestamps, 값 행렬, 조회 구간 목록) - coverage 가 없는 이전 항목은 전체를 한 구간으로
+    def _load(self, key: str) -> Optional[Tuple[List[Dict], np.ndarray, np.ndarray, List[List[float]]]]:
+        meta_file = self.cache_dir / f"{key}.json"
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            data = np.load(self.cache_dir / meta['data'], mmap_mode='r')
+            os.utime(meta_file)  # LRU 기준 시각 갱신
+            timestamps = np.asarray(data[0])
+            coverage = meta.get('coverage')
+            if coverage is None:
+                coverage = [[float(timestamps[0]), float(timestamps[-1])]] if timestamps.size else []
+            return meta['labels'], timestamps, np.asarray(data[1:]), coverage
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Invalid cache entry {key}: {str(e)}")
+            return None
+
+    # 데이터 파일을 먼저 쓰고 메타데이터를 원자적으로 교체 (동시 실행 중인 리포트 프로세스 보호)
+    def _store(self, key: str, query: str, step: int, labels, timestamps, values, coverage: List[List[float]]):
+        if not labels:
+            return
+        try:
+            data_name = f"{key}-{uuid.uuid4().hex[:8]}.npy"
+            np.save(self.cache_dir / data_name, np.vstack((timestamps[np.newaxis, :], values)))
+
+            meta_file = self.cache_dir / f"{key}.json"
+            old_data = None
+            if meta_file.exists():
+                try:
+                    with open(meta_file, 'r', encoding='utf-8') as f:
+                        old_data = json.load(f).get('data')
+                except Exception:
+                    pass
+
+            tmp_file = self.cache_dir / f"{key}.json.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'query': query,
+                    'step': step,
+                    'labels': labels,
+                    'data': data_name,
+                    'coverage': coverage,
+                    'updated': time.time()
+                }, f, ensure_ascii=False)
+            os.replace(tmp_file, meta_file)
+
+            if old_data and old_data != data_name:
+                (self.cache_dir / old_data).unlink(missing_ok=True)
+
+            self._evict()
+        except Exception as e:
+            self.logger.warning(f"Failed to store cache entry {key}: {str(e)}")
+
+    # 크기 기반 LRU 정리
+    def _evict(self):
+        entries = []
+        total = 0
+        for meta_file in self.cache_dir.glob('*.json'):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    data_file = self.cache_dir / json.load(f)['data']
+                size = meta_file.stat().st_size + data_file.stat().st_size
+            except Exception:
+                continue
+            entries.append((meta_file.stat().st_mtime, meta_file, data_file, size))
+            total += size
+
+        for _, meta_file, data_file, size in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            meta_file.unlink(missing_ok=True)
+            data_file.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
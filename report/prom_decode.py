@@ -0,0 +1,57 @@
+from typing import Dict, List
+
+import numpy as np
+
+# 빠른 JSON 파서 (orjson 미설치 시 표준 json 사용)
+try:
+    import orjson
+
+    def _loads(body: bytes):
+        return orjson.loads(body)
+except ImportError:
+    import json
+
+    def _loads(body: bytes):
+        return json.loads(body)
+
+
+class PrometheusDecodeError(ValueError):
+    pass
+
+
+# Prometheus API 응답 본문 디코딩 - 결과 시리즈의 values 를 float64 배열로 변환
+def decode_response(body: bytes) -> Dict:
+    try:
+        data = _loads(body)
+    except Exception as e:
+        raise PrometheusDecodeError(f"Invalid Prometheus response: {str(e)}")
+
+    if data.get('status') == 'success':
+        result = data.get('data', {}).get('result')
+        if isinstance(result, list):
+            decode_matrix(result)
+    return data
+
+
+# [[ts, "value"], ...] 쌍 목록을 연속된 timestamps/values 배열로 변환 (제자리 변환)
+# - 시리즈마다 {'metric': {...}, 'timestamps': ndarray, 'values': ndarray}
+def decode_matrix(result: List[Dict]) -> List[Dict]:
+    for series in result:
+        pairs = series.get('values')
+        if pairs is None and 'value' in series:  # instant vector
+            pairs = [series.pop('value')]
+        pairs = pairs or []
+        count = len(pairs)
+        series['timestamps'] = np.fromiter((pair[0] for pair in pairs), dtype=np.float64, count=count)
+        # 값은 "1.5", "NaN", "+Inf" 형태의 문자열 - numpy 가 C 레벨에서 일괄 변환
+        series['values'] = np.array([pair[1] for pair in pairs], dtype=np.float64)
+    return result
+
+
+# 시리즈 배열 생성 헬퍼 (캐시/구간 병합 결과용)
+def make_series(metric: Dict, timestamps: np.ndarray, values: np.ndarray) -> Dict:
+    return {
+        'metric': metric,
+        'timestamps': np.ascontiguousarray(timestamps, dtype=np.float64),
+        'values': np.ascontiguousarray(values, dtype=np.float64)
+    }
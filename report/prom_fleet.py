@@ -0,0 +1,175 @@
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from prom_resilience import UnavailableResult
+
+# 단일 대상 필터 (instance="{ip}:9100")
+_INSTANCE_FILTER = re.compile(r'instance\s*=\s*"\{ip\}(?P<suffix>[^"]*)"')
+_AGGREGATION = re.compile(
+    r'\b(sum|avg|min|max|count|group|stddev|stdvar|topk|bottomk|quantile|count_values)(?=\s*(\(|by\b|without\b))'
+)
+_GROUPING = re.compile(r'\s*(by|without)\s*\(([^)]*)\)\s*')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|`[^`]*`')
+
+
+# 메트릭당 1회 쿼리로 여러 서버를 조회하고 instance 라벨로 분리하는 플릿 수집기
+class FleetCollector:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.logger = report_instance.logger
+        prom_config = report_instance.config.get('prometheus', {})
+        self.chunk_size = max(1, int(prom_config.get('fleet_chunk_size', 100)))
+        self.max_regex_length = int(prom_config.get('fleet_max_regex_length', 4000))
+
+    # 단일 대상 PromQL 템플릿을 instance=~"..." 플릿 쿼리로 변환 (변환 불가 시 None)
+    @staticmethod
+    def fleet_query(template: str, ips: List[str]) -> Optional[str]:
+        if not _INSTANCE_FILTER.search(template):
+            return None
+
+        def replace(match):
+            suffix = match.group('suffix')
+            pattern = '|'.join(_escape_regex(f"{ip}{suffix}") for ip in ips)
+            return f'instance=~"{pattern}"'
+
+        query = _INSTANCE_FILTER.sub(replace, template)
+        query = query.replace('{{', '{').replace('}}', '}')
+        return add_instance_grouping(query)
+
+    # URL/정규식 길이 제한을 넘지 않도록 대상 분할 (suffixes: 템플릿의 instance 필터 접미사, 예: ":9100")
+    def chunk(self, ips: List[str], suffixes: Sequence[str] = ('',)) -> List[List[str]]:
+        suffixes = list(suffixes) or ['']
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        length = 0
+        for ip in ips:
+            # 실제로 들어갈 정규식 항목 중 가장 긴 것 + 구분자(|)
+            item_length = max(len(_escape_regex(f"{ip}{suffix}")) for suffix in suffixes) + 1
+            if current and (len(current) >= self.chunk_size or length + item_length > self.max_regex_length):
+                chunks.append(current)
+                current, length = [], 0
+            current.append(ip)
+            length += item_length
+        if current:
+            chunks.append(current)
+        return chunks
+
+    # 플릿 메트릭 수집 - {ip: {metric_name: [series, ...]}}
+    async def collect(self, promql: Dict[str, str], ips: List[str], start_time: datetime, end_time: datetime) -> Dict[str, Dict[str, List[Dict]]]:
+        ips = list(dict.fromkeys(ips))
+        suffixes = {match.group('suffix') for template in promql.values() for match in _INSTANCE_FILTER.finditer(template)}
+        chunks = self.chunk(ips, sorted(suffixes))
+        per_host: Dict[str, Dict[str, List[Dict]]] = {ip: {name: [] for name in promql} for ip in ips}
+
+        queries: Dict[str, str] = {}
+        for metric_name, template in promql.items():
+            for index, chunk in enumerate(chunks):
+                query = self.fleet_query(template, chunk)
+                if query is None:
+                    self.logger.warning(f"Metric {metric_name} has no instance filter, skipped in fleet mode")
+                    break
+                queries[f"{metric_name}#{index}"] = query
+
+        self.logger.info(f"Fleet collection: {len(ips)} hosts, {len(promql)} metrics, {len(queries)} queries")
+        results = await self.report.query_prometheus_many(queries, start_time, end_time)
+
+        for key, result in results.items():
+            metric_name, index = key.rsplit('#', 1)
+            # 조회 실패 시 해당 청크의 모든 서버를 수집 불가로 표시
+            if isinstance(result, UnavailableResult):
+                for ip in chunks[int(index)]:
+                    per_host[ip][metric_name] = UnavailableResult(result.reason)
+                continue
+            for ip, series in self.demux(result).items():
+                if ip in per_host:
+                    per_host[ip][metric_name].extend(series)
+
+        return per_host
+
+    # instance 라벨(ip:port) 기준으로 결과 분리
+    @staticmethod
+    def demux(result: List[Dict]) -> Dict[str, List[Dict]]:
+        split_result: Dict[str, List[Dict]] = {}
+        for series in result:
+            instance = series.get('metric', {}).get('instance')
+            if not instance:
+                continue
+            ip = instance.rsplit(':', 1)[0] if ':' in instance else instance
+            split_result.setdefault(ip, []).append(series)
+        return split_result
+
+
+# 집계 연산자에 instance 그룹핑 추가 (sum(...) -> sum by(instance) (...), topk(5, ...) -> topk by(instance) (5, ...))
+# - 문자열 안(라벨 값 등)의 집계 연산자 이름은 무시
+def add_instance_grouping(query: str) -> str:
+    result = []
+    position = 0
+    for match in _AGGREGATION.finditer(_mask_strings(query)):
+        if match.start() < position:
+            continue
+        result.append(query[position:match.end()])
+        position = match.end()
+
+        # 앞쪽 그룹핑 절 (sum by(a) (...))
+        grouping = _GROUPING.match(query, position)
+        if grouping:
+            result.append(_with_instance(grouping))
+            position = grouping.end()
+            continue
+
+        paren = len(query) - len(query[position:].lstrip())
+        if paren >= len(query) or query[paren] != '(':
+            continue
+
+        # 뒤쪽 그룹핑 절 (sum(...) by (a))
+        close = _matching_paren(query, paren)
+        trailing = _GROUPING.match(query, close + 1) if close >= 0 else None
+        if trailing:
+            result.append(add_instance_grouping(query[position:close + 1]))
+            result.append(_with_instance(trailing))
+            position = trailing.end()
+        else:
+            result.append(' by(instance) ')
+            position = paren
+    result.append(query[position:])
+    return ''.join(result)
+
+
+def _with_instance(grouping: re.Match) -> str:
+    clause, labels = grouping.group(1), [label.strip() for label in grouping.group(2).split(',') if label.strip()]
+    if clause == 'by' and 'instance' not in labels:
+        labels.append('instance')
+    elif clause == 'without' and 'instance' in labels:
+        labels.remove('instance')
+    return f" {clause}({', '.join(labels)}) "
+
+
+# 문자열 리터럴 내용을 공백으로 바꾼 쿼리 (위치는 원본과 같음)
+def _mask_strings(query: str) -> str:
+    return _STRING.sub(lambda match: match.group(0)[0] + ' ' * (len(match.group(0)) - 2) + match.group(0)[-1], query)
+
+
+def _matching_paren(query: str, start: int) -> int:
+    depth = 0
+    quote = None
+    for i in range(start, len(query)):
+        char = query[i]
+        if quote:
+            if char == quote and query[i - 1] != '\\':
+                quote = None
+            continue
+        if char == '"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+    return -1
+
+
+# PromQL 문자열 안의 RE2 정규식 이스케이프 (역슬래시는 PromQL 문자열에서 한 번 더 이스케이프)
+def _escape_regex(value: str) -> str:
+    return re.sub(r'([.^$*+?()\[\]{}|\\])', r'\\\\\1', value)
@@ -0,0 +1,563 @@
+import re
+import warnings
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from prom_decode import make_series
+from prom_range import parse_duration
+
+# PromQL-lite: 원시 시리즈(remote read)로 로컬 계산할 수 있는 PromQL 부분 집합
+# - 셀렉터 metric{label="..", label=~".."}[range], 숫자
+# - 범위 함수 rate/irate/increase/*_over_time, 집계 sum/avg/max/min/count [by|without (...)]
+# - 사칙연산 (+ - * /, 벡터끼리는 __name__ 을 제외한 라벨이 같은 시리즈끼리 1:1 매칭)
+# - 그 외 문법(비교 연산, on/ignoring, offset, 그 밖의 함수 등)은 parse 에서 None (query_range 로 조회)
+
+AGGREGATIONS = {'sum', 'avg', 'max', 'min', 'count'}
+RANGE_FUNCTIONS = {'rate', 'irate', 'increase', 'avg_over_time', 'max_over_time', 'min_over_time', 'sum_over_time', 'count_over_time'}
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<range>\[\s*\d+[smhdw]\s*\])
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(?![\w:])
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<ident>[a-zA-Z_:][\w:]*)
+  | (?P<op>=~|!~|!=|==|>=|<=|[-+*/%^(){},=<>\[\]])
+)''', re.VERBOSE)
+
+Vector = List[Tuple[Dict, np.ndarray]]
+
+
+class PromLiteError(ValueError):
+    pass
+
+
+# 라벨 셀렉터 (matchers: [(라벨, 연산자, 값)], 정규식은 Prometheus 와 같이 전체 일치)
+class Selector:
+    __slots__ = ('matchers', '_patterns')
+
+    def __init__(self, matchers: List[Tuple[str, str, str]]):
+        self.matchers = matchers
+        self._patterns = {
+            index: re.compile(value) for index, (_, op, value) in enumerate(matchers) if op in ('=~', '!~')
+        }
+
+    # "metric{...}[range]" -> (Selector, range 초) - 셀렉터 문법이 아니면 None
+    @classmethod
+    def parse(cls, text: str) -> Optional[Tuple['Selector', Optional[int]]]:
+        try:
+            node = _Parser(text).parse()
+        except PromLiteError:
+            return None
+        if not isinstance(node, _SelectorNode):
+            return None
+        return node.selector, node.range_seconds
+
+    # 메트릭 이름 (name="..." 일 때, 없으면 None)
+    @property
+    def name(self) -> Optional[str]:
+        for label, op, value in self.matchers:
+            if label == '__name__' and op == '=':
+                return value
+        return None
+
+    def key(self) -> Tuple:
+        return tuple(self.matchers)
+
+    def matches(self, labels: Dict) -> bool:
+        for index, (label, op, value) in enumerate(self.matchers):
+            actual = labels.get(label, '')
+            if op == '=':
+                matched = actual == value
+            elif op == '!=':
+                matched = actual != value
+            else:
+                matched = self._patterns[index].fullmatch(actual) is not None
+                if op == '!~':
+                    matched = not matched
+            if not matched:
+                return False
+        return True
+
+
+# 원격 조회한 원시 시리즈 (메트릭 이름별 색인, 셀렉터 조건은 로컬에서 다시 적용)
+# - NaN 샘플(재시작/스크레이프 누락 시의 staleness marker)은 적재 시 한 번 제거
+#   (남겨두면 누적합/리셋 보정을 거치며 이후 구간 전체가 NaN 이 됨)
+class SeriesStore:
+    def __init__(self, raw_series: List[Dict]):
+        self._by_name: Dict[str, List[Dict]] = {}
+        seen = set()
+        for series in raw_series:
+            key = tuple(sorted(series['metric'].items()))
+            if key in seen:
+                continue
+            seen.add(key)
+            present = ~np.isnan(series['values'])
+            if not present.all():
+                series = make_series(series['metric'], series['timestamps'][present], series['values'][present])
+            self._by_name.setdefault(series['metric'].get('__name__', ''), []).append(series)
+
+    def select(self, selector: Selector) -> List[Dict]:
+        name = selector.name
+        candidates = self._by_name.get(name, []) if name is not None else [
+            series for group in self._by_name.values() for series in group
+        ]
+        return [series for series in candidates if selector.matches(series['metric'])]
+
+
+# 파싱된 표현식 - selectors() 로 필요한 원시 데이터를 확인하고 evaluate() 로 평가 시각마다 계산
+class Expression:
+    __slots__ = ('text', 'root')
+
+    def __init__(self, text: str, root):
+        self.text = text
+        self.root = root
+
+    # [(Selector, range 초 | None)] - 단순 셀렉터는 None (lookback 만큼 필요)
+    def selectors(self) -> List[Tuple[Selector, Optional[int]]]:
+        found: List[Tuple[Selector, Optional[int]]] = []
+        self.root.collect(found)
+        return found
+
+    def evaluate(self, store: SeriesStore, eval_ts: np.ndarray, lookback: int) -> List[Dict]:
+        value = self.root.evaluate(store, eval_ts, lookback)
+        if not isinstance(value, list):
+            return [make_series({}, eval_ts, np.full(eval_ts.size, float(value)))]
+        result = []
+        for labels, values in value:
+            mask = ~np.isnan(values)
+            if mask.any():
+                result.append(make_series(labels, eval_ts[mask], values[mask]))
+        return result
+
+
+# PromQL-lite 로 파싱 (지원하지 않는 문법이면 None)
+def parse(text: str) -> Optional[Expression]:
+    try:
+        return Expression(text, _Parser(text).parse())
+    except PromLiteError:
+        return None
+
+
+# 원격 조회 계획 [(조회 셀렉터, 필요 구간 초)]
+# - 같은 메트릭 이름의 셀렉터는 공통 matcher 만 서버에 보내고 한 번 조회 (나머지 조건은 로컬 필터)
+# - 공통 matcher 가 같은 메트릭 이름끼리는 __name__=~"a|b" 하나로 합침
+def plan_fetch(requirements: List[Tuple[Selector, int]]) -> List[Tuple[Selector, int]]:
+    by_name: Dict[str, Tuple[set, int]] = {}
+    unnamed: Dict[Tuple, Tuple[Selector, int]] = {}
+    for selector, window in requirements:
+        name = selector.name
+        if name is None:
+            previous = unnamed.get(selector.key())
+            unnamed[selector.key()] = (selector, max(window, previous[1] if previous else 0))
+            continue
+        matchers = {matcher for matcher in selector.matchers if matcher[0] != '__name__'}
+        common, previous_window = by_name.get(name, (matchers, 0))
+        by_name[name] = (common & matchers, max(window, previous_window))
+
+    groups: Dict[Tuple, Tuple[List[str], int]] = {}
+    for name, (common, window) in by_name.items():
+        key = tuple(sorted(common))
+        names, previous_window = groups.get(key, ([], 0))
+        groups[key] = (names + [name], max(window, previous_window))
+
+    plan = []
+    for common, (names, window) in groups.items():
+        if len(names) == 1:
+            name_matcher = ('__name__', '=', names[0])
+        else:
+            name_matcher = ('__name__', '=~', '|'.join(re.escape(name) for name in sorted(names)))
+        plan.append((Selector([name_matcher, *common]), window))
+    plan.extend(unnamed.values())
+    return plan
+
+
+########## 파서 ##########
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def parse(self):
+        node = self._expression()
+        if self.position != len(self.tokens):
+            raise PromLiteError(f"Unexpected token: {self.tokens[self.position][1]}")
+        return node
+
+    def _peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _take(self, kind: str, value: Optional[str] = None) -> str:
+        token_kind, token_value = self._peek()
+        if token_kind != kind or (value is not None and token_value != value):
+            raise PromLiteError(f"Expected {value or kind}, got {token_value}")
+        self.position += 1
+        return token_value
+
+    # + - (왼쪽 결합, * / 보다 낮음)
+    def _expression(self):
+        node = self._term()
+        while self._peek() in (('op', '+'), ('op', '-')):
+            op = self._take('op')
+            node = _BinaryNode(op, node, self._term())
+        return node
+
+    def _term(self):
+        node = self._unary()
+        while self._peek() in (('op', '*'), ('op', '/')):
+            op = self._take('op')
+            node = _BinaryNode(op, node, self._unary())
+        return node
+
+    def _unary(self):
+        if self._peek() == ('op', '-'):
+            self._take('op')
+            return _BinaryNode('*', _NumberNode(-1.0), self._unary())
+        if self._peek() == ('op', '+'):
+            self._take('op')
+        return self._primary()
+
+    def _primary(self):
+        kind, value = self._peek()
+        if kind == 'number':
+            self.position += 1
+            return _NumberNode(float(value))
+        if (kind, value) == ('op', '('):
+            self._take('op', '(')
+            node = self._expression()
+            self._take('op', ')')
+            return node
+        if kind == 'ident':
+            following = self._peek(1)
+            if value in AGGREGATIONS and (following == ('op', '(') or following[1] in ('by', 'without')):
+                return self._aggregation()
+            if following == ('op', '('):
+                if value not in RANGE_FUNCTIONS:
+                    raise PromLiteError(f"Unsupported function: {value}")
+                return self._call()
+            return self._selector()
+        if (kind, value) == ('op', '{'):
+            return self._selector()
+        raise PromLiteError(f"Unexpected token: {value}")
+
+    def _aggregation(self):
+        op = self._take('ident')
+        clause, labels = self._grouping()
+        self._take('op', '(')
+        inner = self._expression()
+        self._take('op', ')')
+        if clause is None:
+            clause, labels = self._grouping()
+        return _AggregateNode(op, clause, labels or [], inner)
+
+    def _grouping(self) -> Tuple[Optional[str], Optional[List[str]]]:
+        kind, value = self._peek()
+        if kind != 'ident' or value not in ('by', 'without'):
+            return None, None
+        self.position += 1
+        self._take('op', '(')
+        labels = []
+        while self._peek() != ('op', ')'):
+            labels.append(self._take('ident'))
+            if self._peek() == ('op', ','):
+                self.position += 1
+        self._take('op', ')')
+        return value, labels
+
+    def _call(self):
+        function = self._take('ident')
+        self._take('op', '(')
+        argument = self._selector()
+        self._take('op', ')')
+        if argument.range_seconds is None:
+            raise PromLiteError(f"{function} requires a range selector")
+        return _CallNode(function, argument)
+
+    def _selector(self):
+        matchers = []
+        if self._peek()[0] == 'ident':
+            matchers.append(('__name__', '=', self._take('ident')))
+        if self._peek() == ('op', '{'):
+            self._take('op', '{')
+            while self._peek() != ('op', '}'):
+                label = self._take('ident')
+                op = self._take('op')
+                if op not in ('=', '!=', '=~', '!~'):
+                    raise PromLiteError(f"Unsupported matcher operator: {op}")
+                matchers.append((label, op, re.sub(r'\\(.)', r'\1', self._take('string')[1:-1])))
+                if self._peek() == ('op', ','):
+                    self.position += 1
+            self._take('op', '}')
+        if not matchers:
+            raise PromLiteError("Empty selector")
+        range_seconds = None
+        if self._peek()[0] == 'range':
+            range_seconds = parse_duration(self._take('range').strip('[] '))
+        return _SelectorNode(Selector(matchers), range_seconds)
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise PromLiteError(f"Invalid character at {position}: {text[position:position + 10]!r}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+########## 평가 노드 (값: 스칼라 float 또는 [(라벨, 평가 시각별 값)]) ##########
+
+class _NumberNode:
+    __slots__ = ('value',)
+
+    def __init__(self, value: float):
+        self.value = value
+
+    def collect(self, found):
+        pass
+
+    def evaluate(self, store, eval_ts, lookback) -> float:
+        return self.value
+
+
+class _SelectorNode:
+    __slots__ = ('selector', 'range_seconds')
+
+    def __init__(self, selector: Selector, range_seconds: Optional[int]):
+        self.selector = selector
+        self.range_seconds = range_seconds
+
+    def collect(self, found):
+        found.append((self.selector, self.range_seconds))
+
+    def evaluate(self, store, eval_ts, lookback) -> Vector:
+        if self.range_seconds is not None:
+            raise PromLiteError("Range vector must be used in a range function")
+        return [
+            (dict(series['metric']), instant_values(series['timestamps'], series['values'], eval_ts, lookback))
+            for series in store.select(self.selector)
+        ]
+
+
+class _CallNode:
+    __slots__ = ('function', 'argument')
+
+    def __init__(self, function: str, argument: _SelectorNode):
+        self.function = function
+        self.argument = argument
+
+    def collect(self, found):
+        self.argument.collect(found)
+
+    def evaluate(self, store, eval_ts, lookback) -> Vector:
+        return [
+            (_drop_name(series['metric']),
+             range_function(self.function, series['timestamps'], series['values'], eval_ts, self.argument.range_seconds))
+            for series in store.select(self.argument.selector)
+        ]
+
+
+class _AggregateNode:
+    __slots__ = ('op', 'clause', 'labels', 'inner')
+
+    def __init__(self, op: str, clause: Optional[str], labels: List[str], inner):
+        self.op = op
+        self.clause = clause
+        self.labels = labels
+        self.inner = inner
+
+    def collect(self, found):
+        self.inner.collect(found)
+
+    def evaluate(self, store, eval_ts, lookback) -> Vector:
+        evaluated = self.inner.evaluate(store, eval_ts, lookback)
+        if not isinstance(evaluated, list):
+            raise PromLiteError(f"{self.op} requires a vector")
+        return aggregate(self.op, self.labels, evaluated, without=self.clause == 'without')
+
+
+class _BinaryNode:
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op: str, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def collect(self, found):
+        self.left.collect(found)
+        self.right.collect(found)
+
+    def evaluate(self, store, eval_ts, lookback) -> Union[float, Vector]:
+        left = self.left.evaluate(store, eval_ts, lookback)
+        right = self.right.evaluate(store, eval_ts, lookback)
+        if not isinstance(left, list) and not isinstance(right, list):
+            return float(_apply(self.op, np.float64(left), np.float64(right)))
+        if not isinstance(left, list):
+            return [(_drop_name(labels), _apply(self.op, left, values)) for labels, values in right]
+        if not isinstance(right, list):
+            return [(_drop_name(labels), _apply(self.op, values, right)) for labels, values in left]
+
+        # 벡터끼리: __name__ 을 제외한 라벨이 같은 시리즈끼리 1:1 매칭 (짝이 없는 시리즈는 제외)
+        right_by_key = {}
+        for labels, values in right:
+            key = _match_key(labels)
+            if key in right_by_key:
+                raise PromLiteError(f"Many-to-many matching is not supported: {dict(key)}")
+            right_by_key[key] = values
+        result, seen = [], set()
+        for labels, values in left:
+            key = _match_key(labels)
+            if key in seen:
+                raise PromLiteError(f"Many-to-many matching is not supported: {dict(key)}")
+            seen.add(key)
+            if key in right_by_key:
+                result.append((_drop_name(labels), _apply(self.op, values, right_by_key[key])))
+        return result
+
+
+def _apply(op: str, left, right):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if op == '+':
+            return left + right
+        if op == '-':
+            return left - right
+        if op == '*':
+            return left * right
+        return left / right
+
+
+def _drop_name(labels: Dict) -> Dict:
+    return {label: value for label, value in labels.items() if label != '__name__'}
+
+
+def _match_key(labels: Dict) -> Tuple:
+    return tuple(sorted(_drop_name(labels).items()))
+
+
+########## 시리즈 계산 ##########
+
+# 평가 시각마다 lookback 이내 마지막 샘플 (instant vector selector)
+def instant_values(timestamps: np.ndarray, values: np.ndarray, eval_ts: np.ndarray, lookback: int) -> np.ndarray:
+    result = np.full(eval_ts.size, np.nan)
+    if timestamps.size == 0:
+        return result
+    index = np.searchsorted(timestamps, eval_ts, side='right') - 1
+    picked = np.maximum(index, 0)
+    valid = (index >= 0) & ((eval_ts - timestamps[picked]) < lookback)
+    result[valid] = values[picked[valid]]
+    return result
+
+
+# 범위 함수 (rate/increase 는 Prometheus 와 같은 카운터 리셋 보정 및 외삽 적용, irate 는 구간의 마지막 두 샘플)
+def range_function(name: str, timestamps: np.ndarray, values: np.ndarray, eval_ts: np.ndarray, range_seconds: int) -> np.ndarray:
+    result = np.full(eval_ts.size, np.nan)
+    if timestamps.size == 0:
+        return result
+
+    lo = np.searchsorted(timestamps, eval_ts - range_seconds, side='right')
+    hi = np.searchsorted(timestamps, eval_ts, side='right')
+    count = hi - lo
+
+    if name in ('avg_over_time', 'sum_over_time', 'count_over_time'):
+        csum = np.concatenate(([0.0], np.cumsum(values)))
+        valid = count > 0
+        total = csum[hi] - csum[lo]
+        if name == 'avg_over_time':
+            result[valid] = total[valid] / count[valid]
+        elif name == 'sum_over_time':
+            result[valid] = total[valid]
+        else:
+            result[valid] = count[valid]
+        return result
+
+    if name in ('max_over_time', 'min_over_time'):
+        # reduceat 은 [lo[i], lo[i+1]) 구간을 줄이므로 구간 끝(hi)을 경계에 끼워 넣고 짝수 번째만 사용
+        ufunc = np.maximum if name == 'max_over_time' else np.minimum
+        valid = count > 0
+        if valid.any():
+            bounds = np.empty(2 * int(valid.sum()), dtype=np.intp)
+            bounds[0::2] = lo[valid]
+            bounds[1::2] = hi[valid]
+            padded = np.append(values, values[-1])  # hi 가 values.size 인 경우의 경계
+            result[valid] = ufunc.reduceat(padded, bounds)[0::2]
+        return result
+
+    valid = count >= 2
+    if not valid.any():
+        return result
+
+    if name == 'irate':
+        # 마지막 두 샘플의 초당 증가량 (감소했으면 카운터 리셋으로 보고 마지막 값 사용)
+        last_index = hi[valid] - 1
+        previous, last = values[last_index - 1], values[last_index]
+        delta = np.where(last < previous, last, last - previous)
+        result[valid] = delta / (timestamps[last_index] - timestamps[last_index - 1])
+        return result
+
+    # rate / increase
+    first_index, last_index = lo[valid], hi[valid] - 1
+
+    # 카운터 리셋 보정: 값이 감소한 지점의 직전 값을 누적
+    drops = np.zeros(values.size)
+    drops[1:] = np.where(values[1:] < values[:-1], values[:-1], 0.0)
+    resets = np.cumsum(drops)
+
+    first_t, last_t = timestamps[first_index], timestamps[last_index]
+    first_v = values[first_index]
+    delta = values[last_index] - first_v + (resets[last_index] - resets[first_index])
+
+    range_start = eval_ts[valid] - range_seconds
+    range_end = eval_ts[valid]
+    sampled = last_t - first_t
+    average_interval = sampled / (count[valid] - 1)
+    to_start = first_t - range_start
+    to_end = range_end - last_t
+
+    # 0 이하로 외삽하지 않도록 시작 구간 제한
+    with np.errstate(divide='ignore', invalid='ignore'):
+        to_zero = np.where((delta > 0) & (first_v >= 0), sampled * (first_v / delta), np.inf)
+    to_start = np.minimum(to_start, to_zero)
+
+    threshold = average_interval * 1.1
+    interval = sampled + np.where(to_start < threshold, to_start, average_interval / 2) \
+                       + np.where(to_end < threshold, to_end, average_interval / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        extrapolated = delta * (interval / sampled)
+    if name == 'rate':
+        extrapolated = extrapolated / range_seconds
+    result[valid] = extrapolated
+    return result
+
+
+# 집계 (sum/avg/max/min/count [by|without (...)]) - 시리즈 x 시각 행렬에서 그룹별로 계산
+def aggregate(name: str, grouping: List[str], evaluated: Vector, without: bool = False) -> Vector:
+    groups: Dict[Tuple, List[np.ndarray]] = {}
+    group_labels: Dict[Tuple, Dict] = {}
+    for labels, values in evaluated:
+        if without:
+            group = {label: value for label, value in labels.items() if label not in grouping and label != '__name__'}
+        else:
+            group = {label: labels[label] for label in grouping if label in labels}
+        key = tuple(sorted(group.items()))
+        groups.setdefault(key, []).append(values)
+        group_labels[key] = group
+
+    reducers = {'sum': np.nansum, 'avg': np.nanmean, 'max': np.nanmax, 'min': np.nanmin}
+    aggregated = []
+    for key, rows in groups.items():
+        matrix = np.vstack(rows)
+        present = ~np.isnan(matrix)
+        if name == 'count':
+            values = present.sum(axis=0).astype(np.float64)
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # 모두 NaN 인 시각
+                values = reducers[name](matrix, axis=0)
+        values[~present.any(axis=0)] = np.nan
+        aggregated.append((group_labels[key], values))
+    return aggregated
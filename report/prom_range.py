@@ -0,0 +1,72 @@
+import math
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from prom_decode import make_series
+
+# 조회 step 후보 (초) - 캐시 재사용을 위해 임의 값이 아닌 고정 단계 중에서 선택
+NICE_STEPS = [
+    15, 30, 60, 120, 300, 600, 900, 1800,
+    3600, 7200, 10800, 21600, 43200, 86400
+]
+
+# Prometheus query_range 의 시리즈당 최대 포인트 수
+PROMETHEUS_MAX_POINTS = 11000
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+# 기간 문자열을 초 단위로 변환 (예: 30s, 5m, 1h, 7d, 숫자는 초) - 값이 None 이면 default
+def parse_duration(value: Union[str, int, float, None], default: Optional[int] = None) -> int:
+    if value is None:
+        if default is None:
+            raise ValueError("Duration is required")
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text and text[-1] in DURATION_UNITS:
+        return int(float(text[:-1]) * DURATION_UNITS[text[-1]])
+    return int(float(text))
+
+
+# 시리즈당 포인트 수가 points_per_series 이하가 되는 가장 작은 step 선택
+def choose_step(start: float, end: float, points_per_series: int, min_step: int = 60) -> int:
+    range_seconds = max(0.0, end - start)
+    target = max(min_step, math.ceil(range_seconds / max(1, points_per_series)))
+    for step in NICE_STEPS:
+        if step >= target:
+            return step
+    # 후보보다 큰 경우 1일 단위로 올림
+    return math.ceil(target / 86400) * 86400
+
+
+# step 경계에 맞춘 하위 구간 분할 (구간마다 max_points 이하, 경계가 겹치지 않음)
+def split_windows(start: float, end: float, step: int, max_points: int = PROMETHEUS_MAX_POINTS) -> List[Tuple[float, float]]:
+    span = step * max(1, max_points)
+    windows = []
+    window_start = start - (start % step)
+    while window_start <= end:
+        # 다음 구간 시작은 span 격자에 정렬 (같은 구간이 항상 같은 경계를 가지도록)
+        next_start = window_start - (window_start % span) + span
+        windows.append((window_start, min(end, next_start - step)))
+        window_start = next_start
+    return windows
+
+
+# 하위 구간 결과를 시리즈별로 이어 붙임 (중복 timestamp 제거)
+def stitch(results: List[List[Dict]]) -> List[Dict]:
+    parts: Dict[Tuple, List[Dict]] = {}
+    for result in results:
+        for series in result:
+            parts.setdefault(tuple(sorted(series.get('metric', {}).items())), []).append(series)
+
+    stitched = []
+    for series_parts in parts.values():
+        timestamps = np.concatenate([part['timestamps'] for part in series_parts])
+        values = np.concatenate([part['values'] for part in series_parts])
+        # 구간 순서대로 붙이므로 같은 timestamp 는 첫 번째 값 유지
+        timestamps, index = np.unique(timestamps, return_index=True)
+        stitched.append(make_series(series_parts[0].get('metric', {}), timestamps, values[index]))
+    return stitched
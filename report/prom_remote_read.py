@@ -0,0 +1,322 @@
+import struct
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from prom_decode import make_series
+from prom_lite import PromLiteError, Selector, SeriesStore, parse as parse_expression, plan_fetch
+from prom_range import parse_duration
+
+# snappy (python-snappy 설치 시 사용, 미설치 시 순수 파이썬 구현)
+try:
+    import snappy
+
+    def snappy_compress(data: bytes) -> bytes:
+        return snappy.compress(data)
+
+    def snappy_decompress(data: bytes) -> bytes:
+        return snappy.uncompress(data)
+except ImportError:
+    def snappy_compress(data: bytes) -> bytes:
+        return _snappy_compress_literal(data)
+
+    def snappy_decompress(data: bytes) -> bytes:
+        return _snappy_decompress(data)
+
+
+class RemoteReadError(Exception):
+    pass
+
+
+# LabelMatcher.Type (prompb)
+MATCH_TYPES = {'=': 0, '!=': 1, '=~': 2, '!~': 3}
+
+
+# 원격 조회(/api/v1/read) 기반 수집기 - 장기간 보고서에서 지원되는 쿼리를 원시 샘플로 로컬 계산
+class RemoteReadCollector:
+    def __init__(self, report_instance, remote_config: Dict):
+        self.report = report_instance
+        self.logger = report_instance.logger
+        self.min_range = parse_duration(remote_config.get('min_range', '7d'))
+        self.lookback = parse_duration(remote_config.get('lookback', '5m'))
+        self.url = remote_config.get('url')
+
+    def applies(self, start_time: datetime, end_time: datetime) -> bool:
+        return (end_time - start_time).total_seconds() >= self.min_range
+
+    # 지원되는 쿼리(PromQL-lite)는 원격 조회 후 로컬 계산, 나머지는 그대로 반환 (query_range 로 조회)
+    # - 모든 쿼리의 셀렉터를 모아 같은 원시 시리즈는 한 번만 조회 (prom_lite.plan_fetch)
+    async def collect(self, queries: Dict[str, str], start_time: datetime, end_time: datetime,
+                      step: Optional[int] = None) -> Tuple[Dict[str, List[Dict]], Dict[str, str]]:
+        expressions = {name: parse_expression(query) for name, query in queries.items()}
+        local = {name: expr for name, expr in expressions.items() if expr is not None}
+        remaining = {name: query for name, query in queries.items() if expressions[name] is None}
+        if not local:
+            return {}, queries
+
+        start, end = start_time.timestamp(), end_time.timestamp()
+        step = step or self.report.resolve_step(start, end)
+        eval_ts = np.arange(start - (start % step), end + 1e-9, step, dtype=np.float64)
+
+        requirements = [
+            (selector, max(range_seconds or 0, self.lookback))
+            for expr in local.values() for selector, range_seconds in expr.selectors()
+        ]
+        fetches = plan_fetch(requirements)
+
+        try:
+            raw = await self.read([(selector, eval_ts[0] - window, end) for selector, window in fetches])
+        except Exception as e:
+            self.logger.warning(f"Remote read failed, falling back to query_range: {str(e)}")
+            return {}, queries
+
+        store = SeriesStore([series for series_list in raw for series in series_list])
+        results = {}
+        for name, expr in local.items():
+            try:
+                results[name] = expr.evaluate(store, eval_ts, self.lookback)
+            except PromLiteError as e:
+                self.logger.warning(f"Local evaluation failed for {name}, using query_range: {str(e)}")
+                remaining[name] = queries[name]
+        sample_count = sum(series['values'].size for series_list in raw for series in series_list)
+        self.logger.info(
+            f"Remote read: {len(results)} metrics from {len(fetches)} selectors "
+            f"({len(requirements)} in queries, {sample_count} raw samples)"
+        )
+        return results, remaining
+
+    # ReadRequest 전송 - 셀렉터별 원시 시리즈 목록 반환
+    async def read(self, queries: List[Tuple[Selector, float, float]]) -> List[List[Dict]]:
+        prom_config = self.report.config.get('prometheus', {})
+        url = self.url or f"{prom_config['url']}/api/v1/read"
+        body = snappy_compress(encode_read_request(queries))
+        headers = {
+            'Content-Encoding': 'snappy',
+            'Content-Type': 'application/x-protobuf',
+            'Accept-Encoding': 'snappy',
+            'X-Prometheus-Remote-Read-Version': '0.1.0'
+        }
+
+        session = await self.report.get_session()
+        async with session.post(url, data=body, headers=headers) as response:
+            if response.status != 200:
+                raise RemoteReadError(f"Remote read failed ({response.status}): {await response.text()}")
+            payload = await response.read()
+
+        return decode_read_response(snappy_decompress(payload))
+
+
+########## prompb 인코딩/디코딩 (remote.proto, types.proto 의 필요한 부분만) ##########
+
+def encode_read_request(queries: List[Tuple[Selector, float, float]]) -> bytes:
+    request = bytearray()
+    for selector, start, end in queries:
+        query = bytearray()
+        query += _field_varint(1, int(start * 1000))
+        query += _field_varint(2, int(end * 1000))
+        for name, op, value in selector.matchers:
+            matcher = _field_varint(1, MATCH_TYPES[op]) + _field_bytes(2, name.encode()) + _field_bytes(3, value.encode())
+            query += _field_bytes(3, matcher)
+        request += _field_bytes(1, bytes(query))
+    request += _field_varint(2, 0)  # accepted_response_types: SAMPLES
+    return bytes(request)
+
+
+def encode_read_response(results: List[List[Dict]]) -> bytes:
+    response = bytearray()
+    for series_list in results:
+        query_result = bytearray()
+        for series in series_list:
+            timeseries = bytearray()
+            for name, value in series['metric'].items():
+                timeseries += _field_bytes(1, _field_bytes(1, name.encode()) + _field_bytes(2, str(value).encode()))
+            for ts, value in zip(series['timestamps'], series['values']):
+                sample = (b'\x09' + struct.pack('<d', value) if value != 0 else b'') + _field_varint(2, int(round(ts * 1000)))
+                timeseries += _field_bytes(2, sample)
+            query_result += _field_bytes(1, bytes(timeseries))
+        response += _field_bytes(1, bytes(query_result))
+    return bytes(response)
+
+
+def decode_read_response(data: bytes) -> List[List[Dict]]:
+    results = []
+    for number, _, value in _iter_fields(data, 0, len(data)):
+        if number != 1:
+            continue
+        series_list = []
+        for ts_number, _, ts_value in _iter_fields(data, *value):
+            if ts_number == 1:
+                series_list.append(_decode_timeseries(data, *ts_value))
+        results.append(series_list)
+    return results
+
+
+def _decode_timeseries(data: bytes, start: int, end: int) -> Dict:
+    labels = {}
+    samples_start = None
+    for number, _, value in _iter_fields(data, start, end):
+        if number == 1:
+            label = {n: data[s:e].decode('utf-8') for n, _, (s, e) in _iter_fields(data, *value)}
+            labels[label.get(1, '')] = label.get(2, '')
+        elif number == 2 and samples_start is None:
+            samples_start = value[0] - 2  # 태그 + 길이 바이트
+            break
+
+    timestamps, values = np.empty(0), np.empty(0)
+    if samples_start is not None:
+        timestamps, values = _decode_samples(data, samples_start, end)
+    return make_series(labels, timestamps, values)
+
+
+# 샘플 디코딩 - 모든 샘플이 같은 길이(값 + 같은 폭의 타임스탬프 varint)이면 numpy 로 일괄 처리, 아니면 필드 단위 처리
+# - 샘플 구조: 0x12 <길이> 0x09 <float64 8바이트> 0x10 <타임스탬프 varint (길이 - 10 바이트)>
+# - 현재 시각의 밀리초 타임스탬프(~1.7e12)는 6바이트 varint 이므로 보통 샘플당 18바이트
+def _decode_samples(data: bytes, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    length = end - start
+    if length < 2:
+        return _decode_samples_slow(data, start, end)
+    sample_size = data[start + 1] + 2
+    width = sample_size - 12
+    if 1 <= width <= 10 and length % sample_size == 0:
+        raw = np.frombuffer(data, dtype=np.uint8, count=length, offset=start).reshape(-1, sample_size)
+        if ((raw[:, 0] == 0x12).all() and (raw[:, 1] == sample_size - 2).all()
+                and (raw[:, 2] == 0x09).all() and (raw[:, 11] == 0x10).all()):
+            varint = raw[:, 12:].astype(np.uint64)
+            if (varint[:, :-1] & 0x80).all() and not (varint[:, -1] & 0x80).any():
+                values = raw[:, 3:11].copy().view('<f8').ravel()
+                shifts = np.arange(width, dtype=np.uint64) * np.uint64(7)
+                millis = ((varint & np.uint64(0x7F)) << shifts).sum(axis=1)
+                return millis.astype(np.float64) / 1000.0, values.astype(np.float64)
+    return _decode_samples_slow(data, start, end)
+
+
+def _decode_samples_slow(data: bytes, start: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+    timestamps, values = [], []
+    for number, _, (s, e) in _iter_fields(data, start, end):
+        if number != 2:
+            continue
+        value, ts = 0.0, 0
+        for field_number, wire, field_value in _iter_fields(data, s, e):
+            if field_number == 1 and wire == 1:
+                value = field_value
+            elif field_number == 2 and wire == 0:
+                ts = field_value
+        timestamps.append(ts / 1000.0)
+        values.append(value)
+    return np.array(timestamps, dtype=np.float64), np.array(values, dtype=np.float64)
+
+
+def _iter_fields(data: bytes, pos: int, end: int):
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        number, wire = key >> 3, key & 0x07
+        if wire == 0:
+            value, pos = _read_varint(data, pos)
+            yield number, wire, value
+        elif wire == 1:
+            yield number, wire, struct.unpack_from('<d', data, pos)[0]
+            pos += 8
+        elif wire == 2:
+            size, pos = _read_varint(data, pos)
+            yield number, wire, (pos, pos + size)
+            pos += size
+        elif wire == 5:
+            yield number, wire, struct.unpack_from('<f', data, pos)[0]
+            pos += 4
+        else:
+            raise RemoteReadError(f"Unsupported protobuf wire type: {wire}")
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _varint(value: int) -> bytes:
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_varint(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def _field_bytes(number: int, payload: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+########## snappy 블록 포맷 (python-snappy 미설치 시) ##########
+
+def _snappy_decompress(data: bytes) -> bytes:
+    length, pos = _read_varint(data, 0)
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        kind = tag & 0x03
+        if kind == 0:  # literal
+            size = tag >> 2
+            if size >= 60:
+                extra = size - 59
+                size = int.from_bytes(data[pos:pos + extra], 'little')
+                pos += extra
+            size += 1
+            out += data[pos:pos + size]
+            pos += size
+            continue
+        if kind == 1:
+            size = ((tag >> 2) & 0x07) + 4
+            offset = ((tag >> 5) << 8) | data[pos]
+            pos += 1
+        elif kind == 2:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 2], 'little')
+            pos += 2
+        else:
+            size = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos:pos + 4], 'little')
+            pos += 4
+        if offset == 0 or offset > len(out):
+            raise RemoteReadError("Invalid snappy copy offset")
+        start = len(out) - offset
+        if offset >= size:
+            out += out[start:start + size]
+        else:
+            for i in range(size):
+                out.append(out[start + i])
+    if len(out) != length:
+        raise RemoteReadError("Snappy length mismatch")
+    return bytes(out)
+
+
+# 리터럴만 사용하는 유효한 snappy 블록 (요청 본문은 작으므로 압축률보다 의존성 제거 우선)
+def _snappy_compress_literal(data: bytes) -> bytes:
+    out = bytearray(_varint(len(data)))
+    for pos in range(0, len(data), 65536):
+        chunk = data[pos:pos + 65536]
+        size = len(chunk) - 1
+        if size < 60:
+            out.append(size << 2)
+        elif size < 256:
+            out += bytes([60 << 2, size])
+        else:
+            out += bytes([61 << 2]) + size.to_bytes(2, 'little')
+        out += chunk
+    return bytes(out)
+
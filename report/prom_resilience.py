@@ -0,0 +1,149 @@
+import time
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+
+T = TypeVar('T')
+
+# 보고서에 표시할 수집 불가 문구
+UNAVAILABLE_TEXT = '수집 불가'
+
+
+# 서킷 브레이커가 열려 있어 요청을 보내지 않음
+class CircuitOpenError(Exception):
+    pass
+
+
+# 조회 실패로 값을 알 수 없는 메트릭 결과 (빈 결과와 구분하기 위한 빈 리스트)
+class UnavailableResult(list):
+    def __init__(self, reason: str = ''):
+        super().__init__()
+        self.reason = reason
+
+
+# 재시도/서킷 브레이커 대상 오류 (타임아웃, 연결 오류, 5xx/429) - 잘못된 쿼리(4xx)는 제외
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)):
+        return True
+    status = getattr(error, 'status', None)
+    return status is not None and (status >= 500 or status == 429)
+
+
+# 연속 실패 시 일정 시간 요청을 차단하고, 이후 한 건만 통과시켜 복구 여부 확인 (closed -> open -> half_open)
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def before_call(self):
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Prometheus circuit open ({self.failures} consecutive failures)")
+            self.state = 'half_open'
+        if self.state == 'half_open':
+            if self._probing:
+                raise CircuitOpenError("Prometheus circuit half-open (probe in progress)")
+            self._probing = True
+
+    # 결과 없이 취소된 호출 (half_open 확인 요청 반납)
+    def release(self):
+        self._probing = False
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probing = False
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+
+# Prometheus 조회 보호 계층 - 서킷 브레이커, 지터 지수 백오프 재시도, 헤지 요청
+class ResilientCaller:
+    def __init__(self, resilience_config: Dict, logger: logging.Logger = None):
+        self.retries = max(0, int(resilience_config.get('retries', 2)))
+        self.backoff_base = float(resilience_config.get('backoff_base', 0.5))
+        self.backoff_max = float(resilience_config.get('backoff_max', 8.0))
+        self.hedge_delay = float(resilience_config.get('hedge_delay', 0) or 0)
+        self.breaker = CircuitBreaker(
+            failure_threshold=resilience_config.get('failure_threshold', 5),
+            reset_timeout=resilience_config.get('reset_timeout', 30)
+        )
+        self.logger = logger or logging.getLogger(__name__)
+        self.retried = 0
+        self.hedged = 0
+
+    # 조회 요청 실행 (request 는 호출할 때마다 새 요청 코루틴을 생성해야 함)
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await self._attempt(request)
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # 쿼리 자체의 오류는 Prometheus 상태와 무관
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+                # full jitter: 0 ~ min(max, base * 2^attempt)
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                attempt += 1
+                self.retried += 1
+                self.logger.warning(f"Prometheus request failed ({type(e).__name__}: {str(e)}), retry {attempt}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return result
+
+    # hedge_delay 안에 응답이 없으면 같은 요청을 하나 더 보내고 먼저 성공한 응답 사용
+    async def _attempt(self, request: Callable[[], Awaitable[T]]) -> T:
+        if self.hedge_delay <= 0:
+            return await request()
+
+        primary = asyncio.ensure_future(request())
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return primary.result()
+
+        self.hedged += 1
+        pending = {primary, asyncio.ensure_future(request())}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'circuit': self.breaker.state,
+            'retries': self.retried,
+            'hedged': self.hedged
+        }
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, Iterable, Optional
+
+import yaml
+
+from prom_fleet import add_instance_grouping
+
+# 기록 규칙 시리즈 이름 접두사 (promblue:<메트릭명>)
+RULE_PREFIX = 'promblue'
+
+# 대상 서버 필터 (instance="{ip}:9100") 와 그 외 {ip} 를 포함한 matcher
+_INSTANCE_FILTER = re.compile(r'instance\s*=\s*"\{ip\}(?P<suffix>[^"]*)"')
+_IP_MATCHER = re.compile(r'\s*[a-zA-Z_]\w*\s*(?:=~|!~|!=|=)\s*"[^"]*\{ip\}[^"]*"\s*,?')
+
+
+def record_name(metric_name: str) -> str:
+    return f"{RULE_PREFIX}:{metric_name}"
+
+
+# 단일 대상 PromQL 템플릿 -> 전체 서버 대상 기록 규칙 표현식 ({ip} 필터 제거, by(instance) 추가)
+def compile_expression(template: str) -> Optional[str]:
+    if not _INSTANCE_FILTER.search(template):
+        return None
+    expr = _IP_MATCHER.sub('', template)
+    expr = re.sub(r',\s*\}', '}', expr)
+    expr = re.sub(r'\{\s+', '{', expr)
+    expr = re.sub(r'\{\s*\}', '', expr)
+    expr = expr.replace('{{', '{').replace('}}', '}')
+    expr = add_instance_grouping(' '.join(expr.split()))
+    return ' '.join(expr.split())
+
+
+# prometheus.promql 섹션 -> Prometheus 기록 규칙 파일 구조
+def build_rules(promql: Dict[str, str], interval: str = '1m', group_name: str = RULE_PREFIX) -> Dict:
+    rules = []
+    for metric_name, template in promql.items():
+        expr = compile_expression(template)
+        if expr is None:
+            continue
+        rules.append({'record': record_name(metric_name), 'expr': expr})
+    return {'groups': [{'name': group_name, 'interval': interval, 'rules': rules}]}
+
+
+def dump_rules(rules: Dict) -> str:
+    return yaml.safe_dump(rules, allow_unicode=True, sort_keys=False, width=1000)
+
+
+# 기록된 시리즈가 있는 메트릭은 promblue:<메트릭명>{instance="{ip}:9100"} 조회로 대체
+def rule_queries(promql: Dict[str, str], recorded: Iterable[str]) -> Dict[str, str]:
+    recorded = set(recorded)
+    queries = {}
+    for metric_name, template in promql.items():
+        match = _INSTANCE_FILTER.search(template)
+        if match and record_name(metric_name) in recorded:
+            queries[metric_name] = f'{record_name(metric_name)}{{instance="{{ip}}{match.group("suffix")}"}}'
+        else:
+            queries[metric_name] = template
+    return queries
@@ -3,6 +3,7 @@ import yaml
 import asyncio
 import aiohttp
 import argparse
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Union
 import logging
@@ -13,8 +14,24 @@ import redis
 from rq import Queue
 from pathlib import Path
 
+from cmdb import CmdbLookup
+from metric_collector import MetricCollector
+from prom_batch import PromQLBatcher
+from prom_cache import QueryCache
+from prom_decode import decode_response
+from prom_range import choose_step, parse_duration, split_windows, stitch, PROMETHEUS_MAX_POINTS
+from prom_remote_read import RemoteReadCollector
+from prom_resilience import CircuitOpenError, ResilientCaller, UnavailableResult
+from prom_rules import RULE_PREFIX, build_rules, dump_rules, rule_queries
+
 __version__ = '0.5.2 (2024.10.29)'
 
+# Prometheus 쿼리 실패 (HTTP 오류, status != success)
+class PrometheusQueryError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
 # yaml 처리 클래스
 class YAMLConfig:
     def __init__(self, yaml_path: str):
@@ -89,6 +106,22 @@ class PromBlueReport:
         self._setup_paths()
         self.logger = self._setup_logging()
         self.queue = self._setup_queue()
+        self.cache = self._setup_cache()
+        self.remote_read = self._setup_remote_read()
+        self.resilience = ResilientCaller(self.config.get('prometheus', {}).get('resilience', {}) or {}, self.logger)
+        self.use_recording_rules = bool((self.config.get('prometheus', {}).get('recording_rules', {}) or {}).get('enabled', False))
+        self._recorded_metrics: Dict[float, set] = {}
+        self.query_latency: Dict[str, float] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        # 템플릿이 공유하는 CMDB 조회/메트릭 수집 (실행 단위로 결과 보관)
+        self.cmdb = CmdbLookup(self)
+        self.collector = MetricCollector(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
     
     # 경로 설정
     def _setup_paths(self):
@@ -176,40 +209,288 @@ class PromBlueReport:
             self.logger.error(f"Redis queue setup failed: {str(e)}")
             return None
 
-    # Prometheus 쿼리 실행
-    async def query_prometheus(self, query: str, start_time: datetime, end_time: datetime) -> List[Dict]:
-        prom_config = self.config.get('prometheus', {})
-        
+    # query_range 결과 디스크 캐시 설정
+    def _setup_cache(self) -> Optional[QueryCache]:
+        cache_config = self.config.get('prometheus', {}).get('cache', {}) or {}
+        if not cache_config.get('enabled', False):
+            return None
+
         try:
-            params = {
-                'query': query,
-                'start': str(int(start_time.timestamp())),
-                'end': str(int(end_time.timestamp())),
-                'step': prom_config.get('step_interval', '1h')
-            }
-
-            self.logger.debug(f"Querying Prometheus - Query: {query}")
-            self.logger.debug(f"Parameters: {params}")
-            
+            cache_dir = cache_config.get('dir', '../cache')
+            if not os.path.isabs(cache_dir):
+                cache_dir = self.project_root / cache_dir.lstrip('./')
+            self.logger_debug(f"Cache directory: {cache_dir}")
+            return QueryCache(
+                cache_dir,
+                max_size_mb=cache_config.get('max_size_mb', 256),
+                overlap_steps=cache_config.get('overlap_steps', 2),
+                logger=self.logger
+            )
+        except Exception as e:
+            self.logger.error(f"Query cache setup failed: {str(e)}")
+            return None
+
+    # 장기간 보고서용 원격 조회(/api/v1/read) 설정
+    def _setup_remote_read(self) -> Optional[RemoteReadCollector]:
+        remote_config = self.config.get('prometheus', {}).get('remote_read', {}) or {}
+        if not remote_config.get('enabled', False):
+            return None
+        return RemoteReadCollector(self, remote_config)
+
+    # Prometheus HTTP 세션 (keep-alive 커넥션 풀, 최초 사용 시 생성하여 보고서 실행 동안 재사용)
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            prom_config = self.config.get('prometheus', {})
+            pool_config = prom_config.get('connection_pool', {}) or {}
+
+            connector = aiohttp.TCPConnector(
+                limit=int(pool_config.get('limit', 32)),
+                limit_per_host=int(pool_config.get('limit_per_host', 8)),
+                use_dns_cache=True,
+                ttl_dns_cache=int(pool_config.get('dns_cache_ttl', 300)),
+                keepalive_timeout=float(pool_config.get('keepalive_timeout', 30))
+            )
             timeout = aiohttp.ClientTimeout(total=float(prom_config.get('query_timeout', 30)))
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = f"{prom_config['url']}/api/v1/query_range"
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Query failed: {error_text}")
-                        return []
-                    
-                    data = await response.json()
-                    if data['status'] != 'success':
-                        self.logger.error(f"Query error: {data.get('error', 'Unknown error')}")
-                        return []
-                    
-                    return data['data']['result']
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self.logger.debug(f"Prometheus session created: {pool_config}")
+        return self._session
+
+    # 세션 및 커넥션 풀 정리
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            # 커넥터의 SSL/소켓 정리가 끝날 때까지 한 틱 양보
+            await asyncio.sleep(0)
+        self._session = None
 
+    # 템플릿용 PromQL (기록 규칙 사용 시 promblue:* 시리즈가 기록된 메트릭은 해당 시리즈 조회로 대체)
+    # - 조회 구간 시작 시각에 기록된 시리즈만 대체 (규칙 배포 이전 구간은 원본 쿼리로 조회하여 일부 구간만 집계되지 않도록)
+    # - 확인 결과는 구간 시작 시각별로 보관 (현재/비교 구간을 따로 판단)
+    async def get_promql(self, start_time: datetime) -> Dict[str, str]:
+        promql = self.config.get('prometheus', {}).get('promql', {})
+        if not self.use_recording_rules:
+            return promql
+        start = start_time.timestamp()
+        if start not in self._recorded_metrics:
+            self._recorded_metrics[start] = await self._get_recorded_metrics(start)
+        queries = rule_queries(promql, self._recorded_metrics[start])
+        replaced = sum(1 for name in promql if queries[name] != promql[name])
+        self.logger.info(
+            f"Recording rules: {replaced}/{len(promql)} metrics use {RULE_PREFIX}:* series "
+            f"from {start_time.strftime('%Y-%m-%d %H:%M')}"
+        )
+        return queries
+
+    # at 시각에 값이 있는 promblue:* 시리즈 이름 (조회 실패 시 원본 쿼리 사용)
+    async def _get_recorded_metrics(self, at: float) -> set:
+        url = f"{self.config.get('prometheus', {})['url']}/api/v1/query"
+        params = {'query': f'count by(__name__)({{__name__=~"{RULE_PREFIX}:.+"}})', 'time': str(int(at))}
+
+        async def request() -> set:
+            session = await self.get_session()
+            async with session.get(url, params=params) as response:
+                if response.status != 200:
+                    raise PrometheusQueryError(f"Recording rule query failed ({response.status}): {await response.text()}", response.status)
+                data = await response.json()
+            if data.get('status') != 'success':
+                raise PrometheusQueryError(f"Query error: {data.get('error', 'Unknown error')}")
+            return {series.get('metric', {}).get('__name__') for series in data['data'].get('result') or []} - {None}
+
+        try:
+            return await self.resilience.call(request)
+        except Exception as e:
+            self.logger.warning(f"Failed to check recording rules, using raw queries: {str(e)}")
+            return set()
+
+    # prometheus.promql 섹션으로 Prometheus 기록 규칙 파일 생성
+    def generate_recording_rules(self) -> str:
+        prom_config = self.config.get('prometheus', {})
+        rules_config = prom_config.get('recording_rules', {}) or {}
+        rules = build_rules(prom_config.get('promql', {}), interval=rules_config.get('interval', '1m'))
+        return dump_rules(rules)
+
+    # Prometheus 쿼리 실행 (실패 시 로그를 남기고 수집 불가 결과 반환 - 데이터 없음과 구분)
+    async def query_prometheus(self, query: str, start_time: datetime, end_time: datetime, step: Optional[int] = None) -> List[Dict]:
+        try:
+            return await self._query_range(query, start_time, end_time, step)
+        except CircuitOpenError as e:
+            self.logger.warning(f"Prometheus query skipped: {str(e)}")
+            return UnavailableResult(str(e))
         except Exception as e:
-            self.logger.error(f"Prometheus query failed: {str(e)}")
-            return []
+            self.logger.error(f"Prometheus query failed: {type(e).__name__}: {str(e)}")
+            return UnavailableResult(str(e) or type(e).__name__)
+
+    # 조회 step 결정 (adaptive_step 사용 시 기간에 맞춰 시리즈당 포인트 수를 points_per_series 이하로 유지)
+    def resolve_step(self, start: float, end: float) -> int:
+        prom_config = self.config.get('prometheus', {})
+        if not prom_config.get('adaptive_step', False):
+            return parse_duration(prom_config.get('step_interval', '1h'))
+        return choose_step(
+            start, end,
+            points_per_series=int(prom_config.get('points_per_series', 720)),
+            min_step=parse_duration(prom_config.get('min_step', '1m'))
+        )
+
+    # query_range 조회 (캐시 사용 시 캐시에 없는 구간만 조회, 실패 시 PrometheusQueryError)
+    # - step: 다른 구간과 같은 격자로 조회할 때 지정 (없으면 기간으로 결정)
+    async def _query_range(self, query: str, start_time: datetime, end_time: datetime, step: Optional[int] = None) -> List[Dict]:
+        start, end = start_time.timestamp(), end_time.timestamp()
+        step = step or self.resolve_step(start, end)
+        # 시작 시각을 step 경계에 맞춰야 하위 구간/캐시 격자가 일치
+        start -= start % step
+
+        async def fetch(fetch_start: float, fetch_end: float) -> List[Dict]:
+            return await self._fetch_range_chunked(query, fetch_start, fetch_end, step)
+
+        if self.cache is not None:
+            return await self.cache.fetch(query, step, start, end, fetch)
+        return await fetch(start, end)
+
+    # 포인트 제한을 넘는 기간은 step 경계 하위 구간으로 나눠 병렬 조회 후 이어 붙임
+    async def _fetch_range_chunked(self, query: str, start: float, end: float, step: int) -> List[Dict]:
+        prom_config = self.config.get('prometheus', {})
+        max_points = min(int(prom_config.get('max_points_per_request', PROMETHEUS_MAX_POINTS)), PROMETHEUS_MAX_POINTS)
+        windows = split_windows(start, end, step, max_points)
+        if len(windows) == 1:
+            return await self.resilience.call(lambda: self._request_query_range(query, start, end, f"{step}s"))
+
+        self.logger.debug(f"Splitting query into {len(windows)} windows (step: {step}s)")
+        semaphore = asyncio.Semaphore(max(1, int(prom_config.get('chunk_concurrency', 4))))
+
+        async def run(window_start: float, window_end: float) -> List[Dict]:
+            async with semaphore:
+                return await self.resilience.call(
+                    lambda: self._request_query_range(query, window_start, window_end, f"{step}s")
+                )
+
+        results = await asyncio.gather(*(run(*window) for window in windows))
+        return stitch(results)
+
+    # query_range API 호출
+    async def _request_query_range(self, query: str, start: float, end: float, step: str) -> List[Dict]:
+        prom_config = self.config.get('prometheus', {})
+
+        params = {
+            'query': query,
+            'start': str(int(start)),
+            'end': str(int(end)),
+            'step': step
+        }
+
+        self.logger.debug(f"Querying Prometheus - Query: {query}")
+        self.logger.debug(f"Parameters: {params}")
+
+        session = await self.get_session()
+        url = f"{prom_config['url']}/api/v1/query_range"
+        # 긴 쿼리(배치/플릿)는 URL 길이 제한을 피하기 위해 POST 사용
+        if len(query) > int(prom_config.get('post_query_length', 1500)):
+            request = session.post(url, data=params)
+        else:
+            request = session.get(url, params=params)
+
+        async with request as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise PrometheusQueryError(f"Query failed ({response.status}): {error_text}", response.status)
+
+            body = await response.read()
+
+        # 큰 응답은 이벤트 루프를 막지 않도록 워커 스레드에서 디코딩
+        if len(body) > int(prom_config.get('decode_thread_bytes', 1048576)):
+            data = await asyncio.get_running_loop().run_in_executor(None, decode_response, body)
+        else:
+            data = decode_response(body)
+
+        if data.get('status') != 'success':
+            raise PrometheusQueryError(f"Query error: {data.get('error', 'Unknown error')}")
+
+        return data['data']['result']
+
+    # 다중 PromQL 동시 실행 (max_concurrency 로 동시성 제한, 메트릭별 오류 격리)
+    async def query_prometheus_many(self, queries: Dict[str, str], start_time: datetime, end_time: datetime,
+                                    step: Optional[int] = None) -> Dict[str, List[Dict]]:
+        prom_config = self.config.get('prometheus', {})
+        if prom_config.get('concurrent_query', True):
+            max_concurrency = max(1, int(prom_config.get('max_concurrency', 8)))
+        else:
+            max_concurrency = 1
+        semaphore = asyncio.Semaphore(max_concurrency)
+        latencies: Dict[str, float] = {}
+        names = list(queries)
+
+        # 장기간 조회는 지원되는 쿼리를 원시 샘플로 가져와 로컬 계산 (나머지만 query_range)
+        remote_results: Dict[str, List[Dict]] = {}
+        if self.remote_read is not None and self.remote_read.applies(start_time, end_time):
+            remote_results, queries = await self.remote_read.collect(queries, start_time, end_time, step)
+
+        # batch_query 설정 시 병합 가능한 쿼리를 묶어서 호출 수 절감
+        batcher = PromQLBatcher(prom_config) if prom_config.get('batch_query', False) else None
+        if batcher and len(queries) > 1:
+            batches = batcher.plan(queries)
+        else:
+            batches = [{name: query} for name, query in queries.items()]
+
+        async def run(name: str, query: str):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    return {name: await self.query_prometheus(query, start_time, end_time, step)}
+                except Exception as e:
+                    self.logger.error(f"Failed to query metric {name}: {str(e)}")
+                    return {name: UnavailableResult(str(e))}
+                finally:
+                    latencies[name] = time.perf_counter() - started
+
+        async def run_batch(batch: Dict[str, str]):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await self._query_range(batcher.merge(batch), start_time, end_time, step)
+                    latency = time.perf_counter() - started
+                    latencies.update({name: latency for name in batch})
+                    return batcher.split(batch.keys(), result)
+                except CircuitOpenError as e:
+                    # Prometheus 장애 중에는 개별 쿼리로 다시 시도하지 않음
+                    self.logger.warning(f"Batch query skipped {list(batch)}: {str(e)}")
+                    return {name: UnavailableResult(str(e)) for name in batch}
+                except Exception as e:
+                    self.logger.warning(f"Batch query failed, falling back to individual queries {list(batch)}: {str(e)}")
+
+            # 배치 실패 시 개별 쿼리로 폴백 (세마포어 반납 후 실행)
+            fallback = await asyncio.gather(*(run(name, query) for name, query in batch.items()))
+            return {name: result for item in fallback for name, result in item.items()}
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            run_batch(batch) if len(batch) > 1 else run(*next(iter(batch.items())))
+            for batch in batches
+        ))
+        self._log_query_latency(latencies, time.perf_counter() - started, max_concurrency, len(batches))
+        if self.cache is not None:
+            self.logger.info(f"Query cache: {self.cache.stats()}")
+        resilience_stats = self.resilience.stats()
+        if resilience_stats['retries'] or resilience_stats['hedged'] or resilience_stats['circuit'] != 'closed':
+            self.logger.warning(f"Prometheus resilience: {resilience_stats}")
+
+        merged = {name: result for item in results for name, result in item.items()}
+        merged.update(remote_results)
+        return {name: merged.get(name, []) for name in names}
+
+    # 쿼리별 지연시간 기록 (느린 PromQL 식별용)
+    def _log_query_latency(self, latencies: Dict[str, float], elapsed: float, max_concurrency: int, batches: int):
+        self.query_latency.update(latencies)
+        slow_threshold = float(self.config.get('prometheus', {}).get('slow_query_threshold', 5))
+
+        for name, latency in sorted(latencies.items(), key=lambda item: item[1], reverse=True):
+            if latency >= slow_threshold:
+                self.logger.warning(f"Slow PromQL - {name}: {latency:.3f}s")
+            else:
+                self.logger.debug(f"PromQL latency - {name}: {latency:.3f}s")
+
+        self.logger.info(
+            f"Collected {len(latencies)} metrics in {elapsed:.3f}s using {batches} request batches "
+            f"(concurrency: {max_concurrency}, sum of latencies: {sum(latencies.values()):.3f}s)"
+        )
 
     # 보고서 생성
     async def generate_report(
@@ -253,6 +534,15 @@ class PromBlueReport:
         elif template == 'simple':
             from template_simple import SimpleTemplate
             return SimpleTemplate
+        elif template == 'fleet':
+            from template_fleet import FleetTemplate
+            return FleetTemplate
+        elif template == 'forecast':
+            from template_forecast import ForecastTemplate
+            return ForecastTemplate
+        elif template == 'correlation':
+            from template_correlation import CorrelationTemplate
+            return CorrelationTemplate
         elif template == 'complete':
             from template_complete import CompleteTemplate
             return CompleteTemplate
@@ -265,34 +555,89 @@ class PromBlueReport:
 
 def main():
     parser = argparse.ArgumentParser(description='Generate server inspection report')
-    parser.add_argument('--target', required=True, help='IP address or hostname')
-    parser.add_argument('--time', default='today', help='Time range (e.g., 24h, 7d, today)')
-    parser.add_argument('--template', default='default', help='Report template (default, simple, complete)')
+    parser.add_argument('--target', help='IP address or hostname (fleet: ip1,ip2,... or service:<name>)')
+    parser.add_argument('--time', help='Time range (e.g., 24h, 7d, today; --forecast: forecast.lookback)')
+    parser.add_argument('--template', default='default',
+                        help='Report template (default, simple, fleet, forecast, correlation, complete); comma-separated templates share one fetch')
     parser.add_argument('--output', help='Output directory')
     parser.add_argument('--config', default='promblueReport.yml', help='Config file path')
     parser.add_argument('--request-id', help='Request ID for the report')
+    parser.add_argument('--generate-rules', nargs='?', const='-', metavar='FILE',
+                        help='Write Prometheus recording rules for prometheus.promql (stdout if FILE omitted)')
+    parser.add_argument('--build-snapshot', action='store_true',
+                        help='Prebuild the binary snapshot of the latest CMDB CSV (files.cmdb_snapshot)')
+    parser.add_argument('--use-rules', action='store_true', help='Query recorded promblue:* series when they cover the report window')
+    parser.add_argument('--forecast', action='store_true',
+                        help='Disk/memory full ETA for the target servers (trend over forecast.lookback unless --time is given)')
+    parser.add_argument('--baseline', nargs='?', const='', metavar='OFFSET',
+                        help='Compare with the same window shifted back by OFFSET (e.g. 1d, 7d; default baseline.offset)')
+    parser.add_argument('--correlate', action='store_true',
+                        help='Most correlated server pairs (single IP: vs. correlation.scope peers, ip list/service: all pairs)')
     
     args = parser.parse_args()
 
+    if args.generate_rules:
+        report_generator = PromBlueReport(args.config)
+        rules = report_generator.generate_recording_rules()
+        if args.generate_rules == '-':
+            print(rules, end='')
+        else:
+            with open(args.generate_rules, 'w', encoding='utf-8') as f:
+                f.write(rules)
+            print(f"Recording rules written: {args.generate_rules}")
+        return rules
+
+    if args.build_snapshot:
+        report_generator = PromBlueReport(args.config)
+        snapshot_file = report_generator.cmdb.build_snapshot()
+        print(f"CMDB snapshot written: {snapshot_file}")
+        return str(snapshot_file)
+
+    if not args.target:
+        parser.error('--target is required')
+
+    if args.forecast:
+        args.template = 'forecast'
+    elif args.correlate:
+        args.template = 'correlation'
+
     async def async_main():
         try:
-            report_generator = PromBlueReport(args.config)
-            result = await report_generator.generate_report(
-                target=args.target,
-                time_range=args.time,
-                template=args.template,
-                output_dir=args.output,
-                request_id=args.request_id
-            )
+            async with PromBlueReport(args.config) as report_generator:
+                if args.use_rules:
+                    report_generator.use_recording_rules = True
+                # 기준 구간 비교 (baseline 섹션 설정을 이번 실행에만 적용)
+                if args.baseline is not None:
+                    baseline_config = report_generator.config.get_config('baseline')
+                    baseline_config['enabled'] = True
+                    if args.baseline:
+                        baseline_config['offset'] = args.baseline
+                    report_generator.config.config_data['baseline'] = baseline_config
+                # 용량 예측은 추세 계산을 위해 기본 조회 기간을 forecast.lookback 으로
+                time_range = args.time
+                if not time_range and args.forecast:
+                    time_range = str((report_generator.config.get('forecast', {}) or {}).get('lookback', '7d'))
+                time_range = time_range or 'today'
+                results = []
+                for template in [name.strip() for name in args.template.split(',') if name.strip()]:
+                    results.append(await report_generator.generate_report(
+                        target=args.target,
+                        time_range=time_range,
+                        template=template,
+                        output_dir=args.output,
+                        request_id=args.request_id
+                    ))
 
-            if isinstance(result, dict):  # Markdown result
-                print(result['report'])
-                if 'analysis' in result:
-                    print("\nAnalysis:")
-                    print(result['analysis'])
-            else:  # Excel file path
-                print(f"Report generated successfully: {result}")
-            
+            for result in results:
+                if isinstance(result, dict):  # Markdown result
+                    print(result['report'])
+                    if 'analysis' in result:
+                        print("\nAnalysis:")
+                        print(result['analysis'])
+                else:  # Excel file path
+                    print(f"Report generated successfully: {result}")
+
+            result = results[0] if len(results) == 1 else results
             return result
 
         except Exception as e:
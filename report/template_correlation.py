@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+from metric_correlation import CorrelatedPair, correlate_fleet, correlation_metrics
+
+# 서버 간 상관관계 템플릿 (메트릭 변화가 비슷한 서버 쌍, 슬랙용 마크다운)
+class CorrelationTemplate:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.config = report_instance.config
+        self.logger = logging.getLogger(__name__)
+
+    # target: 단일 IP (해당 서버와 비교 대상 서버의 쌍), "ip1,ip2,..." 또는 "service:<서비스명>" (전체 쌍)
+    async def create_report(self, target: str, time_range: str, output_dir: str = None, request_id: str = None) -> Dict[str, str]:
+        try:
+            if target.startswith('service:') or ',' in target:
+                servers = self.report.cmdb.servers(target)
+                metrics = await self.report.collector.fleet_metrics(list(servers), time_range, list(correlation_metrics(self.config)))
+                pairs = correlate_fleet(metrics, self.config)
+            else:
+                scope = (self.config.get('correlation', {}) or {}).get('scope', 'service')
+                servers = self.report.cmdb.peers(target, scope)
+                pairs = await self.report.collector.correlations(target, time_range)
+
+            report = "\n\n".join([
+                self._generate_header(target, len(servers), time_range),
+                self._generate_pairs(servers, pairs)
+            ])
+            return {"report": report}
+
+        except Exception as e:
+            self.logger.error(f"Failed to generate correlation report: {str(e)}", exc_info=True)
+            raise
+
+    def _generate_header(self, target: str, count: int, time_range: str) -> str:
+        check_time = datetime.now().strftime('%Y-%m-%d %H:%M')
+        return (
+            f"🔗 *서버 상관관계 보고서*\n"
+            f"점검 시간: {check_time} (기간 {time_range})\n"
+            f"대상: {target} ({count}대)"
+        )
+
+    def _generate_pairs(self, servers: Dict[str, str], pairs: Dict[str, List[CorrelatedPair]]) -> str:
+        sections = []
+        for metric_name, title in correlation_metrics(self.config).items():
+            lines = [f"*{title}*"]
+            metric_pairs = pairs.get(metric_name) or []
+            if metric_pairs:
+                lines.extend(
+                    f"• {servers.get(pair.first, pair.first)} ↔ {servers.get(pair.second, pair.second)}: r={pair.coefficient:.2f}"
+                    for pair in metric_pairs
+                )
+            else:
+                lines.append("• 상관관계가 높은 서버 없음")
+            sections.append("\n".join(lines))
+        return "\n\n".join(sections)
@@ -1,13 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Any, Optional
-import pandas as pd
 from xlsxwriter import Workbook
-import os
 from pathlib import Path
 import logging
-import glob
 import requests
 
+from metric_anomaly import anomaly_items
+from metric_baseline import baseline_label, compare_metrics
+from metric_correlation import correlation_items
+from metric_downsample import downsample
+from metric_forecast import forecast_items
+from metric_matrix import metrics_context
+from metric_series import MetricSeries
+from metric_stats import format_duration
+from prom_resilience import UNAVAILABLE_TEXT
+
 class DefaultTemplate:
     """기본 Excel 템플릿 - A4 세로 한 페이지 보고서"""
     
@@ -19,20 +26,11 @@ class DefaultTemplate:
     async def create_report(self, target: str, time_range: str, output_dir: str = None, request_id: str = None) -> str:
         """A4 세로 한 페이지 보고서 생성"""
         try:
-            # 시간 범위 계산
-            end_time = datetime.now()
-            if time_range.endswith('h'):
-                start_time = end_time - timedelta(hours=int(time_range[:-1]))
-            elif time_range.endswith('d'):
-                start_time = end_time - timedelta(days=int(time_range[:-1]))
-            else:
-                start_time = end_time.replace(hour=0, minute=0, second=0, microsecond=0)
-
             # 서버 정보 조회
-            server_info = self._get_server_info(target)
+            server_info = self.report.cmdb.server_info(target)
             
-            # 메트릭 데이터 조회
-            metrics_data = await self._get_metrics(target, start_time, end_time)
+            # 메트릭 데이터 조회 (같은 실행의 다른 템플릿과 공유)
+            metrics_data = await self.report.collector.metrics(target, time_range)
 
             # 출력 파일명 생성
             files_config = self.config.get('files', {})
@@ -64,6 +62,9 @@ class DefaultTemplate:
             current_row = self._write_header(worksheet, formats, server_info, current_row)
             current_row = self._write_basic_info(worksheet, formats, server_info, current_row)
             current_row = await self._write_metrics(worksheet, formats, metrics_data, current_row)
+            current_row = await self._write_baseline(worksheet, formats, target, time_range, metrics_data, current_row)
+            current_row = await self._write_correlations(worksheet, formats, target, time_range, current_row)
+            current_row = self._write_trend_chart(workbook, worksheet, metrics_data, current_row)
             current_row = await self._write_analysis(worksheet, formats, server_info, metrics_data, current_row)
 
             workbook.close()
@@ -73,97 +74,6 @@ class DefaultTemplate:
             self.logger.error(f"Report generation failed: {str(e)}", exc_info=True)
             raise
 
-    def _get_server_info(self, target: str) -> dict:
-        """서버 정보 조회"""
-        try:
-            # 구성관리조회 CSV 파일 찾기
-            files_config = self.config.get('files', {})
-            csv_prefix = files_config.get('extdata_prefix')
-            pattern = str(self.report.data_dir / f"{csv_prefix}*.csv")
-            matching_files = glob.glob(pattern)
-            
-            if not matching_files:
-                raise FileNotFoundError(f"No CSV files found matching pattern: {pattern}")
-            
-            # 가장 최근 파일 선택
-            latest_file = max(matching_files, key=lambda f: 
-                            int(''.join(filter(str.isdigit, os.path.basename(f))) or '0')
-                            )
-            
-            self.logger.info(f"Using CSV file: {latest_file}")
-            
-            # CSV 파일 읽기
-            df = pd.read_csv(latest_file, encoding='euc-kr')
-            
-            # IP로 서버 검색
-            server_info = df[(df['사설IP'] == target) | (df['공인/NAT IP'] == target)]
-            
-            # 서비스명으로 검색 (IP로 찾지 못한 경우)
-            if server_info.empty and target.startswith('service:'):
-                service_name = target.split(':', 1)[1]
-                server_info = df[df['서비스'] == service_name]
-            
-            if server_info.empty:
-                raise ValueError(f"No server information found for: {target}")
-            
-            return server_info.iloc[0].to_dict()
-        
-        except Exception as e:
-            self.logger.error(f"Failed to get server info: {str(e)}")
-            raise
-
-    async def _get_metrics(self, target: str, start_time: datetime, end_time: datetime) -> Dict:
-        """메트릭 데이터 조회"""
-        try:
-            metrics = {}
-            promql = self.config.get('prometheus', {}).get('promql', {})
-            
-            for metric_name, query in promql.items():
-                try:
-                    # 쿼리에서 IP 치환
-                    formatted_query = query.replace('{ip}', target)
-                    formatted_query = formatted_query.replace('{{', '{').replace('}}', '}')
-                    
-                    # 프로메테우스 쿼리 실행
-                    result = await self.report.query_prometheus(formatted_query, start_time, end_time)
-                    
-                    if result and isinstance(result, list) and len(result) > 0:
-                        if 'values' in result[0]:
-                            values = [float(v[1]) for v in result[0]['values']]
-                            metrics[metric_name] = {
-                                'current': values[-1] if values else 0,
-                                'average': float(pd.Series(values).mean()),
-                                'maximum': float(pd.Series(values).max()),
-                                'minimum': float(pd.Series(values).min()),
-                                'values': values
-                            }
-                            continue
-                    
-                    self.logger.warning(f"No data returned for metric: {metric_name}")
-                    metrics[metric_name] = {
-                        'current': 0,
-                        'average': 0,
-                        'maximum': 0,
-                        'minimum': 0,
-                        'values': []
-                    }
-                
-                except Exception as e:
-                    self.logger.error(f"Failed to get metric {metric_name}: {str(e)}")
-                    metrics[metric_name] = {
-                        'current': 0,
-                        'average': 0,
-                        'maximum': 0,
-                        'minimum': 0,
-                        'values': []
-                    }
-            
-            return metrics
-        
-        except Exception as e:
-            self.logger.error(f"Failed to get metrics: {str(e)}")
-            raise
-
     def _init_page(self, worksheet):
         """페이지 초기화 (페이지 설정, 배경, 로고)"""
         try:
@@ -399,94 +309,211 @@ class DefaultTemplate:
             row += 1
 
             # CPU 섹션
-            cpu_data = metrics.get('cpu_usage', {'current': 0, 'average': 0, 'maximum': 0})
-            gauge = self._create_gauge(cpu_data['current'])
+            cpu_data = metrics.get('cpu_usage', MetricSeries.empty())
             worksheet.merge_range(
                 row, 0, row, 11,
-                f"CPU 사용률: {gauge} ({cpu_data['current']:.1f}%) - "
-                f"현재: {cpu_data['current']:.1f}% / 평균: {cpu_data['average']:.1f}% / "
-                f"최대: {cpu_data['maximum']:.1f}%",
-                self._get_metric_format(formats, cpu_data['current'])
+                self._usage_text('CPU', cpu_data),
+                self._get_metric_format(formats, cpu_data.current)
             )
             row += 1
+            row = self._write_stats(worksheet, formats, cpu_data, row)
 
             # CPU Load
             for load_type in ['cpu_load1', 'cpu_load5', 'cpu_load15']:
                 if load_type in metrics:
                     load = metrics[load_type]
-                    worksheet.write(
-                        row, 1,
-                        f"{load_type}: {load['current']:.2f} / {load['average']:.2f} / {load['maximum']:.2f}",
-                        formats['text']
-                    )
+                    if load.unavailable:
+                        load_text = f"{load_type}: {UNAVAILABLE_TEXT}"
+                    else:
+                        load_text = f"{load_type}: {load.current:.2f} / {load.average:.2f} / {load.maximum:.2f}"
+                    worksheet.write(row, 1, load_text, formats['text'])
                     row += 1
 
             row += 1  # 간격 추가
 
             # Memory 섹션
-            mem_data = metrics.get('memory_usage', {'current': 0, 'average': 0, 'maximum': 0})
-            gauge = self._create_gauge(mem_data['current'])
+            mem_data = metrics.get('memory_usage', MetricSeries.empty())
             
             # Memory Total/Available 계산 (bytes -> GB)
-            mem_total = metrics.get('memory_total', {'current': 0})['current'] / (1024**3)
-            mem_avail = metrics.get('memory_available', {'current': 0})['current'] / (1024**3)
+            mem_total = self._current_text(metrics.get('memory_total', MetricSeries.empty()), 1024**3, 'GB')
+            mem_avail = self._current_text(metrics.get('memory_available', MetricSeries.empty()), 1024**3, 'GB')
             
             worksheet.merge_range(
                 row, 0, row, 11,
-                f"Memory 사용률: {gauge} ({mem_data['current']:.1f}%) - "
-                f"현재: {mem_data['current']:.1f}% / 평균: {mem_data['average']:.1f}% / "
-                f"최대: {mem_data['maximum']:.1f}%",
-                self._get_metric_format(formats, mem_data['current'])
+                self._usage_text('Memory', mem_data),
+                self._get_metric_format(formats, mem_data.current)
             )
             row += 1
+            row = self._write_stats(worksheet, formats, mem_data, row)
 
             worksheet.write(
                 row, 1,
-                f"Total: {mem_total:.1f}GB / Available: {mem_avail:.1f}GB",
+                f"Total: {mem_total} / Available: {mem_avail}",
                 formats['text']
             )
             row += 2  # 간격 추가
 
             # Disk 섹션
-            disk_data = metrics.get('disk_usage', {'current': 0, 'average': 0, 'maximum': 0})
-            gauge = self._create_gauge(disk_data['current'])
+            disk_data = metrics.get('disk_usage', MetricSeries.empty())
             
             # Disk I/O 계산 (bytes/sec -> MB/sec)
-            disk_read = metrics.get('disk_read_bytes', {'current': 0})['current'] / (1024**2)
-            disk_write = metrics.get('disk_write_bytes', {'current': 0})['current'] / (1024**2)
+            disk_read = self._current_text(metrics.get('disk_read_bytes', MetricSeries.empty()), 1024**2, 'MB/s')
+            disk_write = self._current_text(metrics.get('disk_write_bytes', MetricSeries.empty()), 1024**2, 'MB/s')
             
             worksheet.merge_range(
                 row, 0, row, 11,
-                f"Disk 사용률: {gauge} ({disk_data['current']:.1f}%) - "
-                f"현재: {disk_data['current']:.1f}% / 평균: {disk_data['average']:.1f}% / "
-                f"최대: {disk_data['maximum']:.1f}%",
-                self._get_metric_format(formats, disk_data['current'])
+                self._usage_text('Disk', disk_data),
+                self._get_metric_format(formats, disk_data.current)
             )
             row += 1
+            row = self._write_stats(worksheet, formats, disk_data, row)
 
             worksheet.write(
                 row, 1,
-                f"Read: {disk_read:.1f}MB/s / Write: {disk_write:.1f}MB/s",
+                f"Read: {disk_read} / Write: {disk_write}",
                 formats['text']
             )
             row += 2  # 간격 추가
 
             # Network 섹션
-            net_rx = metrics.get('network_receive', {'current': 0})['current'] / (1024**2)
-            net_tx = metrics.get('network_transmit', {'current': 0})['current'] / (1024**2)
+            net_rx = self._current_text(metrics.get('network_receive', MetricSeries.empty()), 1024**2, 'MB/s')
+            net_tx = self._current_text(metrics.get('network_transmit', MetricSeries.empty()), 1024**2, 'MB/s')
             
             worksheet.merge_range(
                 row, 0, row, 11,
-                f"Network 트래픽: Receive {net_rx:.1f}MB/s / Transmit {net_tx:.1f}MB/s",
+                f"Network 트래픽: Receive {net_rx} / Transmit {net_tx}",
                 formats['text']
             )
+            row += 1
+
+            # 장치/마운트포인트/인터페이스별 상위 항목
+            series_config = self.config.get('prometheus', {}).get('series_metrics', {}) or {}
+            for metric_name, options in series_config.items():
+                options = options or {}
+                matrix = metrics.get(metric_name)
+                if matrix is None or not (len(matrix) or matrix.unavailable):
+                    continue
+                worksheet.write(
+                    row, 1,
+                    f"{options.get('title', metric_name)} (상위 {matrix.top_k}): "
+                    f"{matrix.summary(options.get('unit', '%'), float(options.get('scale', 1)))}",
+                    formats['text']
+                )
+                row += 1
+
+            # 이상 구간
+            for title, window, unit, scale in anomaly_items(metrics, self.config):
+                worksheet.write(row, 1, f"이상 구간 - {title}: {window.describe(unit, scale)}", formats['text'])
+                row += 1
+
+            # 용량 예측
+            for title, forecast in forecast_items(metrics, self.config):
+                worksheet.write(row, 1, f"용량 예측 - {title}: {forecast.describe()}", formats['text'])
+                row += 1
             
-            return row + 2
+            return row + 1
 
         except Exception as e:
             self.logger.error(f"Failed to write metrics: {str(e)}")
             raise
 
+    async def _write_baseline(self, worksheet, formats, target: str, time_range: str, metrics: Dict, row: int) -> int:
+        """기준 구간 비교 작성 (악화 항목은 위험 색상, 조회/비교 실패 시 생략)"""
+        try:
+            baseline = await self.report.collector.baseline(target, time_range)
+            if baseline is None:
+                return row
+            comparisons = compare_metrics(metrics, baseline, self.config)
+        except Exception as e:
+            self.logger.warning(f"Failed to compare {target} with baseline: {str(e)}")
+            return row
+
+        label = baseline_label(self.config)
+        for comparison in comparisons:
+            worksheet.write(
+                row, 1,
+                f"{label} 대비 - {comparison.title}: {comparison.describe(label)}{' (악화)' if comparison.regression else ''}",
+                formats.get('metric_critical', formats['text']) if comparison.regression else formats['text']
+            )
+            row += 1
+        return row + 1
+
+    async def _write_correlations(self, worksheet, formats, target: str, time_range: str, row: int) -> int:
+        """연관 서버 작성 (메트릭 변화가 비슷한 서버, 조회 실패 시 생략)"""
+        if not (self.config.get('correlation', {}) or {}).get('report_section', False):
+            return row
+        try:
+            pairs = await self.report.collector.correlations(target, time_range)
+        except Exception as e:
+            self.logger.warning(f"Failed to correlate {target}: {str(e)}")
+            return row
+
+        items = correlation_items(pairs, target, self.config)
+        if not items:
+            return row
+        for title, peer, coefficient in items:
+            worksheet.write(
+                row, 1,
+                f"연관 서버 - {title}: {self.report.cmdb.servers(peer).get(peer, peer)} ({peer}) r={coefficient:.2f}",
+                formats['text']
+            )
+            row += 1
+        return row + 1
+
+    def _write_trend_chart(self, workbook, worksheet, metrics: Dict, row: int) -> int:
+        """추세 차트 작성 (데이터는 숨김 시트에 다운샘플링하여 기록)"""
+        chart_config = self.config.get('visualization', {}).get('excel_chart', {}) or {}
+        if not chart_config.get('enabled', False):
+            return row
+
+        try:
+            width = int(chart_config.get('points', 120))
+            method = chart_config.get('method', 'lttb')
+            titles = chart_config.get('metrics') or {'cpu_usage': 'CPU', 'memory_usage': 'Memory', 'disk_usage': 'Disk'}
+
+            data_sheet = workbook.add_worksheet('chart_data')
+            data_sheet.hide()
+            time_format = workbook.add_format({'num_format': 'mm-dd hh:mm'})
+            chart = workbook.add_chart({'type': 'scatter', 'subtype': 'straight'})
+
+            column = 0
+            for metric_name, title in titles.items():
+                data = metrics.get(metric_name)
+                # 단일 시리즈 메트릭만 (수집 불가/데이터 없음 제외)
+                if data is None or data.unavailable or not len(data) or hasattr(data, 'rows'):
+                    continue
+                timestamps, values = downsample(data.timestamps, data.values, width, method)
+                data_sheet.write_row(0, column, [f"{title} 시각", title])
+                for index, (timestamp, value) in enumerate(zip(timestamps, values), start=1):
+                    data_sheet.write_datetime(index, column, datetime.fromtimestamp(float(timestamp)), time_format)
+                    data_sheet.write_number(index, column + 1, float(value))
+                chart.add_series({
+                    'name': title,
+                    'categories': ['chart_data', 1, column, len(values), column],
+                    'values': ['chart_data', 1, column + 1, len(values), column + 1],
+                    'line': {'width': 1.25},
+                    'marker': {'type': 'none'}
+                })
+                column += 2
+
+            if not column:
+                return row
+
+            size = chart_config.get('size', {})
+            chart.set_title({'name': chart_config.get('title', '사용률 추세'), 'name_font': {'size': 10}})
+            chart.set_x_axis({'num_format': 'mm-dd hh:mm', 'num_font': {'size': 8}})
+            chart.set_y_axis({'min': 0, 'max': 100, 'num_format': '0"%"', 'num_font': {'size': 8}})
+            chart.set_legend({'position': 'bottom'})
+            chart.set_size({'width': size.get('width', 740), 'height': size.get('height', 260)})
+            worksheet.insert_chart(row, 0, chart, {'x_offset': 10, 'y_offset': 5})
+
+            # 차트 높이만큼 행 이동 (기본 행 높이 20px)
+            return row + int(size.get('height', 260)) // 20 + 1
+
+        except Exception as e:
+            self.logger.error(f"Failed to write trend chart: {str(e)}")
+            raise
+
     async def _write_analysis(self, worksheet, formats, server_info: Dict, metrics: Dict, row: int) -> int:
         """분석 섹션 작성"""
         try:
@@ -505,15 +532,7 @@ class DefaultTemplate:
                     "메모리": server_info['Memory'],
                     "디스크": server_info['디스크 용량']
                 },
-                "성능지표": {
-                    name: {
-                        "현재값": f"{data['current']:.1f}%",
-                        "평균": f"{data['average']:.1f}%",
-                        "최대": f"{data['maximum']:.1f}%"
-                    }
-                    for name, data in metrics.items()
-                    if isinstance(data, dict) and 'current' in data
-                }
+                "성능지표": metrics_context(metrics, self.config.get('prometheus', {}).get('series_metrics', {}) or {})
             }
 
             # LLM 분석 요청
@@ -588,6 +607,40 @@ class DefaultTemplate:
             self.logger.error(f"Failed to write analysis: {str(e)}")
             raise
 
+    def _write_stats(self, worksheet, formats, data: MetricSeries, row: int) -> int:
+        """백분위수/임계값 초과 시간 및 구간 분포 행 작성"""
+        stats = data.stats
+        if stats is None:
+            return row
+
+        text = f"P50: {stats.percentile(50):.1f}% / P95: {stats.percentile(95):.1f}% / P99: {stats.percentile(99):.1f}% / 표준편차: {stats.stddev:.1f}"
+        if stats.above_warning is not None:
+            text += f" · 경고 초과: {format_duration(stats.above_warning)} / 위험 초과: {format_duration(stats.above_critical)}"
+        worksheet.write(row, 1, text, formats['text'])
+        row += 1
+
+        distribution = [f"{label} {share:.0f}%" for label, share in stats.distribution() if share >= 0.5]
+        if distribution:
+            worksheet.write(row, 1, f"분포: {' · '.join(distribution)}", formats['text'])
+            row += 1
+        return row
+
+    def _usage_text(self, label: str, data: MetricSeries) -> str:
+        """사용률 행 문구 (조회 실패 시 수집 불가)"""
+        if data.unavailable:
+            return f"{label} 사용률: {UNAVAILABLE_TEXT}"
+        return (
+            f"{label} 사용률: {self._create_gauge(data.current)} ({data.current:.1f}%) - "
+            f"현재: {data.current:.1f}% / 평균: {data.average:.1f}% / "
+            f"최대: {data.maximum:.1f}%"
+        )
+
+    def _current_text(self, data: MetricSeries, divisor: float, unit: str) -> str:
+        """현재값 문구 (단위 환산, 조회 실패 시 수집 불가)"""
+        if data.unavailable:
+            return UNAVAILABLE_TEXT
+        return f"{data.current / divisor:.1f}{unit}"
+
     def _create_gauge(self, value: float, width: int = 10) -> str:
         """게이지 바 생성"""
         viz_config = self.config.get('visualization', {}).get('gauge', {})
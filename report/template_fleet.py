@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+from metric_anomaly import anomaly_items
+from metric_forecast import forecast_items
+from metric_series import MetricSeries
+from metric_stats import format_duration
+from prom_resilience import UNAVAILABLE_TEXT
+
+# 플릿 템플릿 (여러 서버 요약, 슬랙용 마크다운)
+class FleetTemplate:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.config = report_instance.config
+        self.logger = logging.getLogger(__name__)
+
+    # target: "ip1,ip2,..." 또는 "service:<서비스명>"
+    async def create_report(self, target: str, time_range: str, output_dir: str = None, request_id: str = None) -> Dict[str, str]:
+        try:
+            servers = self.report.cmdb.servers(target)
+            metrics = await self.report.collector.fleet_metrics(list(servers), time_range)
+
+            report = "\n\n".join([
+                self._generate_header(target, len(servers), time_range),
+                self._generate_summary(servers, metrics)
+            ])
+            return {"report": report}
+
+        except Exception as e:
+            self.logger.error(f"Failed to generate fleet report: {str(e)}", exc_info=True)
+            raise
+
+    def _generate_header(self, target: str, count: int, time_range: str) -> str:
+        check_time = datetime.now().strftime('%Y-%m-%d %H:%M')
+        return (
+            f"📋 *플릿 점검 보고서*\n"
+            f"점검 시간: {check_time} ({time_range})\n"
+            f"대상: {target} ({count}대)"
+        )
+
+    # 서버별 CPU/Memory/Disk 요약 (평균/최대)
+    def _generate_summary(self, servers: Dict[str, str], metrics: Dict[str, Dict[str, MetricSeries]]) -> str:
+        lines = ["📊 *서버별 성능 지표* (평균 / 최대)"]
+        for ip, hostname in servers.items():
+            host_metrics = metrics.get(ip, {})
+            cpu = host_metrics.get('cpu_usage', MetricSeries.empty())
+            mem = host_metrics.get('memory_usage', MetricSeries.empty())
+            disk = host_metrics.get('disk_usage', MetricSeries.empty())
+            disk_text = UNAVAILABLE_TEXT if disk.unavailable else f"{disk.current:.1f}%"
+            lines.append(
+                f"• *{hostname}* ({ip})\n"
+                f"  ↳ CPU {self._format_usage(cpu)} · "
+                f"Memory {self._format_usage(mem)} · "
+                f"Disk {disk_text}"
+            )
+            # 위험 임계값을 넘은 시간이 있는 메트릭만 표시
+            critical = [
+                f"{label} {format_duration(data.stats.above_critical)}"
+                for label, data in (('CPU', cpu), ('Memory', mem), ('Disk', disk))
+                if data.stats is not None and data.stats.above_critical
+            ]
+            if critical:
+                lines.append(f"  ⚠ 위험 임계값 초과: {', '.join(critical)}")
+            # 이상 구간은 건수와 가장 큰 구간만 표시
+            anomalies = anomaly_items(host_metrics, self.config)
+            if anomalies:
+                title, window, unit, scale = max(anomalies, key=lambda item: abs(item[1].magnitude))
+                lines.append(f"  🚨 이상 구간 {len(anomalies)}건: {title} {window.describe(unit, scale)}")
+            # 가장 빨리 위험/100% 에 도달할 항목만 표시
+            forecasts = forecast_items(host_metrics, self.config)
+            if forecasts:
+                title, forecast = forecasts[0]
+                lines.append(f"  📈 용량 예측: {title} {forecast.describe()}")
+        return "\n".join(lines)
+
+    # 평균 / 최대 (조회 실패 시 수집 불가)
+    def _format_usage(self, data: MetricSeries) -> str:
+        if data.unavailable:
+            return UNAVAILABLE_TEXT
+        return f"{data.average:.1f}% / {data.maximum:.1f}%"
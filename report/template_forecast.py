@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+import logging
+
+from metric_forecast import Forecast, forecast_horizon, forecast_items, forecast_metrics
+from metric_series import MetricSeries
+
+# 용량 예측 템플릿 (여러 서버의 Disk/Memory 위험 임계값·100% 도달 예상, 슬랙용 마크다운)
+class ForecastTemplate:
+    def __init__(self, report_instance):
+        self.report = report_instance
+        self.config = report_instance.config
+        self.logger = logging.getLogger(__name__)
+
+    # target: "ip1,ip2,..." 또는 "service:<서비스명>"
+    async def create_report(self, target: str, time_range: str, output_dir: str = None, request_id: str = None) -> Dict[str, str]:
+        try:
+            servers = self.report.cmdb.servers(target)
+            # 예측 대상 메트릭만 조회
+            metrics = await self.report.collector.fleet_metrics(list(servers), time_range, list(forecast_metrics(self.config)))
+
+            report = "\n\n".join([
+                self._generate_header(target, len(servers), time_range),
+                self._generate_forecasts(servers, metrics)
+            ])
+            return {"report": report}
+
+        except Exception as e:
+            self.logger.error(f"Failed to generate forecast report: {str(e)}", exc_info=True)
+            raise
+
+    def _generate_header(self, target: str, count: int, time_range: str) -> str:
+        check_time = datetime.now().strftime('%Y-%m-%d %H:%M')
+        return (
+            f"📈 *용량 예측 보고서*\n"
+            f"점검 시간: {check_time} (추세 기간 {time_range})\n"
+            f"대상: {target} ({count}대)"
+        )
+
+    # 예측 기간 안에 도달 예상인 항목 (빠른 순) + 나머지 요약
+    def _generate_forecasts(self, servers: Dict[str, str], metrics: Dict[str, Dict[str, MetricSeries]]) -> str:
+        horizon = forecast_horizon(self.config)
+        urgent: List[Tuple[str, str, str, Forecast]] = []
+        others = 0
+        unavailable = []
+        for ip, hostname in servers.items():
+            host_metrics = metrics.get(ip, {})
+            if host_metrics and all(metric.unavailable for metric in host_metrics.values()):
+                unavailable.append(hostname)
+                continue
+            for title, forecast in forecast_items(host_metrics, self.config, include_all=True):
+                if forecast.within(horizon):
+                    urgent.append((hostname, ip, title, forecast))
+                else:
+                    others += 1
+
+        horizon_days = horizon / 86400
+        lines = [f"⚠ *{horizon_days:g}일 안에 위험 임계값/100% 도달 예상*"]
+        if urgent:
+            urgent.sort(key=lambda item: item[3].first_eta)
+            for hostname, ip, title, forecast in urgent:
+                lines.append(
+                    f"• *{hostname}* ({ip}) {title}: 현재 {forecast.current:.1f}%\n"
+                    f"  ↳ {forecast.describe()}"
+                )
+        else:
+            lines.append("• 해당 항목 없음")
+        lines.append(f"\n✅ 그 외 {others}개 항목은 {horizon_days:g}일 안에 도달 예상 없음")
+        if unavailable:
+            lines.append(f"❔ 수집 불가: {', '.join(unavailable)}")
+        return "\n".join(lines)
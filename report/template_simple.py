@@ -1,12 +1,20 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional, Union
-import pandas as pd
-import os
+import numpy as np
 from pathlib import Path
 import logging
-import glob
 import requests
 
+from metric_anomaly import anomaly_items
+from metric_baseline import baseline_label, compare_metrics
+from metric_correlation import correlation_items
+from metric_downsample import downsample
+from metric_forecast import forecast_items
+from metric_matrix import metrics_context
+from metric_series import MetricSeries
+from metric_stats import format_duration
+from prom_resilience import UNAVAILABLE_TEXT
+
 # 심플 템플릿 (슬랙용 마크다운)
 class SimpleTemplate:
     def __init__(self, report_instance):
@@ -16,29 +24,32 @@ class SimpleTemplate:
 
     async def create_report(self, target: str, time_range: str, output_dir: str = None, request_id: str = None) -> Dict[str, str]:
         try:
-            # Calculate time range
-            end_time = datetime.now()
-            if time_range.endswith('h'):
-                start_time = end_time - timedelta(hours=int(time_range[:-1]))
-            elif time_range.endswith('d'):
-                start_time = end_time - timedelta(days=int(time_range[:-1]))
-            else:
-                start_time = end_time.replace(hour=0, minute=0, second=0, microsecond=0)
-
             # Get server info
-            server_info = self._get_server_info(target)
+            server_info = self.report.cmdb.server_info(target)
             
-            # Get metrics
-            metrics = await self._get_metrics(target, start_time, end_time)
+            # Get metrics (shared with other templates in the same run)
+            metrics = await self.report.collector.metrics(target, time_range)
             
             # Generate report sections
             header = self._generate_header(server_info)
             basic_info = self._generate_basic_info(server_info)
             metrics_info = self._generate_metrics_info(metrics)
+            anomaly_info = self._generate_anomaly_info(metrics)
+            forecast_info = self._generate_forecast_info(metrics)
+            baseline_info = await self._generate_baseline_info(target, time_range, metrics)
+            correlation_info = await self._generate_correlation_info(target, time_range)
             # analysis = await self._generate_analysis(server_info, metrics)
 
             # 기본 메트릭 즉시 반환
             report = f"{header}\n\n{basic_info}\n\n{metrics_info}"
+            if baseline_info:
+                report += f"\n\n{baseline_info}"
+            if anomaly_info:
+                report += f"\n\n{anomaly_info}"
+            if forecast_info:
+                report += f"\n\n{forecast_info}"
+            if correlation_info:
+                report += f"\n\n{correlation_info}"
             # 느려터진 LLM은 스레드 처리 후 반환
             analysis = await self._generate_analysis(server_info, metrics)
 
@@ -52,91 +63,21 @@ class SimpleTemplate:
             self.logger.error(f"Failed to generate simple report: {str(e)}", exc_info=True)
             raise
 
-    # 서버 정보 CMDB (CSV) 참조
-    def _get_server_info(self, target: str) -> Dict:
-        try:
-            # CSV 최신 파일 선택
-            files_config = self.config.get('files', {})
-            csv_prefix = files_config.get('extdata_prefix')
-            pattern = str(self.report.data_dir / f"{csv_prefix}*.csv")
-            matching_files = glob.glob(pattern)
-            
-            if not matching_files:
-                raise FileNotFoundError(f"CSV 파일 패턴을 찾을 수 없습니다: {pattern}")
-            
-            latest_file = max(matching_files, key=lambda f: 
-                int(''.join(filter(str.isdigit, os.path.basename(f))) or '0')
-            )
-            
-            # Read CSV file
-            df = pd.read_csv(latest_file, encoding='euc-kr')
-            
-            # Search by IP
-            server_info = df[(df['사설IP'] == target) | (df['공인/NAT IP'] == target)]
-            
-            # Search by service name if IP not found
-            if server_info.empty and target.startswith('service:'):
-                service_name = target.split(':', 1)[1]
-                server_info = df[df['서비스'] == service_name]
-            
-            if server_info.empty:
-                raise ValueError(f"다음 서버 정보를 찾을 수 없습니다: {target}")
-            
-            return server_info.iloc[0].to_dict()
-        
-        except Exception as e:
-            self.logger.error(f"Failed to get server info: {str(e)}")
-            raise
-
-    # Prometheus 메트릭
-    async def _get_metrics(self, target: str, start_time: datetime, end_time: datetime) -> Dict[str, Any]:
-        try:
-            metrics = {}
-            promql = self.config.get('prometheus', {}).get('promql', {})
-            
-            for metric_name, query in promql.items():
-                try:
-                    # Replace IP in query
-                    formatted_query = query.replace('{ip}', target)
-                    formatted_query = formatted_query.replace('{{', '{').replace('}}', '}')
-                    
-                    # Execute Prometheus query
-                    result = await self.report.query_prometheus(formatted_query, start_time, end_time)
-                    
-                    if result and isinstance(result, list) and len(result) > 0:
-                        if 'values' in result[0]:
-                            values = [float(v[1]) for v in result[0]['values']]
-                            metrics[metric_name] = {
-                                'current': values[-1] if values else 0,
-                                'average': float(pd.Series(values).mean()),
-                                'maximum': float(pd.Series(values).max()),
-                                'minimum': float(pd.Series(values).min()),
-                                'values': values
-                            }
-                            continue
-                    
-                    self.logger.warning(f"No data returned for metric: {metric_name}")
-                    metrics[metric_name] = self._empty_metric()
-                
-                except Exception as e:
-                    self.logger.error(f"Failed to get metric {metric_name}: {str(e)}")
-                    metrics[metric_name] = self._empty_metric()
-            
-            return metrics
-        
-        except Exception as e:
-            self.logger.error(f"Failed to get metrics: {str(e)}")
-            raise
+    # 백분위수 / 임계값 초과 시간 행 (통계가 없으면 빈 문자열)
+    def _stats_line(self, data: MetricSeries) -> str:
+        stats = data.stats
+        if stats is None:
+            return ""
+        line = f"  ↳ P95: {stats.percentile(95):.1f}% / P99: {stats.percentile(99):.1f}%"
+        if stats.above_warning is not None:
+            line += f" · 경고 초과: {format_duration(stats.above_warning)} / 위험 초과: {format_duration(stats.above_critical)}"
+        return line + "\n"
 
-    # 빈 메트릭 값 처리
-    def _empty_metric(self) -> Dict[str, Any]:
-        return {
-            'current': 0,
-            'average': 0,
-            'maximum': 0,
-            'minimum': 0,
-            'values': []
-        }
+    # 현재값 문구 (단위 환산, 조회 실패 시 수집 불가)
+    def _current_text(self, data: MetricSeries, divisor: float, unit: str) -> str:
+        if data.unavailable:
+            return UNAVAILABLE_TEXT
+        return f"{data.current / divisor:.1f}{unit}"
 
     def _generate_header(self, server_info: Dict) -> str:
         """Generate report header section"""
@@ -168,49 +109,76 @@ class SimpleTemplate:
             viz_config = self.config.get('visualization', {})
             
             # CPU Metrics
-            cpu_data = metrics.get('cpu_usage', self._empty_metric())
-            cpu_gauge = self._create_gauge(cpu_data['current'], viz_config.get('slack_gauge', {}))
-            cpu_trend = self._create_trend(cpu_data['values'], viz_config.get('slack_trend', {}))
-            sections.append(
-                f"• *CPU 사용률:* {cpu_gauge} ({cpu_data['current']:.1f}%)\n"
-                f"  ↳ 평균: {cpu_data['average']:.1f}% / 최대: {cpu_data['maximum']:.1f}%\n"
-                f"  ↳ 추세: {cpu_trend}"
-            )
+            cpu_data = metrics.get('cpu_usage', MetricSeries.empty())
+            if cpu_data.unavailable:
+                sections.append(f"• *CPU 사용률:* {UNAVAILABLE_TEXT}")
+            else:
+                cpu_gauge = self._create_gauge(cpu_data.current, viz_config.get('slack_gauge', {}))
+                cpu_trend = self._create_trend(cpu_data, viz_config.get('slack_trend', {}))
+                sections.append(
+                    f"• *CPU 사용률:* {cpu_gauge} ({cpu_data.current:.1f}%)\n"
+                    f"  ↳ 평균: {cpu_data.average:.1f}% / 최대: {cpu_data.maximum:.1f}%\n"
+                    f"{self._stats_line(cpu_data)}"
+                    f"  ↳ 추세: {cpu_trend}"
+                )
 
             # Memory Metrics
-            mem_data = metrics.get('memory_usage', self._empty_metric())
-            mem_gauge = self._create_gauge(mem_data['current'], viz_config.get('slack_gauge', {}))
-            mem_trend = self._create_trend(mem_data['values'], viz_config.get('slack_trend', {}))
-            mem_total = metrics.get('memory_total', {}).get('current', 0) / (1024**3)  # Convert to GB
-            mem_avail = metrics.get('memory_available', {}).get('current', 0) / (1024**3)
-            sections.append(
-                f"• *Memory 사용률:* {mem_gauge} ({mem_data['current']:.1f}%)\n"
-                f"  ↳ 평균: {mem_data['average']:.1f}% / 최대: {mem_data['maximum']:.1f}%\n"
-                f"  ↳ Total: {mem_total:.1f}GB / Available: {mem_avail:.1f}GB\n"
-                f"  ↳ 추세: {mem_trend}"
-            )
+            mem_data = metrics.get('memory_usage', MetricSeries.empty())
+            if mem_data.unavailable:
+                sections.append(f"• *Memory 사용률:* {UNAVAILABLE_TEXT}")
+            else:
+                mem_gauge = self._create_gauge(mem_data.current, viz_config.get('slack_gauge', {}))
+                mem_trend = self._create_trend(mem_data, viz_config.get('slack_trend', {}))
+                mem_total = self._current_text(metrics.get('memory_total', MetricSeries.empty()), 1024**3, 'GB')
+                mem_avail = self._current_text(metrics.get('memory_available', MetricSeries.empty()), 1024**3, 'GB')
+                sections.append(
+                    f"• *Memory 사용률:* {mem_gauge} ({mem_data.current:.1f}%)\n"
+                    f"  ↳ 평균: {mem_data.average:.1f}% / 최대: {mem_data.maximum:.1f}%\n"
+                    f"{self._stats_line(mem_data)}"
+                    f"  ↳ Total: {mem_total} / Available: {mem_avail}\n"
+                    f"  ↳ 추세: {mem_trend}"
+                )
 
             # Disk Metrics
-            disk_data = metrics.get('disk_usage', self._empty_metric())
-            disk_gauge = self._create_gauge(disk_data['current'], viz_config.get('slack_gauge', {}))
-            disk_trend = self._create_trend(disk_data['values'], viz_config.get('slack_trend', {}))
-            disk_read = metrics.get('disk_read_bytes', {}).get('current', 0) / (1024**2)  # MB/s
-            disk_write = metrics.get('disk_write_bytes', {}).get('current', 0) / (1024**2)
-            sections.append(
-                f"• *Disk 사용률:* {disk_gauge} ({disk_data['current']:.1f}%)\n"
-                f"  ↳ 평균: {disk_data['average']:.1f}% / 최대: {disk_data['maximum']:.1f}%\n"
-                f"  ↳ I/O: Read {disk_read:.1f}MB/s / Write {disk_write:.1f}MB/s\n"
-                f"  ↳ 추세: {disk_trend}"
-            )
+            disk_data = metrics.get('disk_usage', MetricSeries.empty())
+            if disk_data.unavailable:
+                sections.append(f"• *Disk 사용률:* {UNAVAILABLE_TEXT}")
+            else:
+                disk_gauge = self._create_gauge(disk_data.current, viz_config.get('slack_gauge', {}))
+                disk_trend = self._create_trend(disk_data, viz_config.get('slack_trend', {}))
+                disk_read = self._current_text(metrics.get('disk_read_bytes', MetricSeries.empty()), 1024**2, 'MB/s')
+                disk_write = self._current_text(metrics.get('disk_write_bytes', MetricSeries.empty()), 1024**2, 'MB/s')
+                sections.append(
+                    f"• *Disk 사용률:* {disk_gauge} ({disk_data.current:.1f}%)\n"
+                    f"  ↳ 평균: {disk_data.average:.1f}% / 최대: {disk_data.maximum:.1f}%\n"
+                    f"{self._stats_line(disk_data)}"
+                    f"  ↳ I/O: Read {disk_read} / Write {disk_write}\n"
+                    f"  ↳ 추세: {disk_trend}"
+                )
 
             # Network Metrics
-            net_rx = metrics.get('network_receive', {}).get('current', 0) / (1024**2)  # MB/s
-            net_tx = metrics.get('network_transmit', {}).get('current', 0) / (1024**2)
-            sections.append(
-                f"• *Network 트래픽:*\n"
-                f"  ↳ Receive: {net_rx:.1f}MB/s\n"
-                f"  ↳ Transmit: {net_tx:.1f}MB/s"
-            )
+            net_rx = metrics.get('network_receive', MetricSeries.empty())
+            net_tx = metrics.get('network_transmit', MetricSeries.empty())
+            if net_rx.unavailable or net_tx.unavailable:
+                sections.append(f"• *Network 트래픽:* {UNAVAILABLE_TEXT}")
+            else:
+                sections.append(
+                    f"• *Network 트래픽:*\n"
+                    f"  ↳ Receive: {net_rx.current / (1024**2):.1f}MB/s\n"  # MB/s
+                    f"  ↳ Transmit: {net_tx.current / (1024**2):.1f}MB/s"
+                )
+
+            # 장치/마운트포인트/인터페이스별 상위 항목
+            series_config = self.config.get('prometheus', {}).get('series_metrics', {}) or {}
+            for metric_name, options in series_config.items():
+                options = options or {}
+                matrix = metrics.get(metric_name)
+                if matrix is None or not (len(matrix) or matrix.unavailable):
+                    continue
+                sections.append(
+                    f"• *{options.get('title', metric_name)}* (상위 {matrix.top_k}):\n"
+                    f"  ↳ {matrix.summary(options.get('unit', '%'), float(options.get('scale', 1)))}"
+                )
 
             return "\n\n".join(sections)
 
@@ -218,6 +186,63 @@ class SimpleTemplate:
             self.logger.error(f"Failed to generate metrics info: {str(e)}")
             return "*시스템 성능 지표 생성 중 오류 발생*"
 
+    # 이상 구간 섹션 (탐지된 구간이 없으면 빈 문자열)
+    def _generate_anomaly_info(self, metrics: Dict) -> str:
+        items = anomaly_items(metrics, self.config)
+        if not items:
+            return ""
+        lines = ["🚨 *이상 구간*"]
+        lines.extend(f"• *{title}:* {window.describe(unit, scale)}" for title, window, unit, scale in items)
+        return "\n".join(lines)
+
+    # 용량 예측 섹션 (예측 기간 안에 위험/100% 도달 예상 항목이 없으면 빈 문자열)
+    def _generate_forecast_info(self, metrics: Dict) -> str:
+        items = forecast_items(metrics, self.config)
+        if not items:
+            return ""
+        lines = ["📈 *용량 예측*"]
+        lines.extend(f"• *{title}:* {forecast.describe()}" for title, forecast in items)
+        return "\n".join(lines)
+
+    # 기준 구간 비교 섹션 (baseline 비활성이거나 비교 값이 없거나 조회/비교에 실패하면 빈 문자열)
+    async def _generate_baseline_info(self, target: str, time_range: str, metrics: Dict) -> str:
+        try:
+            baseline = await self.report.collector.baseline(target, time_range)
+            if baseline is None:
+                return ""
+            comparisons = compare_metrics(metrics, baseline, self.config)
+        except Exception as e:
+            self.logger.warning(f"Failed to compare {target} with baseline: {str(e)}")
+            return ""
+        if not comparisons:
+            return ""
+        label = baseline_label(self.config)
+        lines = [f"📊 *{label} 대비*"]
+        lines.extend(
+            f"• *{comparison.title}:* {comparison.describe(label)}{' 🔺 악화' if comparison.regression else ''}"
+            for comparison in comparisons
+        )
+        return "\n".join(lines)
+
+    # 연관 서버 섹션 (메트릭 변화가 비슷한 서버가 없거나 조회에 실패하면 빈 문자열)
+    async def _generate_correlation_info(self, target: str, time_range: str) -> str:
+        if not (self.config.get('correlation', {}) or {}).get('report_section', False):
+            return ""
+        try:
+            pairs = await self.report.collector.correlations(target, time_range)
+        except Exception as e:
+            self.logger.warning(f"Failed to correlate {target}: {str(e)}")
+            return ""
+        items = correlation_items(pairs, target, self.config)
+        if not items:
+            return ""
+        lines = ["🔗 *연관 서버*"]
+        lines.extend(
+            f"• *{title}:* {self.report.cmdb.servers(peer).get(peer, peer)} ({peer}) r={coefficient:.2f}"
+            for title, peer, coefficient in items
+        )
+        return "\n".join(lines)
+
     # 분석 포멧 - LLM 피드백
     async def _generate_analysis(self, server_info: Dict, metrics: Dict) -> str:
         try:
@@ -236,15 +261,7 @@ class SimpleTemplate:
                     "메모리": server_info['Memory'],
                     "디스크": server_info['디스크 용량']
                 },
-                "성능지표": {
-                    name: {
-                        "현재값": f"{data['current']:.1f}%",
-                        "평균": f"{data['average']:.1f}%",
-                        "최대": f"{data['maximum']:.1f}%"
-                    }
-                    for name, data in metrics.items()
-                    if isinstance(data, dict) and 'current' in data
-                }
+                "성능지표": metrics_context(metrics, self.config.get('prometheus', {}).get('series_metrics', {}) or {})
             }
 
             # Request LLM analysis
@@ -290,9 +307,10 @@ class SimpleTemplate:
         filled = int((value / 100) * width)
         return f"{prefix}{filled_char * filled}{empty_char * (width - filled)}{suffix}"
 
-    def _create_trend(self, values: List[float], config: Dict) -> str:
+    def _create_trend(self, data: MetricSeries, config: Dict) -> str:
         """Create trend visualization for Slack"""
-        if not values:
+        values = data.values[~np.isnan(data.values)] if len(data) else data.values
+        if values.size == 0:
             return ""
             
         width = config.get('width', 8)
@@ -300,10 +318,8 @@ class SimpleTemplate:
         indicators = config.get('indicators', {})
         
         # Calculate trend direction
-        if len(values) >= 2:
-            start_avg = sum(values[:3]) / min(3, len(values))
-            end_avg = sum(values[-3:]) / min(3, len(values))
-            diff = end_avg - start_avg
+        if values.size >= 2:
+            diff = values[-3:].mean() - values[:3].mean()
             
             if abs(diff) < 5:  # threshold for "flat" trend
                 indicator = indicators.get('flat', '➡︎')
@@ -314,31 +330,19 @@ class SimpleTemplate:
         else:
             indicator = indicators.get('flat', '➡︎')
         
-        # Create sparkline visualization
-        if len(values) < width:
-            values_subset = values
-        else:
-            values_subset = []
-            chunk_size = len(values) / width
-            for i in range(width):
-                start_idx = int(i * chunk_size)
-                end_idx = int((i + 1) * chunk_size)
-                chunk_avg = sum(values[start_idx:end_idx]) / (end_idx - start_idx)
-                values_subset.append(chunk_avg)
+        # Create sparkline visualization (급등/급락 지점이 남도록 LTTB/min-max 다운샘플링)
+        _, values_subset = downsample(data.timestamps, data.values, width, config.get('method', 'lttb'))
         
         # Normalize values to char range
-        min_val = min(values_subset)
-        max_val = max(values_subset)
+        min_val = values_subset.min()
+        max_val = values_subset.max()
         if max_val == min_val:
-            normalized = [0] * len(values_subset)
+            normalized = np.zeros(values_subset.size, dtype=np.intp)
         else:
-            normalized = [
-                ((v - min_val) / (max_val - min_val)) * (len(chars) - 1)
-                for v in values_subset
-            ]
+            normalized = ((values_subset - min_val) / (max_val - min_val) * (len(chars) - 1)).astype(np.intp)
         
         # Create visualization
-        trend = ''.join(chars[int(v)] for v in normalized)
+        trend = ''.join(chars[v] for v in normalized)
         return f"{trend} {indicator}"
 
     def _format_size(self, size_bytes: float) -> str:
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# report/, bot/ 모듈은 서로를 최상위 모듈로 import 하므로 경로에 추가
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'report'))
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
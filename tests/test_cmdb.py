@@ -0,0 +1,89 @@
+import logging
+import mmap
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cmdb import CmdbIndex, CmdbLookup, CmdbStore
+
+ROWS = [
+    {'사설IP': '10.0.0.1', '공인/NAT IP': '1.1.1.1', 'Hostname': 'web01', '서비스': 'shop', '운영상태': '운영'},
+    {'사설IP': None, '공인/NAT IP': '2.2.2.2', 'Hostname': 'WEB02', '서비스': 'shop', '운영상태': '운영'},
+    {'사설IP': None, '공인/NAT IP': None, 'Hostname': 'spare01', '서비스': 'shop', '운영상태': '대기'},
+    {'사설IP': '10.0.0.1', '공인/NAT IP': None, 'Hostname': 'web01-dup', '서비스': 'blog', '운영상태': '운영'},
+]
+
+
+def _write_export(directory: Path, name: str = '구성관리조회_20240901000001.csv', rows=ROWS) -> Path:
+    path = directory / name
+    pd.DataFrame(rows).to_csv(path, index=False, encoding='euc-kr')
+    return path
+
+
+class _Report:
+    def __init__(self, data_dir: Path):
+        self.config = {'files': {'extdata_prefix': '구성관리조회_'}}
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self.project_root = data_dir
+
+
+def test_index_lookups_keep_first_row():
+    index = CmdbIndex(pd.DataFrame(ROWS))
+    assert index.find_ip('10.0.0.1') == 0
+    assert index.find_ip('2.2.2.2') == 1
+    assert index.find_ip('9.9.9.9') is None
+    assert index.find_hostname('web02') is None
+    assert index.find_hostname('web02', case_sensitive=False) == 1
+    assert index.find_service('shop') == [0, 1, 2]
+    assert [index.ip_of(position) for position in range(3)] == ['10.0.0.1', '2.2.2.2', None]
+
+
+def test_store_reloads_newer_export(tmp_path):
+    _write_export(tmp_path)
+    store = CmdbStore(tmp_path, '구성관리조회_')
+    first = store.current()
+    assert store.current() is first
+    _write_export(tmp_path, '구성관리조회_20240902000001.csv', ROWS[:1])
+    assert len(store.current()) == 1
+    assert store.file_name == '구성관리조회_20240902000001.csv'
+
+
+def test_service_servers_skip_rows_without_ip(tmp_path):
+    _write_export(tmp_path)
+    lookup = CmdbLookup(_Report(tmp_path))
+    assert lookup.servers('service:shop') == {'10.0.0.1': 'web01', '2.2.2.2': 'WEB02'}
+    assert lookup.servers('10.0.0.1,9.9.9.9') == {'10.0.0.1': 'web01', '9.9.9.9': '9.9.9.9'}
+    assert None not in lookup.peers('10.0.0.1')
+    with pytest.raises(ValueError):
+        lookup.servers('service:unknown')
+
+
+def test_snapshot_round_trip(tmp_path):
+    from cmdb_snapshot import CmdbSnapshot
+
+    csv_path = _write_export(tmp_path)
+    store = CmdbStore(tmp_path, '구성관리조회_', columns=['운영상태'])
+    expected = store.read_csv(str(csv_path))
+    snapshot = CmdbSnapshot(tmp_path / 'snapshot')
+
+    built = snapshot.load(str(csv_path), store.read_csv, store.schema)
+    loaded = snapshot.load(str(csv_path), store.read_csv, store.schema)  # 스냅샷에서 읽음
+    assert len(list((tmp_path / 'snapshot').glob('*.npy'))) == 1
+    pd.testing.assert_frame_equal(built, expected)
+    pd.testing.assert_frame_equal(loaded, expected)
+    assert isinstance(loaded['운영상태'].dtype, pd.CategoricalDtype)
+    # category 코드는 mmap 배열을 복사 없이 사용
+    assert _is_mapped(loaded['운영상태'].array.codes)
+    assert not _is_mapped(built['운영상태'].array.codes)
+
+
+def _is_mapped(array) -> bool:
+    while array is not None:
+        if isinstance(array, (np.memmap, mmap.mmap)):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+    assert loaded['사설IP'].isna().tolist() == [False, True, True, False]
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from cmdb_template import RowTemplate, compile_templates
+
+
+def test_render_fills_columns_and_newlines():
+    template = RowTemplate('*{Hostname}* ({사설IP})##OS: {서버 OS} {서버 OS Version}')
+    assert template.columns == ('Hostname', '사설IP', '서버 OS', '서버 OS Version')
+    row = {'Hostname': 'web01', '사설IP': '10.0.0.1', '서버 OS': 'RHEL', '서버 OS Version': 8}
+    assert template.render(row) == '*web01* (10.0.0.1)\nOS: RHEL 8'
+
+
+def test_render_marks_empty_and_keeps_unknown_columns():
+    template = RowTemplate('{Hostname} / {Memory} / {VIP} / {CPU Type} / {없는 컬럼}')
+    row = pd.Series({'Hostname': '', 'Memory': np.nan, 'VIP': None, 'CPU Type': pd.NA})
+    assert template.render(row) == '- / - / - / - / {없는 컬럼}'
+    assert template.missing(row.index) == ['없는 컬럼']
+
+
+def test_render_matches_pandas_row_and_dict():
+    frame = pd.DataFrame({'Hostname': ['web01'], '운영상태': pd.Categorical(['운영'])})
+    template = RowTemplate('{Hostname}: {운영상태} {Hostname}')
+    assert template.render(frame.iloc[0]) == template.render(frame.iloc[0].to_dict()) == 'web01: 운영 web01'
+
+
+def test_compile_templates_only_takes_template_keys():
+    templates = compile_templates({'server_template': '{Hostname}', 'max_rows': '10', 'mngt_template': 'a##b'})
+    assert set(templates) == {'server_template', 'mngt_template'}
+    assert templates['mngt_template'].render({}) == 'a\nb'
@@ -0,0 +1,62 @@
+import numpy as np
+
+from metric_anomaly import changepoints, detect_anomalies, ewma_zscore, rolling_zscore, window_stats
+
+
+def _noise(width: int = 300, seed: int = 1) -> np.ndarray:
+    return 50.0 + np.random.default_rng(seed).normal(scale=1.0, size=(1, width))
+
+
+def test_window_stats_match_direct_computation_with_gaps():
+    values = _noise(60)
+    values[0, [5, 17, 18]] = np.nan
+    mean, variance, count = window_stats(values, 10)
+    for k in (0, 8, 50):
+        window = values[0, k:k + 10]
+        window = window[~np.isnan(window)]
+        assert count[0, k] == window.size
+        assert np.isclose(mean[0, k], window.mean())
+        assert np.isclose(variance[0, k], window.var())
+
+
+def test_rolling_zscore_uses_preceding_window():
+    values = _noise(60)
+    mean, z = rolling_zscore(values, 10, 0.0)
+    t = 25
+    previous = values[0, t - 10:t]
+    assert np.isclose(mean[0, t - 10], previous.mean())
+    assert np.isclose(z[0, t - 10], (values[0, t] - previous.mean()) / previous.std())
+
+
+def test_ewma_zscore_warmup_and_spike():
+    values = _noise(100)
+    values[0, 80] += 30.0
+    z = ewma_zscore(values, 0.1, 30, 0.0)
+    assert np.isnan(z[0, :30]).all()
+    assert z[0, 80] > 10
+    assert np.abs(z[0, 40:80]).max() < 5
+
+
+def test_spike_is_detected():
+    values = _noise()
+    values[0, 200] += 25.0
+    found = detect_anomalies(values, window=30)[0]
+    assert [(kind, start, end) for kind, start, end, *_ in found] == [('spike', 200, 200)]
+    kind, start, end, magnitude, value, baseline = found[0]
+    assert magnitude > 4 and value == values[0, 200]
+    assert np.isclose(baseline, values[0, 170:200].mean())
+
+
+def test_level_shift_is_reported_once():
+    values = _noise()
+    values[0, 150:] += 15.0
+    found = detect_anomalies(values, window=30)[0]
+    assert [item[0] for item in found] == ['shift']
+    kind, index, _, magnitude, after, before = found[0]
+    assert abs(index - 150) <= 1 and magnitude > 4
+    assert np.isclose(before, 50.0, atol=1.0) and np.isclose(after, 65.0, atol=1.0)
+    assert changepoints(_noise(), 30, 4.0, 0.02) == []
+
+
+def test_quiet_series_has_no_anomalies():
+    assert detect_anomalies(_noise(seed=5), window=30) == [[]]
@@ -0,0 +1,20 @@
+import numpy as np
+
+from metric_baseline import compare_metrics
+from metric_series import MetricSeries
+from metric_stats import attach_stats
+
+
+def _series(values) -> MetricSeries:
+    values = np.asarray(values, dtype=np.float64)
+    return MetricSeries(np.arange(values.size) * 60.0, values)
+
+
+def test_p95_without_configured_percentile_is_computed():
+    current, baseline = _series(np.arange(101) * 0.5 + 20), _series(np.arange(101) * 0.2 + 20)
+    config = {'statistics': {'percentiles': [50, 99]}, 'baseline': {'enabled': True, 'statistic': 'p95'}}
+    attach_stats([('cpu_usage', current), ('cpu_usage', baseline)], config)
+    comparison, = compare_metrics({'cpu_usage': current}, {'cpu_usage': baseline}, config)
+    assert np.isclose(comparison.current, 67.5) and np.isclose(comparison.baseline, 39.0)
+    assert comparison.regression
+    assert 'nan' not in comparison.describe()
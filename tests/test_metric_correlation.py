@@ -0,0 +1,47 @@
+import numpy as np
+
+from metric_correlation import standardize, top_pairs
+
+
+def _pearson(first: np.ndarray, second: np.ndarray) -> float:
+    both = ~np.isnan(first) & ~np.isnan(second)
+    return float(np.corrcoef(first[both], second[both])[0, 1])
+
+
+def _matrix(rows: int = 12, width: int = 200) -> np.ndarray:
+    rng = np.random.default_rng(3)
+    base = np.sin(np.linspace(0, 12, width))
+    matrix = base * rng.uniform(0.2, 2.0, (rows, 1)) + rng.normal(scale=0.5, size=(rows, width))
+    matrix[rng.random((rows, width)) < 0.2] = np.nan  # 20% 결측
+    return matrix
+
+
+def test_blocked_top_pairs_match_pairwise_pearson():
+    matrix = _matrix()
+    values, present = standardize(matrix, min_coverage=0.5)
+    expected = sorted(
+        ((i, j, _pearson(matrix[i], matrix[j])) for i in range(len(matrix)) for j in range(i + 1, len(matrix))),
+        key=lambda item: -item[2]
+    )[:5]
+    for block_size in (1, 4, 256):
+        pairs = top_pairs(values, present, 5, block_size)
+        assert [(i, j) for i, j, _ in pairs] == [(i, j) for i, j, _ in expected]
+        assert np.allclose([r for _, _, r in pairs], [r for _, _, r in expected])
+
+
+def test_focus_rows_only_pair_with_focus():
+    matrix = _matrix()
+    values, present = standardize(matrix)
+    pairs = top_pairs(values, present, 3, 2, focus_rows=np.array([4]))
+    assert len(pairs) == 3
+    assert all(first == 4 and second != 4 for first, second, _ in pairs)
+    assert np.isclose(pairs[0][2], max(_pearson(matrix[4], matrix[j]) for j in range(len(matrix)) if j != 4))
+
+
+def test_sparse_and_flat_rows_are_excluded():
+    matrix = _matrix(rows=3)
+    matrix[1, 20:] = np.nan  # 유효 포인트 10%
+    matrix[2] = 1.0  # 변화 없음
+    values, present = standardize(matrix, min_coverage=0.5)
+    assert not present[1].any() and not present[2].any()
+    assert top_pairs(values, present, 3) == []
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from metric_downsample import downsample, lttb, minmax
+
+
+def _series(size: int = 1000):
+    timestamps = np.arange(size, dtype=np.float64) * 15
+    values = np.sin(np.linspace(0, 20, size)) * 10 + 50
+    values[size // 3] = 95.0  # 급등
+    values[size * 2 // 3] = 5.0  # 급락
+    return timestamps, values
+
+
+@pytest.mark.parametrize('width', [10, 51, 120])
+def test_lttb_keeps_endpoints_and_extremes(width):
+    timestamps, values = _series()
+    ts, vs = lttb(timestamps, values, width)
+    assert ts.size == width
+    assert ts[0] == timestamps[0] and ts[-1] == timestamps[-1]
+    assert np.all(np.diff(ts) > 0)
+    assert 95.0 in vs and 5.0 in vs
+
+
+@pytest.mark.parametrize('width', [1, 2, 7, 10, 51, 120])
+def test_minmax_returns_width_points_with_extremes(width):
+    timestamps, values = _series()
+    ts, vs = minmax(timestamps, values, width)
+    assert ts.size == width
+    assert np.all(np.diff(ts) >= 0)
+    assert vs.max() == 95.0
+    if width > 1:
+        assert vs.min() == 5.0
+    if width % 2 and width > 1:
+        assert ts[-1] == timestamps[-1]
+
+
+def test_downsample_drops_nan_and_keeps_short_series():
+    timestamps, values = _series(50)
+    values[10] = np.nan
+    ts, vs = downsample(timestamps, values, 100)
+    assert ts.size == 49 and not np.isnan(vs).any()
+    with pytest.raises(ValueError):
+        downsample(timestamps, values, 10, 'median')
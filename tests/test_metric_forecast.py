@@ -0,0 +1,54 @@
+import numpy as np
+
+from metric_forecast import attach_forecasts, fit_trends, time_to_reach
+from metric_series import MetricSeries
+
+
+def _rows(*series):
+    width = max(len(values) for _, values in series)
+    timestamps = np.full((len(series), width), np.nan)
+    values = np.full((len(series), width), np.nan)
+    lengths = np.empty(len(series), dtype=np.intp)
+    for row, (ts, vs) in enumerate(series):
+        timestamps[row, :len(ts)] = ts - ts[-1]
+        values[row, :len(vs)] = vs
+        lengths[row] = len(vs)
+    return timestamps, values, lengths
+
+
+def test_theil_sen_ignores_spikes_and_finds_crossing_time():
+    timestamps = np.arange(0, 7 * 86400, 3600, dtype=np.float64)
+    values = 60.0 + timestamps / 86400  # 하루 1%p 증가, 마지막 값 약 67%
+    spiky = values.copy()
+    spiky[::17] = 100.0  # 일시적 급증
+    slope, current = fit_trends(*_rows((timestamps, values), (timestamps, spiky)))
+    assert np.allclose(slope * 86400, 1.0, rtol=0.05)
+    assert np.allclose(current, values[-1], atol=0.5)
+
+    eta = time_to_reach(slope, current, np.array([90.0, 90.0]))
+    assert np.allclose(eta / 86400, 90.0 - values[-1], rtol=0.05)
+
+
+def test_linear_fit_with_different_lengths():
+    long_ts = np.arange(0, 1000, 10, dtype=np.float64)
+    short_ts = np.arange(0, 300, 10, dtype=np.float64)
+    slope, current = fit_trends(*_rows((long_ts, 2.0 * long_ts), (short_ts, 5.0 - 0.5 * short_ts)), method='linear')
+    assert np.allclose(slope, [2.0, -0.5])
+    assert np.allclose(current, [2.0 * long_ts[-1], 5.0 - 0.5 * short_ts[-1]])
+
+
+def test_time_to_reach_edges():
+    eta = time_to_reach(np.array([0.0, -1.0, 1.0]), np.array([50.0, 95.0, 95.0]), np.array([90.0, 90.0, 90.0]))
+    assert np.isnan(eta[0])
+    assert eta[1] == 0.0 and eta[2] == 0.0
+
+
+def test_attach_forecasts_sets_eta():
+    timestamps = np.arange(0, 2 * 86400, 600, dtype=np.float64) + 1.7e9
+    series = MetricSeries(timestamps, 80.0 + (timestamps - timestamps[0]) / 86400)
+    config = {'thresholds': {'disk': {'critical': 90}}, 'forecast': {'metrics': {'disk_usage': {'threshold': 'disk'}}}}
+    attach_forecasts([('disk_usage', series)], config)
+    forecast = series.forecast
+    assert forecast is not None and forecast.critical == 90
+    assert np.isclose(forecast.eta_critical / 86400, 90.0 - series.values[-1], rtol=0.05)
+    assert forecast.eta_critical < forecast.eta_full
@@ -0,0 +1,34 @@
+import numpy as np
+
+from metric_series import MetricSeries
+from metric_stats import compute_stats, sample_durations
+
+
+def _series(values, step: float = 60.0) -> MetricSeries:
+    values = np.asarray(values, dtype=np.float64)
+    return MetricSeries(np.arange(values.size) * step, values)
+
+
+def test_percentiles_and_stddev_match_numpy_for_ragged_rows():
+    rng = np.random.default_rng(11)
+    rows = [rng.uniform(0, 100, size) for size in (10, 37, 200)]
+    computed = compute_stats([_series(row) for row in rows], [None] * 3, [None] * 3, percentiles=(50, 95, 99))
+    for row, stats in zip(rows, computed):
+        for q in (50, 95, 99):
+            assert np.isclose(stats.percentile(q), np.percentile(row, q))
+        assert np.isclose(stats.stddev, row.std())
+        assert stats.above_warning is None
+
+
+def test_histogram_and_time_over_threshold():
+    values = [5, 15, 15, 75, 95, 95, 50, 120]
+    stats = compute_stats([_series(values)], [70], [90], buckets=(10, 20, 100))[0]
+    assert stats.histogram.tolist() == [1, 2, 4, 1]
+    assert stats.above_warning == 4 * 60  # 75, 95, 95, 120 (샘플마다 step 만큼 유지)
+    assert stats.above_critical == 3 * 60
+    assert [label for label, _ in stats.distribution()] == ['≤10', '≤20', '≤100', '>100']
+
+
+def test_sample_durations_cap_gaps_at_step():
+    durations = sample_durations(np.array([0.0, 60.0, 120.0, 1000.0, 1060.0]))
+    assert durations.tolist() == [60.0, 60.0, 60.0, 60.0, 60.0]
@@ -0,0 +1,43 @@
+import logging
+
+from prom_fleet import FleetCollector, add_instance_grouping
+
+
+class _Report:
+    def __init__(self, prometheus_config=None):
+        self.config = {'prometheus': prometheus_config or {}}
+        self.logger = logging.getLogger(__name__)
+
+
+def test_grouping_added_to_all_aggregations():
+    assert add_instance_grouping('sum(rate(x[5m]))') == 'sum by(instance) (rate(x[5m]))'
+    assert add_instance_grouping('topk(3, x)') == 'topk by(instance) (3, x)'
+    assert add_instance_grouping('bottomk(3, x)') == 'bottomk by(instance) (3, x)'
+    assert add_instance_grouping('quantile(0.9, x)') == 'quantile by(instance) (0.9, x)'
+    assert add_instance_grouping('count_values("v", x)') == 'count_values by(instance) ("v", x)'
+    assert add_instance_grouping('avg by (mode) (x)') == 'avg by(mode, instance) (x)'
+    assert add_instance_grouping('max(x) without (instance, cpu)') == 'max(x) without(cpu) '
+
+
+def test_aggregation_names_inside_strings_are_ignored():
+    query = 'x{job="sum (x)", mode=~"max by(a)"}'
+    assert add_instance_grouping(query) == query
+    assert add_instance_grouping('sum(x{job="max (y)"})') == 'sum by(instance) (x{job="max (y)"})'
+
+
+def test_fleet_query_renders_instance_regex():
+    query = FleetCollector.fleet_query('avg(x{instance="{ip}:9100"})', ['10.0.0.1', '10.0.0.2'])
+    assert query == 'avg by(instance) (x{instance=~"10\\\\.0\\\\.0\\\\.1:9100|10\\\\.0\\\\.0\\\\.2:9100"})'
+
+
+def test_chunk_length_uses_rendered_suffix():
+    ips = [f"10.0.0.{i}" for i in range(100)]
+    collector = FleetCollector(_Report({'fleet_max_regex_length': 200}))
+    short = collector.chunk(ips, [''])
+    long = collector.chunk(ips, [':9100', ':9182'])
+    for chunks, suffix in ((short, ''), (long, ':9100')):
+        assert [ip for chunk in chunks for ip in chunk] == ips
+        for chunk in chunks:
+            rendered = FleetCollector.fleet_query(f'x{{instance="{{ip}}{suffix}"}}', chunk)
+            assert len(rendered.split('"')[1]) <= 200
+    assert len(long) > len(short)
@@ -0,0 +1,61 @@
+import numpy as np
+
+from prom_decode import make_series
+from prom_lite import SeriesStore, parse, range_function
+
+STALE_NAN = np.frombuffer(np.uint64(0x7FF0000000000002).tobytes(), dtype=np.float64)[0]
+
+
+def _counter_store():
+    timestamps = np.arange(0.0, 3600.0, 15.0)
+    values = timestamps * 2.0
+    values[100] = STALE_NAN  # 재시작 직후 staleness marker
+    metric = {'__name__': 'node_network_receive_bytes_total', 'instance': 'a:9100'}
+    return SeriesStore([make_series(metric, timestamps, values)])
+
+
+def test_stale_marker_is_dropped_on_load():
+    store = _counter_store()
+    series = store.select(parse('node_network_receive_bytes_total').selectors()[0][0])[0]
+    assert series['values'].size == 239
+    assert not np.isnan(series['values']).any()
+
+
+def test_range_functions_after_stale_marker():
+    store = _counter_store()
+    eval_ts = np.arange(1800.0, 3600.0, 300.0)
+    for query, expected in (
+        ('rate(node_network_receive_bytes_total[5m])', 2.0),
+        ('avg_over_time(node_network_receive_bytes_total[1m])', None),
+    ):
+        result = parse(query).evaluate(store, eval_ts, 300)
+        assert len(result) == 1
+        assert result[0]['values'].size == eval_ts.size, query
+        if expected is not None:
+            assert np.allclose(result[0]['values'], expected)
+
+
+def test_max_min_over_time_match_windowed_reduction():
+    rng = np.random.default_rng(7)
+    timestamps = np.sort(rng.uniform(0, 10000, 500))
+    values = rng.normal(size=500)
+    eval_ts = np.arange(-200.0, 10600.0, 37.0)
+    for name, reducer in (('max_over_time', np.max), ('min_over_time', np.min)):
+        result = range_function(name, timestamps, values, eval_ts, 300)
+        lo = np.searchsorted(timestamps, eval_ts - 300, side='right')
+        hi = np.searchsorted(timestamps, eval_ts, side='right')
+        for i in range(eval_ts.size):
+            if hi[i] > lo[i]:
+                assert result[i] == reducer(values[lo[i]:hi[i]])
+            else:
+                assert np.isnan(result[i])
+
+
+def test_irate_uses_last_two_samples_with_reset():
+    timestamps = np.array([0.0, 15.0, 30.0, 45.0, 60.0])
+    values = np.array([0.0, 30.0, 90.0, 10.0, 40.0])
+    eval_ts = np.array([20.0, 35.0, 50.0, 65.0, 200.0])
+    result = range_function('irate', timestamps, values, eval_ts, 60)
+    assert np.allclose(result[:4], [2.0, 4.0, 10.0 / 15.0, 2.0])
+    assert np.isnan(result[4])
+    assert parse('irate(node_cpu_seconds_total[1m])') is not None
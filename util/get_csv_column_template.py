@@ -1,19 +1,19 @@
+import os
+import sys
 import configparser
 import pandas as pd
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'report'))
+from cmdb_template import compile_templates  # noqa: E402
+
 def load_templates(config_path):
     config = configparser.ConfigParser()
     config.read(config_path, encoding='utf-8')
-    
+
     if 'TEMPLATES' not in config:
         raise ValueError("TEMPLATES section not found in config file.")
-    
-    templates = {}
-    for key, value in config['TEMPLATES'].items():
-        if key.endswith('_template'):
-            templates[key] = value.replace('##', '\n')
-    
-    return templates
+
+    return compile_templates(config['TEMPLATES'])
 
 def load_csv(csv_path):
     # return pd.read_csv(csv_path, encoding='utf-8')
@@ -23,14 +23,7 @@ def get_server_info(df, ip):
     return df[(df['사설IP'] == ip) | (df['공인/NAT IP'] == ip)]
 
 def format_server_info(template, server_info):
-    formatted_info = template
-    for column in server_info.columns:
-        placeholder = f"{{{column}}}"
-        if placeholder in formatted_info:
-            value = server_info[column].values[0]
-            value = '-' if pd.isna(value) or value == '' else str(value)
-            formatted_info = formatted_info.replace(placeholder, value)
-    return formatted_info
+    return template.render(server_info.iloc[0])
 
 def main():
     config_path = '../bot/slrepoBot.conf'
@@ -39,13 +32,18 @@ def main():
 
     try:
         df = load_csv(csv_path)
-        
+
         print("CSV columns:")
         for col in df.columns:
             print(f"- {col}")
         print("\n" + "="*50 + "\n")
 
         templates = load_templates(config_path)
+        for name, template in templates.items():
+            missing = template.missing(df.columns)
+            if missing:
+                print(f"{name}: columns not found in CSV: {', '.join(missing)}")
+
         server_info = get_server_info(df, ip)
 
         if server_info.empty:
@@ -61,4 +59,4 @@ def main():
         print(f"An error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,161 @@
+import os
+import sys
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'report'))
+import prom_remote_read  # noqa: E402
+from prom_lite import Selector, parse as parse_expression  # noqa: E402
+from prom_remote_read import (  # noqa: E402
+    RemoteReadCollector,
+    encode_read_request, encode_read_response, decode_read_response,
+    snappy_compress, snappy_decompress
+)
+
+# Prometheus remote read (/api/v1/read) 대역 서버 테스트
+# - --record: 실제 Prometheus 의 응답 본문(snappy 압축)을 파일로 저장
+# - 기본: 저장된 응답(없으면 합성 응답)을 제공하는 대역 서버를 띄우고 로컬 계산 결과 확인
+# - 대역 서버 실행 전 현재 시각 기준 밀리초 타임스탬프 샘플이 numpy 일괄 디코딩 경로를 타는지 확인
+
+RECORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'remote_read_response.bin')
+SELECTOR = 'node_network_receive_bytes_total{instance="10.10.10.20:9100"}'
+QUERY = f'sum(rate({SELECTOR}[5m]))'
+RANGE_DAYS = 8
+SCRAPE_INTERVAL = 15
+BYTES_PER_SECOND = 1000.0
+
+
+# 합성 응답: 초당 1000 바이트 증가하는 카운터 2개 (중간에 카운터 리셋 포함)
+def synthetic_response(start: float, end: float) -> bytes:
+    timestamps = np.arange(start - start % SCRAPE_INTERVAL, end, SCRAPE_INTERVAL, dtype=np.float64)
+    counter = (timestamps - timestamps[0]) * BYTES_PER_SECOND + 1.0
+    reset = counter.size // 2
+    counter[reset:] -= counter[reset] - 1.0
+    series = [
+        {'metric': {'__name__': 'node_network_receive_bytes_total', 'instance': '10.10.10.20:9100', 'device': device},
+         'timestamps': timestamps, 'values': counter}
+        for device in ('eth0', 'eth1')
+    ]
+    return snappy_compress(encode_read_response([series]))
+
+
+# 현재 시각(밀리초 6바이트 varint) 샘플은 일괄 디코딩되어야 함 - 필드 단위 디코딩 호출 시 실패
+def check_decode_fast_path(end: float):
+    timestamps = np.arange(end - 3600, end, SCRAPE_INTERVAL, dtype=np.float64).round()
+    values = np.linspace(1.0, 2.0, timestamps.size)
+    series = [{'metric': {'__name__': 'up'}, 'timestamps': timestamps, 'values': values}]
+    data = encode_read_response([series])
+
+    def slow_path(*args):
+        raise AssertionError("Samples with current-epoch timestamps fell back to field-by-field decoding")
+
+    original = prom_remote_read._decode_samples_slow
+    prom_remote_read._decode_samples_slow = slow_path
+    try:
+        decoded = decode_read_response(data)[0][0]
+    finally:
+        prom_remote_read._decode_samples_slow = original
+    assert np.array_equal(decoded['timestamps'], timestamps), decoded['timestamps']
+    assert np.array_equal(decoded['values'], values), decoded['values']
+    print(f"Fast path decode: {timestamps.size} samples OK")
+
+
+def record(prometheus_url: str, start: float, end: float):
+    import requests
+    selector, _ = Selector.parse(SELECTOR)
+    response = requests.post(
+        f"{prometheus_url}/api/v1/read",
+        data=snappy_compress(encode_read_request([(selector, start, end)])),
+        headers={'Content-Encoding': 'snappy', 'Content-Type': 'application/x-protobuf',
+                 'X-Prometheus-Remote-Read-Version': '0.1.0'}
+    )
+    response.raise_for_status()
+    with open(RECORD_FILE, 'wb') as f:
+        f.write(response.content)
+    series = decode_read_response(snappy_decompress(response.content))[0]
+    print(f"Recorded {len(series)} series to {RECORD_FILE}")
+
+
+class _Logger:
+    def info(self, message): print(message)
+    def warning(self, message): print(f"WARNING: {message}")
+
+
+# RemoteReadCollector 가 사용하는 PromBlueReport 의 최소 인터페이스
+class _Report:
+    def __init__(self, url: str, session):
+        self.config = {'prometheus': {'url': url}}
+        self.logger = _Logger()
+        self.session = session
+
+    def resolve_step(self, start: float, end: float) -> int:
+        return 3600
+
+    async def get_session(self):
+        return self.session
+
+
+async def run(port: int, start_time: datetime, end_time: datetime):
+    import aiohttp
+
+    if os.path.exists(RECORD_FILE):
+        with open(RECORD_FILE, 'rb') as f:
+            body = f.read()
+        print(f"Serving recorded response: {RECORD_FILE}")
+    else:
+        # 첫 평가 시각은 step(1시간) 경계로 당겨지므로 그 이전 구간까지 생성
+        body = synthetic_response(start_time.timestamp() - 3600 - 600, end_time.timestamp())
+        print("Serving synthetic response")
+
+    async def handle_read(request):
+        # 요청 본문이 올바른 ReadRequest 인지 확인
+        assert request.headers.get('Content-Encoding') == 'snappy'
+        snappy_decompress(await request.read())
+        return web.Response(body=body, content_type='application/x-protobuf', headers={'Content-Encoding': 'snappy'})
+
+    app = web.Application()
+    app.router.add_post('/api/v1/read', handle_read)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+
+    try:
+        async with aiohttp.ClientSession() as session:
+            report = _Report(f"http://127.0.0.1:{port}", session)
+            collector = RemoteReadCollector(report, {'min_range': '7d'})
+            results, remaining = await collector.collect({'network_in': QUERY}, start_time, end_time)
+    finally:
+        await runner.cleanup()
+
+    assert not remaining, f"Query was not evaluated locally: {remaining}"
+    assert parse_expression(QUERY) is not None
+    series = results['network_in']
+    values = series[0]['values'] if series else np.empty(0)
+    print(f"{QUERY}: {values.size} points, min={np.min(values):.1f} max={np.max(values):.1f} avg={np.mean(values):.1f}")
+    if not os.path.exists(RECORD_FILE):
+        # 카운터 2개 x 1000 B/s, 리셋 구간도 보정되어야 함
+        assert np.allclose(values, 2 * BYTES_PER_SECOND), values
+        print("OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prometheus remote read stand-in test')
+    parser.add_argument('--record', metavar='PROMETHEUS_URL', help='실제 Prometheus 응답을 녹화')
+    parser.add_argument('--port', type=int, default=19091)
+    args = parser.parse_args()
+
+    end_time = datetime.now()
+    start_time = end_time - timedelta(days=RANGE_DAYS)
+    if args.record:
+        record(args.record, start_time.timestamp() - 600, end_time.timestamp())
+    else:
+        check_decode_fast_path(end_time.timestamp())
+        asyncio.run(run(args.port, start_time, end_time))
+
+
+if __name__ == "__main__":
+    main()